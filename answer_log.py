@@ -0,0 +1,116 @@
+### FILE: answer_log.py
+"""Batched, append-only log of answered quiz questions.
+
+Answers are appended to an in-memory list on the event loop (a tuple append,
+no I/O) and inserted into ``quiz_answers`` in one ``executemany`` once the
+delay or size bound is reached. The log is diagnostic data: if the database
+keeps failing, the oldest unwritten entries are dropped rather than letting
+the buffer grow without bound. All methods must be called from the event loop
+thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# (user_id, date_str, word_id or None, is_correct, latency_ms or None, answered_at)
+AnswerEntry = tuple[int, str, int | None, bool, int | None, float]
+FlushFunc = Callable[[list[AnswerEntry]], Awaitable[None]]
+
+# Unwritten entries kept across failed flushes, as a multiple of max_pending.
+_RETRY_BACKLOG_FACTOR = 20
+
+
+class AnswerLog:
+    """Buffer answer entries and insert them in batches."""
+
+    def __init__(self, flush_func: FlushFunc, max_delay_ms: int, max_pending: int) -> None:
+        self._flush_func = flush_func
+        self._max_delay = max_delay_ms / 1000
+        self._max_pending = max_pending
+        self._entries: list[AnswerEntry] = []
+        self._has_pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        self.appended = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+
+    def append(self, entry: AnswerEntry) -> None:
+        """Queue one answer for the next batch."""
+        self._entries.append(entry)
+        self.appended += 1
+        self._has_pending.set()
+        if len(self._entries) >= self._max_pending:
+            self._full.set()
+
+    def stats(self) -> dict[str, int]:
+        """Return counters for appended, written and dropped entries."""
+        return {
+            "appended": self.appended,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "pending": len(self._entries),
+        }
+
+    def start(self) -> None:
+        """Start the background flush loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="answer-log-flush")
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write what is still buffered."""
+        if self._task is not None:
+            # wait_for() can swallow the cancel if its wait finished at the
+            # same moment; the flag makes the loop exit regardless.
+            self._stopping = True
+            self._has_pending.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._stopping = False
+        await self.flush()
+        logger.info("Answer log stopped: %s", self.stats())
+
+    async def flush(self) -> None:
+        """Insert every buffered entry in one batch."""
+        async with self._flush_lock:
+            self._has_pending.clear()
+            self._full.clear()
+            if not self._entries:
+                return
+            batch, self._entries = self._entries, []
+            try:
+                # Shielded: a stop() landing mid-write must not lose the batch.
+                await asyncio.shield(self._flush_func(batch))
+            except Exception:
+                logger.exception("Answer log flush failed; keeping %s entries for retry", len(batch))
+                self._entries[:0] = batch
+                overflow = len(self._entries) - self._max_pending * _RETRY_BACKLOG_FACTOR
+                if overflow > 0:
+                    del self._entries[:overflow]
+                    self.dropped += overflow
+                self._has_pending.set()
+            else:
+                self.written += len(batch)
+                self.flushes += 1
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            await self._has_pending.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self._max_delay)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
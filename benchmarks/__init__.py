@@ -0,0 +1,2 @@
+### FILE: benchmarks/__init__.py
+"""Performance benchmarks for SozMaster AI."""
@@ -0,0 +1,75 @@
+### FILE: benchmarks/bench_answer_log.py
+"""Measure what the answer log adds to each quiz answer.
+
+Answers ``answers`` questions through ``storage.answer_quiz_question`` (the
+direct, non-write-behind path) with the answer log off and on, interleaving
+rounds to even out noise, and reports the mean per-answer latency of each.
+It also times the batched insert on its own, which runs on the database
+thread between answers.
+
+Usage::
+
+    python -m benchmarks.bench_answer_log [answers]
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sozmaster-answer-log-"), "bench.db")
+os.environ["WRITE_BEHIND_ENABLED"] = "0"
+
+import config  # noqa: E402
+import db  # noqa: E402
+import storage  # noqa: E402
+from utils.time import get_tashkent_date_str  # noqa: E402
+
+USERS = 50
+ROUNDS = 6
+
+
+async def _answer_round(answers: int, next_index: dict[int, int]) -> float:
+    today = get_tashkent_date_str()
+    start = time.perf_counter()
+    for number in range(answers):
+        user_id = number % USERS + 1
+        await storage.answer_quiz_question(user_id, today, next_index[user_id], number % 3 != 0, number % 100, 1500)
+        next_index[user_id] += 1
+    return (time.perf_counter() - start) / answers * 1e6
+
+
+async def main(answers: int) -> None:
+    await storage.init_db()
+    today = get_tashkent_date_str()
+    for user_id in range(1, USERS + 1):
+        await storage.get_or_create_user(user_id, f"user{user_id}")
+        await storage.save_quiz_state(user_id, today, 0, 0, 10**9, seed=1)
+    next_index = dict.fromkeys(range(1, USERS + 1), 0)
+
+    timings: dict[str, list[float]] = {"log off": [], "log on": []}
+    for _ in range(ROUNDS):
+        for label in timings:
+            config.ANSWER_LOG_ENABLED = label == "log on"
+            storage.start_answer_log()
+            timings[label].append(await _answer_round(answers // ROUNDS, next_index))
+            await storage.stop_answer_log()
+    for label, values in timings.items():
+        print(f"{label:<8} {statistics.median(values):>7.1f} us/answer (median of {ROUNDS} rounds)")
+    added = statistics.median(timings["log on"]) - statistics.median(timings["log off"])
+    print(f"added    {added:>7.1f} us/answer")
+
+    batch = [(1, today, 1, True, 1500, time.time())] * config.ANSWER_LOG_MAX_PENDING
+    start = time.perf_counter()
+    for _ in range(20):
+        db.append_answer_log(batch)
+    per_entry = (time.perf_counter() - start) / (20 * len(batch)) * 1e6
+    print(f"batched insert {per_entry:.2f} us/entry on the DB thread ({len(batch)} per batch)")
+    storage.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 12000))
@@ -0,0 +1,124 @@
+### FILE: benchmarks/bench_broadcast.py
+"""Measure the daily broadcast's database path and check crash-resume delivery.
+
+Seeds a temporary database with ``users`` users (some premium, some who
+already opened /today), then:
+
+* times page assignment alone, to show the DB is far faster than the
+  Telegram rate limit it feeds;
+* runs a broadcast against a fake Bot API, kills it part way, resumes it and
+  verifies that no chat received its words twice.
+
+Usage::
+
+    python -m benchmarks.bench_broadcast [users] [batch_size]
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any
+
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sozmaster-broadcast-"), "bench.db")
+
+import db  # noqa: E402
+import storage  # noqa: E402
+from benchmarks.fake_telegram import FakeTelegramSession, create_fake_bot  # noqa: E402
+from middlewares.send_queue import OutboundSendQueue  # noqa: E402
+from services import word_service  # noqa: E402
+from services.broadcast_service import run_daily_broadcast  # noqa: E402
+
+TELEGRAM_RATE = 25
+
+
+class _RecordingSession(FakeTelegramSession):
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.chats: Counter[int] = Counter()
+
+    async def make_request(self, bot, method, timeout=None):
+        result = await super().make_request(bot, method, timeout)
+        if method.__api_method__ == "sendMessage":
+            self.chats[int(method.chat_id)] += 1
+        return result
+
+
+def _seed(users: int, dates: list[str]) -> int:
+    """Insert users; every tenth one already has words for each date."""
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (user_id, username, premium_until, last_word_index) VALUES (?, ?, ?, ?)",
+            [
+                (user_id, f"user{user_id}", "2999-01-01T00:00:00+00:00" if user_id % 7 == 0 else None, user_id % 500)
+                for user_id in range(1, users + 1)
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO user_daily_words (user_id, date, word_ids) VALUES (?, ?, ?)",
+            [(user_id, date, b"") for date in dates for user_id in range(10, users + 1, 10)],
+        )
+        conn.commit()
+    return users - users // 10
+
+
+async def _time_assignment(date: str, batch_size: int) -> int:
+    assigned = 0
+    after: int | None = 0
+    start = time.perf_counter()
+    while after is not None:
+        deliveries, after = await word_service.assign_broadcast_batch(date, after, batch_size)
+        assigned += len(deliveries)
+    elapsed = time.perf_counter() - start
+    print(
+        f"assignment: {assigned} users in {elapsed:.2f}s ({assigned / elapsed:,.0f} users/s, "
+        f"Telegram allows {TELEGRAM_RATE}/s)"
+    )
+    return assigned
+
+
+async def _crash_and_resume(date: str, expected: int, batch_size: int) -> None:
+    session = _RecordingSession()
+    queue = OutboundSendQueue(global_rate=20000, global_burst=100, chat_rate=100, chat_burst=1)
+    session.middleware(queue)
+    bot = create_fake_bot(session)
+
+    first = asyncio.create_task(run_daily_broadcast(bot, date, batch_size))
+    while sum(session.chats.values()) < expected // 3:
+        await asyncio.sleep(0.01)
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    await queue.close()
+    sent_before_crash = sum(session.chats.values())
+
+    start = time.perf_counter()
+    run = await run_daily_broadcast(bot, date, batch_size)
+    elapsed = time.perf_counter() - start
+    await queue.close()
+
+    delivered = sum(session.chats.values())
+    duplicates = sum(1 for count in session.chats.values() if count > 1)
+    print(
+        f"crash/resume: {sent_before_crash} sent before crash, {delivered} total, "
+        f"{expected - delivered} claimed but lost in the crash, duplicates={duplicates}"
+    )
+    print(f"resume took {elapsed:.2f}s; checkpoint: {run}")
+    print(f"projected wall time at {TELEGRAM_RATE} msg/s: {expected / TELEGRAM_RATE / 60:.1f} min")
+    assert duplicates == 0, "a user received the daily words twice"
+
+
+async def main(users: int, batch_size: int) -> None:
+    await storage.init_db()
+    expected = _seed(users, ["2030-01-01", "2030-01-02"])
+    await _time_assignment("2030-01-01", batch_size)
+    await _crash_and_resume("2030-01-02", expected, batch_size)
+    storage.shutdown()
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    asyncio.run(main(users, batch_size))
@@ -0,0 +1,85 @@
+### FILE: benchmarks/bench_callback_data.py
+"""Fuzz and time the compact quiz answer callback payload.
+
+Checks that every valid ``(quiz_id, question, option)`` triple round-trips
+through Telegram's ``callback_data`` string, that random garbage is rejected
+with ``ValueError`` only, and compares speed and size with the old
+``quote_plus`` translation payload.
+
+Usage::
+
+    python -m benchmarks.bench_callback_data [iterations]
+"""
+from __future__ import annotations
+
+import random
+import string
+import sys
+import time
+from urllib.parse import quote_plus, unquote_plus
+
+from keyboards import QuizAnswerCallback
+from wordbank import WORD_BANK
+
+_ALPHABET = string.ascii_letters + string.digits + "-_=:+/ "
+
+
+def _fuzz_round_trip(iterations: int, rng: random.Random) -> None:
+    for _ in range(iterations):
+        expected = (rng.getrandbits(32), rng.randrange(256), rng.randrange(256))
+        packed = QuizAnswerCallback.build(*expected).pack()
+        assert len(packed.encode()) <= 64, packed
+        assert QuizAnswerCallback.unpack(packed).decode() == expected, (packed, expected)
+
+
+def _fuzz_garbage(iterations: int, rng: random.Random) -> int:
+    """Feed random payloads; anything but a clean rejection or decode fails.
+
+    ``unpack`` errors (``TypeError``/``ValueError``) are what aiogram's filter
+    treats as "not this callback". Well-formed tokens that decode are caught
+    later by the server-side quiz state check.
+    """
+    rejected = 0
+    for _ in range(iterations):
+        token = "".join(rng.choice(_ALPHABET) for _ in range(rng.randrange(0, 16)))
+        try:
+            callback_data = QuizAnswerCallback.unpack(f"qa:{token}")
+        except (TypeError, ValueError):
+            rejected += 1
+            continue
+        try:
+            callback_data.decode()
+        except ValueError:
+            rejected += 1
+    return rejected
+
+
+def _time(label: str, func, iterations: int) -> None:
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    per_call = (time.perf_counter() - start) / iterations * 1_000_000
+    print(f"{label:<34} {per_call:8.2f} us/op")
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(20240601)
+
+    _fuzz_round_trip(iterations, rng)
+    rejected = _fuzz_garbage(iterations, rng)
+    print(f"round-trip fuzz: {iterations} ok; garbage rejected: {rejected}/{iterations}")
+
+    sample = QuizAnswerCallback.build(123456789, 3, 2).pack()
+    longest = max((w["translation_uz"] for w in WORD_BANK), key=len)
+    legacy = f"quiz_ans|{quote_plus(longest)}"
+    print(f"payload bytes: compact={len(sample.encode())} legacy(longest)={len(legacy.encode())}")
+
+    _time("compact encode", lambda i: QuizAnswerCallback.build(i, i % 20, i % 4).pack(), iterations)
+    _time("compact decode", lambda i: QuizAnswerCallback.unpack(sample).decode(), iterations)
+    _time("legacy encode", lambda i: f"quiz_ans|{quote_plus(longest)}", iterations)
+    _time("legacy decode", lambda i: unquote_plus(legacy.split("|", maxsplit=1)[1]), iterations)
+
+
+if __name__ == "__main__":
+    main()
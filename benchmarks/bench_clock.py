@@ -0,0 +1,73 @@
+### FILE: benchmarks/bench_clock.py
+"""Time the cached clock against per-call ``ZoneInfo`` + ``strftime`` dates.
+
+Also walks a :class:`~utils.clock.FakeClock` across midnight in two zones to
+check that the cached day boundaries roll over at the right instant.
+
+Usage::
+
+    python -m benchmarks.bench_clock [iterations]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from config import TIMEZONE
+from utils.clock import Clock, FakeClock
+
+
+def _uncached_today() -> str:
+    """The previous implementation of ``get_tashkent_date_str``."""
+    return datetime.now(ZoneInfo(TIMEZONE)).strftime("%Y-%m-%d")
+
+
+def _uncached_yesterday() -> str:
+    return (datetime.now(ZoneInfo(TIMEZONE)) - timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _measure(label: str, func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {iterations / elapsed:>12,.0f} calls/s")
+    return elapsed
+
+
+def _check_rollover() -> None:
+    tashkent = ZoneInfo("Asia/Tashkent")
+    clock = FakeClock(datetime(2030, 3, 9, 23, 59, 59, tzinfo=tashkent), default_timezone="Asia/Tashkent")
+    assert (clock.yesterday(), clock.today(), clock.tomorrow()) == ("2030-03-08", "2030-03-09", "2030-03-10")
+    assert clock.today("America/New_York") == "2030-03-09"
+    clock.advance(1)
+    assert clock.today() == "2030-03-10", clock.today()
+    assert clock.yesterday() == "2030-03-09"
+    assert clock.today("America/New_York") == "2030-03-09"
+    # New York starts daylight saving time on 2030-03-10; its day is 23 hours long.
+    clock.set(datetime(2030, 3, 10, 23, 59, 59, tzinfo=ZoneInfo("America/New_York")))
+    assert clock.today("America/New_York") == "2030-03-10"
+    day = clock.day("America/New_York")
+    assert day.end - day.start == 23 * 3600, day
+    clock.advance(1)
+    assert clock.today("America/New_York") == "2030-03-11"
+    assert clock.seconds_until_local_hour(8) > 0
+    print("rollover checks passed (default zone and a DST zone)")
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    clock = Clock()
+    old = _measure("ZoneInfo + strftime: today", _uncached_today, iterations)
+    new = _measure("Clock.today()", clock.today, iterations)
+    _measure("ZoneInfo + strftime: yesterday", _uncached_yesterday, iterations)
+    _measure("Clock.yesterday()", clock.yesterday, iterations)
+    _measure("Clock.today('Europe/Moscow')", lambda: clock.today("Europe/Moscow"), iterations)
+    print(f"speed-up for today(): {old / new:.1f}x")
+    _check_rollover()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+### FILE: benchmarks/bench_connections.py
+"""Compare per-query connections against the pooled connection manager.
+
+Usage::
+
+    python -m benchmarks.bench_connections [iterations]
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sozmaster-bench-"), "bench.db")
+
+import db  # noqa: E402  (DB_PATH must be set before import)
+
+
+def _old_style_lookup(user_id: int) -> None:
+    """Replicate the original connect/query/close pattern."""
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)).fetchone()
+    finally:
+        conn.close()
+
+
+def _old_style_add_xp(user_id: int) -> None:
+    conn = sqlite3.connect(db.DB_PATH)
+    try:
+        conn.execute("UPDATE users SET xp = COALESCE(xp, 0) + ? WHERE user_id = ?", (1, user_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _measure(label: str, func, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i % 100 + 1)
+    elapsed = time.perf_counter() - start
+    rate = iterations / elapsed
+    print(f"{label:<28} {rate:>12,.0f} ops/s  ({elapsed * 1000:.1f} ms total)")
+    return rate
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    db.init_db()
+    for user_id in range(1, 101):
+        db.get_or_create_user(user_id, f"user{user_id}")
+
+    print(f"DB: {db.DB_PATH}, iterations: {iterations}")
+    old_read = _measure("per-query connect: read", _old_style_lookup, iterations)
+    new_read = _measure("pooled: read", db.get_user, iterations)
+    old_write = _measure("per-query connect: write", _old_style_add_xp, iterations)
+    new_write = _measure("pooled: write", lambda uid: db.add_xp(uid, 1), iterations)
+    print(f"read speed-up:  x{new_read / old_read:.1f}")
+    print(f"write speed-up: x{new_write / old_write:.1f}")
+    db.close_connections()
+
+
+if __name__ == "__main__":
+    main()
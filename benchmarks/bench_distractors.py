@@ -0,0 +1,52 @@
+### FILE: benchmarks/bench_distractors.py
+"""Compare per-question pool rebuilding against the prebuilt distractor index.
+
+Usage::
+
+    python -m benchmarks.bench_distractors [questions]
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from services.word_service import DistractorIndex
+
+
+def _synthetic_bank(size: int) -> list[dict]:
+    return [{"word": f"word{i}", "translation_uz": f"tarjima{i}"} for i in range(size)]
+
+
+def _rebuild_pool(bank: list[dict], target: dict) -> list[str]:
+    """The original implementation: filter the whole bank for every question."""
+    correct = target["translation_uz"]
+    pool = [w["translation_uz"] for w in bank if w["translation_uz"] != correct]
+    return random.sample(pool, k=3)
+
+
+def _measure(func, questions: int) -> float:
+    start = time.perf_counter()
+    for _ in range(questions):
+        func()
+    return (time.perf_counter() - start) / questions * 1_000_000
+
+
+def main() -> None:
+    questions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{'bank size':>10} {'rebuild us/q':>14} {'index us/q':>12} {'index build ms':>15}")
+    for size in (56, 1_000, 10_000, 100_000, 500_000):
+        bank = _synthetic_bank(size)
+        build_start = time.perf_counter()
+        index = DistractorIndex(bank)
+        build_ms = (time.perf_counter() - build_start) * 1000
+        targets = [random.choice(bank) for _ in range(64)]
+
+        rebuild_questions = max(20, questions * 1_000 // max(size, 1_000))
+        rebuild_us = _measure(lambda: _rebuild_pool(bank, random.choice(targets)), rebuild_questions)
+        index_us = _measure(lambda: index.sample(random.choice(targets)["translation_uz"]), questions)
+        print(f"{size:>10,} {rebuild_us:>14.1f} {index_us:>12.2f} {build_ms:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
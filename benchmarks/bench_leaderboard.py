@@ -0,0 +1,76 @@
+### FILE: benchmarks/bench_leaderboard.py
+"""Compare rank and top-N queries in SQLite with the in-memory XP board.
+
+Seeds ``users`` users with random XP, then times a "your rank" lookup as
+``COUNT(*) WHERE xp > ?`` with and without ``idx_users_xp``, a top-10 page
+via ``ORDER BY xp DESC``, and the same two reads on :class:`leaderboard.XpBoard`.
+
+Usage::
+
+    python -m benchmarks.bench_leaderboard [users]
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sozmaster-leaderboard-"), "bench.db")
+
+import db  # noqa: E402
+from leaderboard import XpBoard  # noqa: E402
+
+ROUNDS = 300
+
+
+def _time(func, rounds: int = ROUNDS) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main(users: int) -> None:
+    db.init_db()
+    rng = random.Random(1)
+    rows = [(user_id, int(rng.paretovariate(1.2) * 10)) for user_id in range(1, users + 1)]
+    with db.get_connection() as conn:
+        conn.execute("DELETE FROM users")
+        conn.executemany("INSERT INTO users (user_id, username, xp) VALUES (?, 'u', ?)", rows)
+        conn.commit()
+
+    probes = [rng.choice(rows) for _ in range(ROUNDS)]
+
+    def sql_rank() -> None:
+        user_id, xp = probes[rng.randrange(ROUNDS)]
+        with db.get_connection() as conn:
+            conn.execute("SELECT COUNT(*) AS c FROM users WHERE xp > ?", (xp,)).fetchone()
+
+    def sql_top() -> None:
+        with db.get_connection() as conn:
+            conn.execute("SELECT user_id, xp FROM users ORDER BY xp DESC, user_id LIMIT 10").fetchall()
+
+    start = time.perf_counter()
+    totals, _ = db.load_leaderboards("9999-01-01")
+    board = XpBoard.from_totals(totals)
+    print(f"{users:,} users; board built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"sql rank (index)     {_time(sql_rank):>9.1f} us")
+    print(f"sql top-10 (index)   {_time(sql_top):>9.1f} us")
+    print(f"board rank           {_time(lambda: board.rank(probes[rng.randrange(ROUNDS)][0])):>9.1f} us")
+    print(f"board top-10         {_time(lambda: board.top(10)):>9.1f} us")
+    print(f"board add_xp         {_time(lambda: board.add(rng.randrange(1, users + 1), 1)):>9.1f} us")
+
+    with db.get_connection() as conn:
+        conn.execute("DROP INDEX idx_users_xp")
+        conn.commit()
+    db.close_connections()
+    print(f"sql rank (no index)  {_time(sql_rank, 30):>9.1f} us")
+    print(f"sql top-10 (no index){_time(sql_top, 30):>9.1f} us")
+    db.close_connections()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,151 @@
+### FILE: benchmarks/bench_metrics.py
+"""Check that metrics collection stays inside its overhead budget.
+
+Three measurements, each interleaving rounds with metrics off and on to even
+out noise (the median round counts):
+
+* SQL: a primary-key ``SELECT`` on a plain connection versus a timed one
+  reporting to :func:`metrics.observe_statement`; budget in microseconds
+  per statement.
+* Updates: ``/stats`` and ``/today`` updates through the full dispatcher
+  against a fake Bot, without metrics versus with the handler middleware
+  and timed connections; budget as a share of the per-update time.
+* Scrape: rendering ``/metrics`` once the run has filled the registry.
+
+Exits with status 1 if a budget is exceeded.
+
+Usage::
+
+    python -m benchmarks.bench_metrics [updates_per_round]
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sozmaster-metrics-"), "bench.db")
+
+import db  # noqa: E402
+import metrics  # noqa: E402
+import storage  # noqa: E402
+from benchmarks.fake_telegram import FakeTelegramSession, create_fake_bot, message_update  # noqa: E402
+from bot import create_dispatcher  # noqa: E402
+from middlewares.metrics import HandlerLabelMiddleware, HandlerMetricsMiddleware  # noqa: E402
+
+SQL_BUDGET_US = 3.0
+UPDATE_BUDGET_PERCENT = 5.0
+SCRAPE_BUDGET_MS = 10.0
+ROUNDS = 7
+STATEMENTS = 20000
+USERS = 200
+
+
+def _time_statements(conn: sqlite3.Connection) -> float:
+    start = time.perf_counter()
+    for number in range(STATEMENTS):
+        conn.execute("SELECT xp FROM users WHERE user_id = ?", (number % USERS + 1,)).fetchone()
+    return (time.perf_counter() - start) / STATEMENTS * 1e6
+
+
+def bench_sql() -> tuple[float, float]:
+    db.close_connections()
+    plain = db._open_connection(db.DB_PATH)
+    db.add_statement_observer(metrics.observe_statement)
+    timed = db._open_connection(db.DB_PATH)
+    db.remove_statement_observer(metrics.observe_statement)
+    off, on = [], []
+    for _ in range(ROUNDS):
+        off.append(_time_statements(plain))
+        on.append(_time_statements(timed))
+    plain.close()
+    timed.close()
+    return statistics.median(off), statistics.median(on)
+
+
+async def _time_updates(dp, bot, count: int, first_update_id: int) -> float:
+    start = time.perf_counter()
+    for number in range(count):
+        user_id = number % USERS + 1
+        text = "/stats" if number % 2 else "/today"
+        await dp.feed_update(bot, message_update(first_update_id + number, user_id, text))
+    await dp["user_scheduler"].join()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def _toggle_metrics(dp, enabled: bool, outer, label) -> None:
+    """Attach or detach the metrics middlewares and the SQL observer."""
+    for observer, middleware in ((dp.update.outer_middleware, outer), (dp.message.middleware, label),
+                                 (dp.callback_query.middleware, label)):
+        if enabled:
+            observer.register(middleware)
+        else:
+            observer.unregister(middleware)
+    if enabled:
+        db.add_statement_observer(metrics.observe_statement)
+    else:
+        db.remove_statement_observer(metrics.observe_statement)
+    # Connections pick up the observer when reopened on the database thread.
+    storage.shutdown()
+
+
+async def bench_updates(count: int) -> tuple[float, float]:
+    bot = create_fake_bot(FakeTelegramSession())
+    dp = create_dispatcher()
+    outer, label = HandlerMetricsMiddleware(), HandlerLabelMiddleware()
+    update_id = 1
+    for user_id in range(1, USERS + 1):
+        await dp.feed_update(bot, message_update(update_id, user_id, "/start"))
+        update_id += 1
+    await dp["user_scheduler"].join()
+
+    off, on = [], []
+    for _ in range(ROUNDS):
+        off.append(await _time_updates(dp, bot, count, update_id))
+        update_id += count
+        _toggle_metrics(dp, True, outer, label)
+        on.append(await _time_updates(dp, bot, count, update_id))
+        update_id += count
+        _toggle_metrics(dp, False, outer, label)
+    await dp["user_scheduler"].stop()
+    storage.shutdown()
+    return statistics.median(off), statistics.median(on)
+
+
+def bench_scrape() -> tuple[float, int]:
+    start = time.perf_counter()
+    body = metrics.REGISTRY.render()
+    return (time.perf_counter() - start) * 1000, len(body.splitlines())
+
+
+async def main(count: int) -> int:
+    await storage.init_db()
+    await storage.load_leaderboards()
+    failures = 0
+
+    update_off, update_on = await bench_updates(count)
+    update_percent = (update_on - update_off) / update_off * 100
+    print(f"update  off {update_off:8.1f} us  on {update_on:8.1f} us  "
+          f"overhead {update_percent:+5.1f}%  (budget {UPDATE_BUDGET_PERCENT}%)")
+    failures += update_percent > UPDATE_BUDGET_PERCENT
+
+    sql_off, sql_on = bench_sql()
+    sql_overhead = sql_on - sql_off
+    print(f"sql     off {sql_off:8.2f} us  on {sql_on:8.2f} us  "
+          f"overhead {sql_overhead:+5.2f} us  (budget {SQL_BUDGET_US} us)")
+    failures += sql_overhead > SQL_BUDGET_US
+
+    scrape_ms, lines = bench_scrape()
+    print(f"scrape  {scrape_ms:8.2f} ms for {lines} lines  (budget {SCRAPE_BUDGET_MS} ms)")
+    failures += scrape_ms > SCRAPE_BUDGET_MS
+
+    print("over budget" if failures else "within budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)))
@@ -0,0 +1,95 @@
+### FILE: benchmarks/bench_precompute.py
+"""Compare the midnight /today burst with and without precomputed word sets.
+
+Seeds ``users`` users who were active yesterday, then fires one
+``get_or_assign_today_words`` per user concurrently, first with nothing
+prepared and then (on a fresh database) after planning today's sets ahead of
+time the way the evening job does.
+
+Usage::
+
+    python -m benchmarks.bench_precompute [users]
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sozmaster-precompute-"), "bench.db")
+
+import db  # noqa: E402
+import storage  # noqa: E402
+from services import word_service  # noqa: E402
+from utils.time import get_tashkent_date_str, get_yesterday_date_str  # noqa: E402
+
+
+def _reset(users: int) -> None:
+    with db.get_connection() as conn:
+        for table in ("users", "user_daily_words"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.executemany(
+            """
+            INSERT INTO users (user_id, username, premium_until, last_word_index, last_active_date, streak)
+            VALUES (?, ?, ?, ?, ?, 3)
+            """,
+            [
+                (
+                    user_id,
+                    f"user{user_id}",
+                    "2999-01-01T00:00:00+00:00" if user_id % 7 == 0 else None,
+                    user_id % 500,
+                    get_yesterday_date_str(),
+                )
+                for user_id in range(1, users + 1)
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO user_daily_words (user_id, date, word_ids) VALUES (?, ?, ?)",
+            [(user_id, get_yesterday_date_str(), b"") for user_id in range(1, users + 1)],
+        )
+        conn.commit()
+    storage.session_cache.clear()
+
+
+async def _burst(label: str, users: int) -> None:
+    latencies: list[float] = []
+
+    async def today(user_id: int) -> None:
+        start = time.perf_counter()
+        await word_service.get_or_assign_today_words(user_id, f"user{user_id}")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(today(user_id) for user_id in range(1, users + 1)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(
+        f"{label:<14} {users / elapsed:>8,.0f} /today per s  "
+        f"p50 {statistics.median(latencies) * 1000:.1f} ms  p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms"
+    )
+
+
+async def main(users: int) -> None:
+    await storage.init_db()
+    yesterday, today = get_yesterday_date_str(), get_tashkent_date_str()
+
+    _reset(users)
+    await _burst("live assign", users)
+
+    _reset(users)
+    start = time.perf_counter()
+    written, after = 0, 0
+    while after is not None:
+        page_written, after = await word_service.precompute_batch(yesterday, today, after, 1000)
+        written += page_written
+    print(f"precompute     {written} sets in {time.perf_counter() - start:.2f}s (off-peak)")
+    await _burst("precomputed", users)
+    storage.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,78 @@
+### FILE: benchmarks/bench_reviews.py
+"""Time due-card selection for a user with tens of thousands of review cards.
+
+Seeds ``cards`` cards for one user (and a few other users around it), prints
+the query plan, then times :func:`db.get_due_reviews` with the
+``(user_id, due_at)`` index and again after dropping it.
+
+Usage::
+
+    python -m benchmarks.bench_reviews [cards] [iterations]
+"""
+from __future__ import annotations
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sozmaster-reviews-"), "bench.db")
+
+import db  # noqa: E402
+
+NOW = 1_900_000_000
+USER_ID = 42
+
+
+def _seed(cards: int) -> None:
+    rng = random.Random(7)
+    rows = []
+    for user_id in (USER_ID - 1, USER_ID, USER_ID + 1):
+        for word_id in range(cards):
+            # ~2% of cards are due; the rest are spread over the next year.
+            due_at = NOW - rng.randrange(86400) if rng.random() < 0.02 else NOW + rng.randrange(365 * 86400)
+            rows.append((user_id, word_id, 2.5, 6.0, 2, 0, due_at, NOW - 86400))
+    with db.get_connection() as conn:
+        conn.executemany("INSERT INTO review_cards VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+
+
+def _plan() -> str:
+    # A fresh connection: pooled ones cache prepared statements across schema changes.
+    conn = sqlite3.connect(db.DB_PATH)
+    try:
+        rows = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT word_id FROM review_cards WHERE user_id = ? AND due_at <= ? "
+            "ORDER BY due_at LIMIT ?",
+            (USER_ID, NOW, 10),
+        ).fetchall()
+    finally:
+        conn.close()
+    return "; ".join(row[-1] for row in rows)
+
+
+def _measure(label: str, iterations: int) -> None:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        due = db.get_due_reviews(USER_ID, NOW, 10)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<14} {elapsed / iterations * 1e6:>10.1f} us/query  ({len(due)} due)  plan: {_plan()}")
+
+
+def main() -> None:
+    cards = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    db.init_db()
+    _seed(cards)
+    print(f"{cards} cards per user, 3 users")
+    _measure("indexed", iterations)
+    with db.get_connection() as conn:
+        conn.execute("DROP INDEX idx_review_cards_due")
+        conn.commit()
+    _measure("no index", max(1, iterations // 10))
+
+
+if __name__ == "__main__":
+    main()
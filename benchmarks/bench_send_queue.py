@@ -0,0 +1,117 @@
+### FILE: benchmarks/bench_send_queue.py
+"""Drive the outbound send queue against a fake Bot API that enforces flood limits.
+
+Three scenarios run against :class:`~benchmarks.fake_telegram.FakeTelegramSession`
+configured with scaled-down Telegram limits:
+
+* ``raw`` fires a bulk broadcast without the queue and counts 429 errors;
+* ``queued`` sends the same broadcast as bulk traffic while interactive
+  replies arrive, with random 429s injected, and reports delivery, retries and
+  interactive latency;
+* ``coalesce`` fires a burst of edits at one message and counts API calls.
+
+Usage::
+
+    python -m benchmarks.bench_send_queue [chats] [messages_per_chat]
+"""
+from __future__ import annotations
+
+import asyncio
+import statistics
+import sys
+import time
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from benchmarks.fake_telegram import FakeTelegramSession, create_fake_bot
+from middlewares.send_queue import PRIORITY_BULK, OutboundSendQueue, send_priority
+
+GLOBAL_LIMIT = 100
+CHAT_LIMIT = 3
+
+
+async def _broadcast(bot, chats: int, per_chat: int) -> tuple[int, int]:
+    async def send(chat_id: int, n: int) -> bool:
+        try:
+            await bot.send_message(chat_id, f"bulk {n}")
+            return True
+        except TelegramRetryAfter:
+            return False
+
+    with send_priority(PRIORITY_BULK):
+        results = await asyncio.gather(
+            *(send(chat_id, n) for n in range(per_chat) for chat_id in range(1, chats + 1))
+        )
+    return sum(results), len(results) - sum(results)
+
+
+async def _raw(chats: int, per_chat: int) -> None:
+    session = FakeTelegramSession(global_limit=GLOBAL_LIMIT, chat_limit=CHAT_LIMIT)
+    bot = create_fake_bot(session)
+    start = time.perf_counter()
+    delivered, failed = await _broadcast(bot, chats, per_chat)
+    elapsed = time.perf_counter() - start
+    print(f"raw      delivered={delivered} failed={failed} 429s={session.calls['429']} in {elapsed:.2f}s")
+
+
+async def _queued(chats: int, per_chat: int) -> None:
+    session = FakeTelegramSession(global_limit=GLOBAL_LIMIT, chat_limit=CHAT_LIMIT, flood_probability=0.02)
+    queue = OutboundSendQueue(global_rate=GLOBAL_LIMIT * 0.9, chat_rate=CHAT_LIMIT * 0.9, chat_burst=1)
+    session.middleware(queue)
+    bot = create_fake_bot(session)
+
+    latencies: list[float] = []
+
+    async def interactive(chat_id: int) -> None:
+        await asyncio.sleep(0.2 + chat_id * 0.05)
+        start = time.perf_counter()
+        await bot.send_message(100000 + chat_id, "reply")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    (delivered, failed), _ = await asyncio.gather(
+        _broadcast(bot, chats, per_chat),
+        asyncio.gather(*(interactive(i) for i in range(20))),
+    )
+    elapsed = time.perf_counter() - start
+    expected = chats * per_chat / (GLOBAL_LIMIT * 0.9)
+    print(
+        f"queued   delivered={delivered} failed={failed} 429s={session.calls['429']} "
+        f"in {elapsed:.2f}s (ideal {expected:.2f}s) stats={queue.stats()}"
+    )
+    print(
+        f"         interactive latency p50={statistics.median(latencies) * 1000:.1f}ms "
+        f"max={max(latencies) * 1000:.1f}ms while bulk queued"
+    )
+    assert failed == 0, "queued broadcast lost messages"
+    await queue.close()
+
+
+async def _coalesce(edits: int) -> None:
+    session = FakeTelegramSession(latency=0.01)
+    queue = OutboundSendQueue(chat_burst=1)
+    session.middleware(queue)
+    bot = create_fake_bot(session)
+    # Use the chat's only token so the edits pile up behind it.
+    await bot.send_message(1, "quiz")
+    results = await asyncio.gather(
+        *(bot.edit_message_text(text=f"edit {n}", chat_id=1, message_id=7) for n in range(edits))
+    )
+    assert all(result.text == f"edit {edits - 1}" for result in results)
+    print(
+        f"coalesce {edits} edits -> {session.calls['editMessageText']} editMessageText calls "
+        f"(coalesced={queue.coalesced})"
+    )
+    await queue.close()
+
+
+async def main(chats: int, per_chat: int) -> None:
+    await _raw(chats, per_chat)
+    await _queued(chats, per_chat)
+    await _coalesce(20)
+
+
+if __name__ == "__main__":
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    per_chat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    asyncio.run(main(chats, per_chat))
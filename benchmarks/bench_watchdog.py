@@ -0,0 +1,132 @@
+### FILE: benchmarks/bench_watchdog.py
+"""Check that the loop watchdog catches a stall and costs little when idle.
+
+Detection: ``storage.run`` is swapped for an inline call (the mistake the
+watchdog exists to catch: database work on the event loop) while another
+connection holds the write lock, so a ``/today`` update blocks the loop
+inside a ``db`` write until the lock is released. The watchdog must name
+``today_handler.cmd_today`` and a ``db.*`` function.
+
+Overhead: coroutines doing short CPU-bound steps between yields, with the
+watchdog off and on, interleaved rounds of ``seconds`` each; the median
+loop throughput is compared.
+
+Usage::
+
+    python -m benchmarks.bench_watchdog [seconds_per_round]
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sozmaster-watchdog-"), "bench.db")
+
+import db  # noqa: E402
+import storage  # noqa: E402
+from benchmarks.fake_telegram import FakeTelegramSession, create_fake_bot, message_update  # noqa: E402
+from bot import create_dispatcher  # noqa: E402
+from loop_watchdog import LoopWatchdog  # noqa: E402
+
+ROUNDS = 7
+WORKERS = 50
+USERS = 200
+LOCK_SECONDS = 0.3
+OVERHEAD_BUDGET_PERCENT = 5.0
+
+
+def _hold_write_lock(ready: threading.Event) -> None:
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.execute("BEGIN EXCLUSIVE")
+    ready.set()
+    time.sleep(LOCK_SECONDS)
+    conn.rollback()
+    conn.close()
+
+
+async def _inline_run(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+async def detect(dp, bot) -> dict | None:
+    watchdog = LoopWatchdog(threshold_ms=100, interval_ms=20, sample_ms=20)
+    watchdog.start()
+    await asyncio.sleep(0.1)
+    ready = threading.Event()
+    locker = threading.Thread(target=_hold_write_lock, args=(ready,))
+    locker.start()
+    ready.wait()
+    real_run, storage.run = storage.run, _inline_run
+    try:
+        await dp.feed_update(bot, message_update(10_000_000, USERS + 1, "/today"))
+        await dp["user_scheduler"].join()
+        await asyncio.sleep(0.1)
+    finally:
+        storage.run = real_run
+        locker.join()
+        await watchdog.stop()
+    return watchdog.recent[-1] if watchdog.recent else None
+
+
+async def _busy_loop(seconds: float) -> float:
+    """Run short CPU-bound steps that yield to the loop; return steps per second."""
+    async def worker() -> int:
+        steps = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            sum(range(200))
+            steps += 1
+            await asyncio.sleep(0)
+        return steps
+
+    return sum(await asyncio.gather(*(worker() for _ in range(WORKERS)))) / seconds
+
+
+async def overhead(seconds: float) -> tuple[float, float]:
+    off, on = [], []
+    for _ in range(ROUNDS):
+        off.append(await _busy_loop(seconds))
+        watchdog = LoopWatchdog()
+        watchdog.start()
+        on.append(await _busy_loop(seconds))
+        await watchdog.stop()
+    return statistics.median(off), statistics.median(on)
+
+
+async def main(seconds: float) -> int:
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    await storage.init_db()
+    await storage.load_leaderboards()
+    bot = create_fake_bot(FakeTelegramSession())
+    dp = create_dispatcher()
+    for user_id in range(1, USERS + 2):
+        await dp.feed_update(bot, message_update(20_000_000 + user_id, user_id, "/start"))
+    await dp["user_scheduler"].join()
+    failures = 0
+
+    stall = await detect(dp, bot)
+    print(f"stall   {stall}")
+    caught = bool(stall) and stall["handler"] == "today_handler.cmd_today" and (stall["db"] or "").startswith("db.")
+    print(f"detection {'ok' if caught else 'FAILED'}")
+    failures += not caught
+
+    off, on = await overhead(seconds)
+    percent = (off - on) / off * 100
+    print(f"loop    off {off:10,.0f} steps/s  on {on:10,.0f} steps/s  overhead {percent:+5.1f}%  "
+          f"(budget {OVERHEAD_BUDGET_PERCENT}%)")
+    failures += percent > OVERHEAD_BUDGET_PERCENT
+
+    await dp["user_scheduler"].stop()
+    storage.shutdown()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)))
@@ -0,0 +1,81 @@
+### FILE: benchmarks/bench_weekly_report.py
+"""Compare building weekly reports from rollups with rescanning the answer log.
+
+Seeds ``users`` premium users with ``answers`` quiz answers each spread over
+two weeks (the log also keeps the previous week), then produces every user's
+totals for one week by paging ``user_daily_stats`` the way the report job
+does and, for comparison, by aggregating ``quiz_answers`` directly.
+
+Usage::
+
+    python -m benchmarks.bench_weekly_report [users] [answers_per_user]
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sozmaster-report-"), "bench.db")
+
+import db  # noqa: E402
+
+WEEK, END = "2026-10-12", "2026-10-18"
+DAYS = [f"2026-10-{day:02d}" for day in range(5, 19)]
+
+
+def _seed(users: int, answers: int) -> None:
+    rng = random.Random(1)
+    log = []
+    db.init_db()
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (user_id, username, premium_until) VALUES (?, 'u', '2999-01-01T00:00:00+00:00')",
+            [(user_id,) for user_id in range(1, users + 1)],
+        )
+        conn.commit()
+        cur = conn.cursor()
+        cur.execute("BEGIN")
+        for user_id in range(1, users + 1):
+            batch = [(user_id, rng.choice(DAYS), None, rng.random() < 0.7) for _ in range(answers)]
+            db._record_answers(cur, [(*answer, False, 0.0) for answer in batch])
+            log.extend((*answer, None, 0.0) for answer in batch)
+        conn.commit()
+    db.append_answer_log(log)
+
+
+def main(users: int, answers: int) -> None:
+    start = time.perf_counter()
+    _seed(users, answers)
+    print(f"seeded {users:,} users x {answers} answers in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    after, rollup_rows = 0, 0
+    while True:
+        page = db.fetch_weekly_report_page(WEEK, END, "2000-01-01", after, 1000)
+        if not page:
+            break
+        rollup_rows += len(page)
+        after = page[-1]["user_id"]
+    print(f"rollups       {time.perf_counter() - start:>7.3f}s  ({rollup_rows:,} reports)")
+
+    start = time.perf_counter()
+    with db.get_connection() as conn:
+        raw_rows = conn.execute(
+            """
+            SELECT user_id, COUNT(*) AS answers, SUM(is_correct) AS correct, COUNT(DISTINCT date) AS active_days
+            FROM quiz_answers WHERE date BETWEEN ? AND ? GROUP BY user_id
+            """,
+            (WEEK, END),
+        ).fetchall()
+    print(f"raw log scan  {time.perf_counter() - start:>7.3f}s  ({len(raw_rows):,} reports)")
+    db.close_connections()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 60,
+    )
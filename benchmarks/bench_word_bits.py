@@ -0,0 +1,69 @@
+### FILE: benchmarks/bench_word_bits.py
+"""Compare unseen-word selection on bitsets with a per-word Python scan.
+
+Builds a synthetic bank of ``bank`` words with a category covering a tenth
+of it, marks ``seen`` percent of the words as seen, then picks 20 unseen
+words in the category both ways, plus a membership check. (When the
+category runs out of unseen words the bitset path goes on to seen ones.)
+
+Usage::
+
+    python -m benchmarks.bench_word_bits [bank] [seen_percent]
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from utils.word_bits import bits_from_blob, blob_has_word, bits_to_blob, mask_of, select_word_ids
+
+PICK = 20
+ROUNDS = 200
+
+
+def _scan(seen: set[int], category: set[int], start: int, count: int, total: int) -> list[int]:
+    taken = []
+    for offset in range(total):
+        word_id = (start + offset) % total
+        if word_id in category and word_id not in seen:
+            taken.append(word_id)
+            if len(taken) == count:
+                break
+    return taken
+
+
+def _time(func) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func()
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def main(bank: int, seen_percent: int) -> None:
+    rng = random.Random(1)
+    seen_ids = {word_id for word_id in range(bank) if rng.randrange(100) < seen_percent}
+    category_ids = set(range(0, bank, 10))
+    seen_blob = bits_to_blob(mask_of(seen_ids))
+    category = mask_of(category_ids)
+    start = bank // 2
+
+    def bitset() -> list[int]:
+        return select_word_ids(bits_from_blob(seen_blob), 0, start, PICK, category, bank)[0]
+
+    def scan() -> list[int]:
+        return _scan(seen_ids, category_ids, start, PICK, bank)
+
+    expected = scan()
+    assert bitset()[: len(expected)] == expected
+    print(f"bank {bank:,} words, {seen_percent}% seen, blob {len(seen_blob or b''):,} bytes")
+    print(f"bitset select  {_time(bitset):>10.1f} us")
+    print(f"python scan    {_time(scan):>10.1f} us")
+    print(f"membership     {_time(lambda: blob_has_word(seen_blob, start)):>10.2f} us")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 95,
+    )
@@ -0,0 +1,159 @@
+### FILE: benchmarks/fake_telegram.py
+"""Offline stand-in for the Telegram Bot API.
+
+:class:`FakeTelegramSession` plugs into :class:`aiogram.Bot` and answers every
+API call locally, so routers, webhooks and send queues can be driven without
+network access. The helpers below build synthetic updates.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timezone
+from typing import Any, AsyncGenerator
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+FAKE_TOKEN = "123456:FAKE-TOKEN-FOR-BENCHMARKS"
+
+
+class FakeTelegramSession(BaseSession):
+    """Bot API session that records calls and returns canned successes.
+
+    ``global_limit`` and ``chat_limit`` (calls per second, sliding window)
+    make it answer like Telegram's flood control: calls over the limit raise
+    :class:`TelegramRetryAfter` and are counted in ``calls["429"]``.
+    ``flood_probability`` injects 429s at random on top of that. The last
+    keyboard sent or edited into each chat is kept in ``reply_markups`` so a
+    simulated user can press its buttons.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        global_limit: float | None = None,
+        chat_limit: float | None = None,
+        flood_probability: float = 0.0,
+        retry_after: int = 1,
+    ) -> None:
+        super().__init__()
+        self.latency = latency
+        self.global_limit = global_limit
+        self.chat_limit = chat_limit
+        self.flood_probability = flood_probability
+        self.retry_after = retry_after
+        self.calls: Counter[str] = Counter()
+        self.reply_markups: dict[int, Any] = {}
+        self._message_ids = itertools.count(1)
+        self._global_window: deque[float] = deque()
+        self._chat_windows: defaultdict[Any, deque[float]] = defaultdict(deque)
+
+    def _over_limit(self, window: deque[float], limit: float | None, now: float) -> bool:
+        while window and window[0] <= now - 1.0:
+            window.popleft()
+        return limit is not None and len(window) >= limit
+
+    def _check_flood(self, method: TelegramMethod[Any]) -> None:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return
+        now = time.monotonic()
+        chat_window = self._chat_windows[chat_id]
+        flooded = (
+            self._over_limit(self._global_window, self.global_limit, now)
+            or self._over_limit(chat_window, self.chat_limit, now)
+            or (self.flood_probability and random.random() < self.flood_probability)
+        )
+        if flooded:
+            self.calls["429"] += 1
+            raise TelegramRetryAfter(
+                method=method,
+                message=f"Too Many Requests: retry after {self.retry_after}",
+                retry_after=self.retry_after,
+            )
+        self._global_window.append(now)
+        chat_window.append(now)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: int | None = None) -> Any:
+        self._check_flood(method)
+        self.calls[method.__api_method__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method.__returning__ is bool:
+            return True
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return True
+        if hasattr(method, "reply_markup"):
+            self.reply_markups[int(chat_id)] = method.reply_markup
+        return Message(
+            message_id=getattr(method, "message_id", None) or next(self._message_ids),
+            date=datetime.now(timezone.utc),
+            chat=Chat(id=int(chat_id), type="private"),
+            text=getattr(method, "text", None),
+        )
+
+    async def stream_content(self, url: str, *args: Any, **kwargs: Any) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        return None
+
+
+def create_fake_bot(session: BaseSession | None = None) -> Bot:
+    """Return a bot wired to a fake session."""
+    return Bot(
+        token=FAKE_TOKEN,
+        session=session or FakeTelegramSession(),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+
+
+def _user(user_id: int) -> User:
+    return User(id=user_id, is_bot=False, first_name=f"User{user_id}", username=f"user{user_id}")
+
+
+def _chat(user_id: int) -> Chat:
+    return Chat(id=user_id, type="private")
+
+
+def message_update(update_id: int, user_id: int, text: str) -> Update:
+    """Build an update carrying a private text message (e.g. ``/today``)."""
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.now(timezone.utc),
+            chat=_chat(user_id),
+            from_user=_user(user_id),
+            text=text,
+        ),
+    )
+
+
+def callback_update(update_id: int, user_id: int, data: str, message_id: int = 1) -> Update:
+    """Build an update carrying an inline button press."""
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(
+            id=str(update_id),
+            from_user=_user(user_id),
+            chat_instance=str(user_id),
+            data=data,
+            message=Message(
+                message_id=message_id,
+                date=datetime.now(timezone.utc),
+                chat=_chat(user_id),
+                text="quiz",
+            ),
+        ),
+    )
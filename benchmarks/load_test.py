@@ -0,0 +1,286 @@
+### FILE: benchmarks/load_test.py
+"""Drive every router with simulated users and measure what one process serves.
+
+Builds the production dispatcher (:func:`bot.create_dispatcher`) against a
+fake Bot API session and walks ``users`` simulated users through the flow a
+real learner follows: ``/start``, ``/today``, ``/quiz`` plus ``answers``
+button presses, ``/stats`` and ``/more`` (a tenth of the users are Premium).
+Each user waits for the bot's reply before sending the next update, with
+``concurrency`` users active at a time.
+
+Steps run one after another for all users, so each one gets its own numbers:
+throughput, handler latency percentiles (time inside the routers, measured
+behind the user scheduler), end-to-end latency (including the scheduler
+queue), SQL statements per update (every statement run on the database
+thread, including buffered writes flushed at the end of the step) and Bot
+API calls per update. ``--json`` writes the results, tagged with the current
+commit, for comparing runs.
+
+Usage::
+
+    python -m benchmarks.load_test [--users N] [--answers N] [--concurrency N] [--json PATH]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable
+
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sozmaster-load-"), "bench.db")
+
+from aiogram import BaseMiddleware, Bot, Dispatcher  # noqa: E402
+from aiogram.types import Update  # noqa: E402
+
+import db  # noqa: E402
+import storage  # noqa: E402
+from benchmarks.fake_telegram import (  # noqa: E402
+    FakeTelegramSession,
+    callback_update,
+    create_fake_bot,
+    message_update,
+)
+from bot import create_dispatcher  # noqa: E402
+from keyboards import QuizAnswerCallback  # noqa: E402
+
+PREMIUM_EVERY = 10
+FIRST_USER_ID = 1_000_000
+
+
+class _UpdateTimer(BaseMiddleware):
+    """Record handler time per update and signal when it is done.
+
+    Registered after the user scheduler, so it runs inside the scheduled job.
+    """
+
+    def __init__(self) -> None:
+        self.handler_seconds: list[float] = []
+        self.total_seconds: list[float] = []
+        self.fed_at: dict[int, float] = {}
+        self.done: dict[int, asyncio.Future] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any],
+    ) -> Any:
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            end = time.perf_counter()
+            self.handler_seconds.append(end - start)
+            self.total_seconds.append(end - self.fed_at.pop(event.update_id))
+            future = self.done.pop(event.update_id)
+            if not future.done():
+                future.set_result(None)
+
+    def reset(self) -> None:
+        self.handler_seconds = []
+        self.total_seconds = []
+
+
+class _StatementCounter:
+    """Count SQL statements run on the database thread."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, statement: str) -> None:
+        self.count += 1
+
+    async def install(self) -> None:
+        def attach() -> None:
+            with db.get_connection() as conn:
+                conn.set_trace_callback(self)
+
+        await storage.run(attach)
+
+
+class LoadTest:
+    """Feeds updates for simulated users and collects per-step results."""
+
+    def __init__(self, dp: Dispatcher, bot: Bot, session: FakeTelegramSession, concurrency: int) -> None:
+        self.dp = dp
+        self.bot = bot
+        self.session = session
+        self.concurrency = concurrency
+        self.timer = _UpdateTimer()
+        self.statements = _StatementCounter()
+        self.update_ids = itertools.count(1)
+        self.rng = random.Random(1)
+        dp.update.outer_middleware(self.timer)
+
+    async def send(self, make_update: Callable[[int], Update]) -> None:
+        """Feed one update and wait until the routers have handled it."""
+        update = make_update(next(self.update_ids))
+        future = asyncio.get_running_loop().create_future()
+        self.timer.done[update.update_id] = future
+        self.timer.fed_at[update.update_id] = time.perf_counter()
+        await self.dp.feed_update(self.bot, update)
+        await future
+
+    async def command(self, user_id: int, text: str) -> None:
+        await self.send(lambda update_id: message_update(update_id, user_id, text))
+
+    async def answer_quiz(self, user_id: int, answers: int) -> None:
+        """Press a random answer button on the user's current question, ``answers`` times."""
+        for _ in range(answers):
+            markup = self.session.reply_markups.get(user_id)
+            buttons = [
+                button.callback_data
+                for row in (markup.inline_keyboard if markup else [])
+                for button in row
+                if button.callback_data and button.callback_data.startswith(QuizAnswerCallback.__prefix__)
+            ]
+            if not buttons:
+                return
+            data = self.rng.choice(buttons)
+            await self.send(lambda update_id: callback_update(update_id, user_id, data))
+
+    async def step(self, name: str, user_ids: list[int], action: Callable[[int], Awaitable[None]]) -> dict:
+        """Run ``action`` for every user, ``concurrency`` at a time, and summarise it."""
+        self.timer.reset()
+        calls_before = sum(self.session.calls.values())
+        failed_before = self.dp["user_scheduler"].failed
+        pending = iter(user_ids)
+
+        async def client() -> None:
+            for user_id in pending:
+                await action(user_id)
+
+        self.statements.count = 0
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(self.concurrency)))
+        # Buffered writes belong to the step that produced them.
+        await storage.stop_answer_log()
+        await storage.stop_write_behind()
+        elapsed = time.perf_counter() - start
+        statements = self.statements.count
+        storage.start_answer_log()
+        storage.start_write_behind()
+
+        updates = len(self.timer.handler_seconds)
+        result = {
+            "step": name,
+            "updates": updates,
+            "seconds": round(elapsed, 3),
+            "updates_per_second": round(updates / elapsed, 1) if elapsed else 0.0,
+            "handler_ms": _percentiles(self.timer.handler_seconds),
+            "end_to_end_ms": _percentiles(self.timer.total_seconds),
+            "sql_per_update": round(statements / updates, 2) if updates else 0.0,
+            "bot_calls_per_update": round((sum(self.session.calls.values()) - calls_before) / updates, 2)
+            if updates
+            else 0.0,
+            "failed": self.dp["user_scheduler"].failed - failed_before,
+        }
+        return result
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+
+    def pick(fraction: float) -> float:
+        return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000, 3)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1] * 1000, 3)}
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(users: int, answers: int, concurrency: int) -> dict:
+    await storage.init_db()
+    await storage.load_leaderboards()
+    storage.start_write_behind()
+    storage.start_answer_log()
+    session = FakeTelegramSession()
+    bot = create_fake_bot(session)
+    dp = create_dispatcher()
+    test = LoadTest(dp, bot, session, concurrency)
+    await test.statements.install()
+
+    user_ids = list(range(FIRST_USER_ID, FIRST_USER_ID + users))
+    steps = [await test.step("/start", user_ids, lambda user_id: test.command(user_id, "/start"))]
+    for user_id in user_ids[::PREMIUM_EVERY]:
+        await storage.mark_user_premium(user_id, days=30)
+    steps.append(await test.step("/today", user_ids, lambda user_id: test.command(user_id, "/today")))
+    steps.append(await test.step("/quiz", user_ids, lambda user_id: test.command(user_id, "/quiz")))
+    steps.append(await test.step("answer", user_ids, lambda user_id: test.answer_quiz(user_id, answers)))
+    steps.append(await test.step("/stats", user_ids, lambda user_id: test.command(user_id, "/stats")))
+    steps.append(await test.step("/more", user_ids, lambda user_id: test.command(user_id, "/more")))
+
+    await storage.stop_answer_log()
+    await storage.stop_write_behind()
+    await dp["user_scheduler"].stop()
+    storage.shutdown()
+
+    updates = sum(step["updates"] for step in steps)
+    seconds = sum(step["seconds"] for step in steps)
+    return {
+        "commit": _commit(),
+        "python": sys.version.split()[0],
+        "users": users,
+        "answers_per_user": answers,
+        "concurrency": concurrency,
+        "updates": updates,
+        "updates_per_second": round(updates / seconds, 1) if seconds else 0.0,
+        "bot_calls": dict(Counter(session.calls)),
+        "steps": steps,
+    }
+
+
+def _print(results: dict) -> None:
+    print(
+        f"users: {results['users']}, answers/user: {results['answers_per_user']}, "
+        f"concurrency: {results['concurrency']}, commit: {results['commit']}"
+    )
+    print(f"{'step':<8} {'updates':>8} {'upd/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'e2e p99':>8} {'sql/upd':>8} {'api/upd':>8}")
+    for step in results["steps"]:
+        handler = step["handler_ms"]
+        print(
+            f"{step['step']:<8} {step['updates']:>8} {step['updates_per_second']:>9,.0f} "
+            f"{handler['p50']:>8.2f} {handler['p95']:>8.2f} {handler['p99']:>8.2f} "
+            f"{step['end_to_end_ms']['p99']:>8.2f} {step['sql_per_update']:>8.2f} "
+            f"{step['bot_calls_per_update']:>8.2f}"
+            + (f"  ({step['failed']} failed)" if step["failed"] else "")
+        )
+    print(f"overall: {results['updates']} updates, {results['updates_per_second']:,.0f} updates/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=2000, help="simulated users")
+    parser.add_argument("--answers", type=int, default=5, help="quiz answers per user")
+    parser.add_argument("--concurrency", type=int, default=256, help="users active at a time")
+    parser.add_argument("--json", metavar="PATH", help="write the results to PATH as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.users, args.answers, args.concurrency))
+    _print(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+        print(f"results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+### FILE: benchmarks/webhook_load.py
+"""Measure webhook throughput against a fake Telegram, fully offline.
+
+Starts :class:`webhook.WebhookServer` on localhost with every router and a
+fake Bot API session, then POSTs synthetic ``/start`` and ``/today`` updates
+the way Telegram would.
+
+Usage::
+
+    python -m benchmarks.webhook_load [updates] [users] [workers]
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sozmaster-webhook-"), "bench.db")
+
+import aiohttp  # noqa: E402
+
+import storage  # noqa: E402
+from benchmarks.fake_telegram import FakeTelegramSession, create_fake_bot, message_update  # noqa: E402
+from bot import create_dispatcher  # noqa: E402
+from webhook import SECRET_HEADER, WebhookServer  # noqa: E402
+
+HOST = "127.0.0.1"
+PATH = "/telegram/webhook"
+SECRET = "bench-secret"
+
+
+async def _post_all(port: int, payloads: list[dict], concurrency: int) -> list[float]:
+    url = f"http://{HOST}:{port}{PATH}"
+    latencies: list[float] = []
+    queue: asyncio.Queue[dict] = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+
+    async with aiohttp.ClientSession(headers={SECRET_HEADER: SECRET}) as client:
+        async def sender() -> None:
+            while not queue.empty():
+                payload = queue.get_nowait()
+                start = time.perf_counter()
+                async with client.post(url, json=payload) as response:
+                    assert response.status == 200, response.status
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(sender() for _ in range(concurrency)))
+        async with client.post(url, json=payloads[0], headers={SECRET_HEADER: "wrong"}) as response:
+            assert response.status == 401, "secret token must be verified"
+    return latencies
+
+
+async def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+
+    await storage.init_db()
+    session = FakeTelegramSession()
+    bot = create_fake_bot(session)
+    dp = create_dispatcher()
+    server = WebhookServer(dp, bot, path=PATH, secret=SECRET, workers=workers)
+    port = 18000 + os.getpid() % 1000
+    await server.start(HOST, port)
+
+    payloads = []
+    for update_id in range(1, total + 1):
+        user_id = update_id % users + 1
+        text = "/start" if update_id <= users else "/today"
+        payloads.append(message_update(update_id, user_id, text).model_dump(mode="json", exclude_none=True))
+
+    start = time.perf_counter()
+    latencies = await _post_all(port, payloads, concurrency=64)
+    accepted = time.perf_counter() - start
+    await server.queue.join()
+    await dp["user_scheduler"].join()
+    processed = time.perf_counter() - start
+    await server.stop()
+    await dp["user_scheduler"].stop()
+    storage.shutdown()
+
+    latencies.sort()
+    print(f"updates: {total}, users: {users}, workers: {workers}")
+    print(f"accept:  {total / accepted:,.0f} updates/s, p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+    print(f"handled: {total / processed:,.0f} updates/s ({server.processed} processed)")
+    print(f"Bot API calls: {dict(session.calls)}")
+    print(f"User scheduler: {dp['user_scheduler'].stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
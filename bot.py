@@ -6,40 +6,207 @@ import asyncio
 import logging
 
 from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
 import config
 import db
+import metrics
+import storage
 from handlers import (
     admin_handler,
+    leaderboard_handler,
     quiz_handler,
+    settings_handler,
     start_handler,
     stats_handler,
     today_handler,
     upgrade_handler,
 )
+from loop_watchdog import LoopWatchdog
+from middlewares.metrics import install_metrics_middleware
+from middlewares.send_queue import OutboundSendQueue
+from middlewares.user_scheduler import UserSchedulerMiddleware
+from services.answer_log_service import compaction_scheduler
+from services.broadcast_service import broadcast_scheduler
+from services.precompute_service import precompute_scheduler
+from services.report_service import weekly_report_scheduler
+from slow_query_log import SlowQueryLog
+from webhook import run_webhook
 
 
-async def main() -> None:
-    """Initialize bot components and start polling."""
-    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
-    db.init_db()
-
-    if not config.BOT_TOKEN:
-        raise RuntimeError("TELEGRAM_BOT_TOKEN environment variable must be set.")
+def create_dispatcher() -> Dispatcher:
+    """Build the dispatcher with every router and middleware attached.
 
-    bot = Bot(token=config.BOT_TOKEN, parse_mode=ParseMode.HTML)
+    The user scheduler is also stored as ``dp["user_scheduler"]`` so callers
+    can drain it on shutdown.
+    """
     dp = Dispatcher()
+    scheduler = UserSchedulerMiddleware(
+        workers=config.UPDATE_WORKERS,
+        max_user_depth=config.UPDATE_MAX_USER_QUEUE,
+        max_pending=config.UPDATE_MAX_PENDING,
+    )
+    dp.update.outer_middleware(scheduler)
+    dp["user_scheduler"] = scheduler
+    if config.METRICS_ENABLED:
+        install_metrics_middleware(dp)
 
     dp.include_router(start_handler.router)
     dp.include_router(today_handler.router)
     dp.include_router(quiz_handler.router)
     dp.include_router(stats_handler.router)
     dp.include_router(upgrade_handler.router)
+    dp.include_router(settings_handler.router)
+    dp.include_router(leaderboard_handler.router)
     dp.include_router(admin_handler.router)
+    return dp
+
+
+def _register_queue_gauges(dp: Dispatcher, send_queue: OutboundSendQueue | None) -> None:
+    """Expose update, write and send queue depths as scrape-time gauges."""
+    scheduler = dp["user_scheduler"]
+    metrics.register_gauge(
+        "sozmaster_pending_updates", "Updates queued or running in the user scheduler.", lambda: scheduler.pending
+    )
+    metrics.register_gauge(
+        "sozmaster_active_users", "Users with queued or running updates.", lambda: scheduler.stats()["active_users"]
+    )
+    metrics.register_gauge(
+        "sozmaster_pending_writes",
+        "Buffered write-behind updates and answer log entries not yet written.",
+        lambda: sum(storage.pending_writes().values()),
+    )
+    if send_queue is not None:
+        metrics.register_gauge(
+            "sozmaster_pending_sends",
+            "Bot API calls waiting in the outbound send queue.",
+            lambda: send_queue.stats()["queued_interactive"] + send_queue.stats()["queued_bulk"],
+        )
+
+
+async def main() -> None:
+    """Initialize bot components and start polling or the webhook server."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    # Statement observers go in before the first query: only connections opened afterwards are timed.
+    if config.METRICS_ENABLED:
+        db.add_statement_observer(metrics.observe_statement)
+    if config.SLOW_QUERY_LOG_ENABLED:
+        db.add_statement_observer(
+            SlowQueryLog(config.DB_PATH, config.SLOW_QUERY_LOG_PATH, threshold_ms=config.SLOW_QUERY_THRESHOLD_MS)
+        )
+    await storage.init_db()
+    pending = await storage.pending_migrations()
+    if pending:
+        logging.warning("Pending schema migrations (run python -m scripts.migrate): %s", "; ".join(pending))
+    await storage.load_leaderboards()
+
+    if not config.BOT_TOKEN:
+        raise RuntimeError("TELEGRAM_BOT_TOKEN environment variable must be set.")
+
+    bot = Bot(token=config.BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    send_queue = None
+    if config.SEND_QUEUE_ENABLED:
+        send_queue = OutboundSendQueue(
+            global_rate=config.SEND_GLOBAL_RATE,
+            chat_rate=config.SEND_CHAT_RATE,
+            chat_burst=config.SEND_CHAT_BURST,
+            group_rate=config.SEND_GROUP_PER_MINUTE / 60,
+            max_retries=config.SEND_MAX_RETRIES,
+        )
+        bot.session.middleware(send_queue)
+    dp = create_dispatcher()
+    dp["send_queue"] = send_queue
 
     logging.info("SozMaster AI ishga tushdi.")
-    await dp.start_polling(bot)
+    storage.start_write_behind()
+    background_tasks = []
+    watchdog = None
+    if config.LOOP_WATCHDOG_ENABLED:
+        watchdog = LoopWatchdog(
+            threshold_ms=config.LOOP_WATCHDOG_THRESHOLD_MS,
+            interval_ms=config.LOOP_WATCHDOG_INTERVAL_MS,
+            sample_ms=config.LOOP_WATCHDOG_SAMPLE_MS,
+        )
+        watchdog.start()
+    metrics_runner = None
+    if config.METRICS_ENABLED:
+        _register_queue_gauges(dp, send_queue)
+        metrics_runner = await metrics.start_metrics_server(config.METRICS_HOST, config.METRICS_PORT)
+        background_tasks.append(
+            asyncio.create_task(
+                metrics.monitor_loop_lag(config.METRICS_LOOP_LAG_INTERVAL_MS / 1000), name="loop-lag-monitor"
+            )
+        )
+    if storage.start_answer_log() is not None:
+        background_tasks.append(
+            asyncio.create_task(
+                compaction_scheduler(config.ANSWER_LOG_COMPACT_HOUR, config.ANSWER_LOG_RETENTION_DAYS),
+                name="answer-log-compaction",
+            )
+        )
+    if config.BROADCAST_ENABLED:
+        if send_queue is None:
+            logging.warning("BROADCAST_ENABLED requires SEND_QUEUE_ENABLED; daily broadcast is off.")
+        else:
+            background_tasks.append(
+                asyncio.create_task(
+                    broadcast_scheduler(bot, config.BROADCAST_HOUR, config.BROADCAST_BATCH_SIZE),
+                    name="daily-broadcast",
+                )
+            )
+    if config.PRECOMPUTE_ENABLED:
+        background_tasks.append(
+            asyncio.create_task(
+                precompute_scheduler(config.PRECOMPUTE_HOUR, config.PRECOMPUTE_BATCH_SIZE),
+                name="precompute-words",
+            )
+        )
+    if config.WEEKLY_REPORT_ENABLED:
+        if send_queue is None:
+            logging.warning("WEEKLY_REPORT_ENABLED requires SEND_QUEUE_ENABLED; weekly reports are off.")
+        else:
+            background_tasks.append(
+                asyncio.create_task(
+                    weekly_report_scheduler(bot, config.WEEKLY_REPORT_HOUR, config.WEEKLY_REPORT_BATCH_SIZE),
+                    name="weekly-report",
+                )
+            )
+    try:
+        if config.BOT_MODE == "webhook":
+            if not config.WEBHOOK_URL:
+                raise RuntimeError("WEBHOOK_URL environment variable must be set in webhook mode.")
+            if not config.WEBHOOK_SECRET:
+                raise RuntimeError("WEBHOOK_SECRET environment variable must be set in webhook mode.")
+            await run_webhook(
+                dp,
+                bot,
+                url=config.WEBHOOK_URL,
+                path=config.WEBHOOK_PATH,
+                secret=config.WEBHOOK_SECRET,
+                host=config.WEBHOOK_HOST,
+                port=config.WEBHOOK_PORT,
+                workers=config.WEBHOOK_WORKERS,
+                queue_size=config.WEBHOOK_QUEUE_SIZE,
+            )
+        else:
+            # Updates are only enqueued here; the user scheduler runs them concurrently.
+            await dp.start_polling(bot, handle_as_tasks=False, close_bot_session=False)
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        if watchdog is not None:
+            await watchdog.stop()
+        await dp["user_scheduler"].stop()
+        if send_queue is not None:
+            await send_queue.close()
+        await storage.stop_write_behind()
+        await storage.stop_answer_log()
+        storage.shutdown()
+        await bot.session.close()
 
 
 if __name__ == "__main__":
@@ -9,6 +9,15 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean flag such as ``1``/``true``/``yes`` from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
 BOT_TOKEN: str = os.getenv("TELEGRAM_BOT_TOKEN", "")
 
 _admin_ids_raw = os.getenv("ADMIN_USER_IDS", "")
@@ -17,4 +26,88 @@ if _admin_ids_raw:
     ADMIN_IDS = [int(item.strip()) for item in _admin_ids_raw.split(",") if item.strip()]
 
 DB_PATH = os.getenv("DB_PATH", "bot.db")
+DAILY_WORD_COUNT = 5
+PREMIUM_DAILY_WORD_COUNT = 20
 TIMEZONE = os.getenv("TIMEZONE", "Asia/Tashkent")
+
+# SQLite tuning. Values are passed straight to the matching PRAGMA.
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL").upper()
+DB_CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", "-16000"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+
+# Write-behind batching for XP and quiz progress (off by default).
+WRITE_BEHIND_ENABLED = _env_bool("WRITE_BEHIND_ENABLED")
+WRITE_BEHIND_MAX_DELAY_MS = int(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", "250"))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "500"))
+
+# Per-user daily session cache (today's words and quiz cursor).
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "20000"))
+SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "1800"))
+
+# Update delivery: "polling" (default) or "webhook".
+BOT_MODE = os.getenv("BOT_MODE", "polling").strip().lower()
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "16"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "10000"))
+
+# Per-user ordered update execution.
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", "64"))
+UPDATE_MAX_USER_QUEUE = int(os.getenv("UPDATE_MAX_USER_QUEUE", "20"))
+UPDATE_MAX_PENDING = int(os.getenv("UPDATE_MAX_PENDING", "10000"))
+
+# Outbound Bot API rate limiting (Telegram flood limits).
+SEND_QUEUE_ENABLED = _env_bool("SEND_QUEUE_ENABLED", True)
+SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", "25"))
+SEND_CHAT_RATE = float(os.getenv("SEND_CHAT_RATE", "1"))
+SEND_CHAT_BURST = float(os.getenv("SEND_CHAT_BURST", "3"))
+SEND_GROUP_PER_MINUTE = float(os.getenv("SEND_GROUP_PER_MINUTE", "20"))
+SEND_MAX_RETRIES = int(os.getenv("SEND_MAX_RETRIES", "5"))
+
+# Daily push of each user's words at a local hour.
+BROADCAST_ENABLED = _env_bool("BROADCAST_ENABLED")
+BROADCAST_HOUR = int(os.getenv("BROADCAST_HOUR", "8"))
+BROADCAST_BATCH_SIZE = int(os.getenv("BROADCAST_BATCH_SIZE", "1000"))
+
+# Off-peak planning of tomorrow's word sets (must run before midnight).
+PRECOMPUTE_ENABLED = _env_bool("PRECOMPUTE_ENABLED")
+PRECOMPUTE_HOUR = int(os.getenv("PRECOMPUTE_HOUR", "22"))
+PRECOMPUTE_BATCH_SIZE = int(os.getenv("PRECOMPUTE_BATCH_SIZE", "1000"))
+
+# Spaced repetition: due reviews mixed into /today and /quiz.
+REVIEW_TODAY_LIMIT = int(os.getenv("REVIEW_TODAY_LIMIT", "10"))
+REVIEW_QUIZ_LIMIT = int(os.getenv("REVIEW_QUIZ_LIMIT", "10"))
+
+# Monday report of last week's progress for premium users.
+WEEKLY_REPORT_ENABLED = _env_bool("WEEKLY_REPORT_ENABLED")
+WEEKLY_REPORT_HOUR = int(os.getenv("WEEKLY_REPORT_HOUR", "9"))
+WEEKLY_REPORT_BATCH_SIZE = int(os.getenv("WEEKLY_REPORT_BATCH_SIZE", "1000"))
+
+# Append-only quiz answer log, inserted in batches and compacted nightly.
+ANSWER_LOG_ENABLED = _env_bool("ANSWER_LOG_ENABLED", True)
+ANSWER_LOG_FLUSH_MS = int(os.getenv("ANSWER_LOG_FLUSH_MS", "1000"))
+ANSWER_LOG_MAX_PENDING = int(os.getenv("ANSWER_LOG_MAX_PENDING", "500"))
+ANSWER_LOG_RETENTION_DAYS = int(os.getenv("ANSWER_LOG_RETENTION_DAYS", "30"))
+ANSWER_LOG_COMPACT_HOUR = int(os.getenv("ANSWER_LOG_COMPACT_HOUR", "4"))
+
+# Prometheus-format /metrics endpoint (handler and SQL timings, queue depths, loop lag).
+METRICS_ENABLED = _env_bool("METRICS_ENABLED")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+METRICS_LOOP_LAG_INTERVAL_MS = int(os.getenv("METRICS_LOOP_LAG_INTERVAL_MS", "500"))
+
+# Event-loop watchdog: log which handler / db call blocked the loop and for how long.
+LOOP_WATCHDOG_ENABLED = _env_bool("LOOP_WATCHDOG_ENABLED")
+LOOP_WATCHDOG_THRESHOLD_MS = int(os.getenv("LOOP_WATCHDOG_THRESHOLD_MS", "100"))
+LOOP_WATCHDOG_INTERVAL_MS = int(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", "50"))
+LOOP_WATCHDOG_SAMPLE_MS = int(os.getenv("LOOP_WATCHDOG_SAMPLE_MS", "50"))
+
+# Slow-query log: statements over the threshold with their EXPLAIN QUERY PLAN, as JSON lines.
+SLOW_QUERY_LOG_ENABLED = _env_bool("SLOW_QUERY_LOG_ENABLED")
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "50"))
+SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH", "slow_queries.jsonl")
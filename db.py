@@ -3,24 +3,184 @@
 from __future__ import annotations
 
 import json
+import logging
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
-from datetime import UTC, datetime, timedelta
-from typing import Iterable
+from datetime import timedelta
+from typing import Any, Callable, Iterable
 
-from config import ADMIN_IDS, DB_PATH
-from utils.time import get_yesterday_date_str
+import srs
+from config import (
+    ADMIN_IDS,
+    DAILY_WORD_COUNT,
+    DB_BUSY_TIMEOUT_MS,
+    DB_CACHE_SIZE,
+    DB_MMAP_SIZE,
+    DB_PATH,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_SYNCHRONOUS,
+    PREMIUM_DAILY_WORD_COUNT,
+)
+from migrations import runner as migrations
+from utils.clock import get_clock
+from utils.time import get_yesterday_date_str, is_premium, now_utc_iso
+from utils.word_bits import ALL_WORDS, bits_from_blob, bits_to_blob, mask_of, select_word_ids
+from utils.word_ids import (
+    WORD_ID_BY_TEXT,
+    collect_word_ids,
+    pack_word_ids,
+    resolve_word_ids,
+    unpack_word_ids,
+)
+
+logger = logging.getLogger(__name__)
+
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def _dict_factory(cursor: sqlite3.Cursor, row: tuple) -> dict:
+    """Build plain dict rows so they can safely leave the database thread."""
+    return {column[0]: row[idx] for idx, column in enumerate(cursor.description)}
+
+
+# Called as observer(sql, parameters, seconds) after each statement.
+StatementObserver = Callable[[str, Any, float], None]
+_statement_observers: list[StatementObserver] = []
+
+
+def add_statement_observer(observer: StatementObserver) -> None:
+    """Time every SQL statement and report it to ``observer``.
+
+    Only connections opened after the first observer is added are timed, so
+    install observers before the first query (or after ``close_connections``).
+    Connections opened with no observer pay nothing.
+    """
+    if observer not in _statement_observers:
+        _statement_observers.append(observer)
+
+
+def remove_statement_observer(observer: StatementObserver) -> None:
+    """Stop reporting statements to ``observer``."""
+    if observer in _statement_observers:
+        _statement_observers.remove(observer)
+
+
+def _notify_observers(sql: str, parameters: Any, seconds: float) -> None:
+    for observer in _statement_observers:
+        try:
+            observer(sql, parameters, seconds)
+        except Exception:
+            logger.exception("SQL statement observer failed")
+
+
+class _TimedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's execution time (not its fetches)."""
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _notify_observers(sql, parameters, time.perf_counter() - start)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _notify_observers(sql, seq_of_parameters, time.perf_counter() - start)
+
+
+class _TimedConnection(sqlite3.Connection):
+    """Connection whose cursors, and its own ``execute`` shortcuts, are timed."""
+
+    def cursor(self, factory: type[sqlite3.Cursor] = _TimedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _open_connection(path: str) -> sqlite3.Connection:
+    """Open a tuned connection: WAL journal, configured PRAGMAs, statement cache."""
+    if DB_SYNCHRONOUS not in _SYNCHRONOUS_MODES:
+        raise ValueError(f"DB_SYNCHRONOUS must be one of {sorted(_SYNCHRONOUS_MODES)}")
+
+    conn = sqlite3.connect(
+        path,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        cached_statements=DB_STATEMENT_CACHE_SIZE,
+        factory=_TimedConnection if _statement_observers else sqlite3.Connection,
+    )
+    conn.row_factory = _dict_factory
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size={int(DB_CACHE_SIZE)}")
+    conn.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE)}")
+    conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+    return conn
+
+
+class _ConnectionPool:
+    """Thread-safe pool that keeps one long-lived connection per thread.
+
+    SQLite connections must not be shared by concurrent threads, so each thread
+    lazily gets its own connection and reuses it (and its prepared statement
+    cache) for the lifetime of the process.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+
+    def acquire(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = _open_connection(self._path)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close_all(self) -> None:
+        """Close every pooled connection; threads reconnect on next use."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            self._local = threading.local()
+
+
+_pool = _ConnectionPool(DB_PATH)
 
 
 @contextmanager
 def get_connection() -> Iterable[sqlite3.Connection]:
-    """Yield an SQLite connection with row factory enabled."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """Yield the pooled SQLite connection for the current thread.
+
+    Anything the caller did not commit is rolled back, matching the behaviour
+    of the old open-and-close-per-query connections.
+    """
+    conn = _pool.acquire()
     try:
         yield conn
     finally:
-        conn.close()
+        if conn.in_transaction:
+            conn.rollback()
+
+
+def close_connections() -> None:
+    """Close all pooled connections (used on shutdown)."""
+    _pool.close_all()
 
 
 def init_db() -> None:
@@ -41,16 +201,38 @@ def init_db() -> None:
             )
             """
         )
+        # NULL means the bot's default TIMEZONE.
+        _ensure_column(cur, "users", "timezone", "TEXT")
+        # Word bitsets (see utils.word_bits): every word ever assigned, and words reviewed to maturity.
+        _ensure_column(cur, "users", "seen_words", "BLOB")
+        _ensure_column(cur, "users", "mastered_words", "BLOB")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_users_xp ON users (xp)")
+        # XP earned per default-zone day, for the daily and weekly leaderboards.
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS user_xp_daily (
+                user_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                xp INTEGER NOT NULL,
+                PRIMARY KEY (user_id, date)
+            ) WITHOUT ROWID
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_user_xp_daily_date ON user_xp_daily (date)")
         cur.execute(
             """
             CREATE TABLE IF NOT EXISTS user_daily_words (
                 user_id INTEGER,
                 date TEXT,
                 words_json TEXT,
+                word_ids BLOB,
                 PRIMARY KEY (user_id, date)
             )
             """
         )
+        _ensure_column(cur, "user_daily_words", "word_ids", "BLOB")
+        # Set only on rows assigned ahead of time: the premium status they were planned for.
+        _ensure_column(cur, "user_daily_words", "planned_premium", "INTEGER")
         cur.execute(
             """
             CREATE TABLE IF NOT EXISTS quiz_progress (
@@ -59,14 +241,135 @@ def init_db() -> None:
                 current_question_index INTEGER,
                 correct_count INTEGER,
                 total_count INTEGER,
+                seed INTEGER,
+                PRIMARY KEY (user_id, date)
+            )
+            """
+        )
+        _ensure_column(cur, "quiz_progress", "seed", "INTEGER")
+        # Packed ids of the quiz's words (today's words plus due reviews).
+        _ensure_column(cur, "quiz_progress", "word_ids", "BLOB")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS review_cards (
+                user_id INTEGER NOT NULL,
+                word_id INTEGER NOT NULL,
+                ease REAL NOT NULL,
+                interval_days REAL NOT NULL,
+                repetitions INTEGER NOT NULL,
+                lapses INTEGER NOT NULL,
+                due_at INTEGER NOT NULL,
+                last_review_at INTEGER,
+                PRIMARY KEY (user_id, word_id)
+            ) WITHOUT ROWID
+            """
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_review_cards_due ON review_cards (user_id, due_at)"
+        )
+        # Append-only log of answered quiz questions, written in batches (see answer_log.py).
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS quiz_answers (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                word_id INTEGER,
+                is_correct INTEGER NOT NULL,
+                latency_ms INTEGER,
+                answered_at INTEGER NOT NULL
+            )
+            """
+        )
+        _ensure_column(cur, "quiz_answers", "latency_ms", "INTEGER")
+        # Log rows past the retention window, compacted per word and day.
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS word_answer_stats (
+                word_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                answers INTEGER NOT NULL,
+                correct INTEGER NOT NULL,
+                latency_ms_total INTEGER NOT NULL,
+                latency_samples INTEGER NOT NULL,
+                PRIMARY KEY (word_id, date)
+            ) WITHOUT ROWID
+            """
+        )
+        # Checkpoint of each day's answer log compaction (see compact_answer_log_batch).
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answer_log_compactions (
+                date TEXT PRIMARY KEY,
+                cutoff INTEGER NOT NULL,
+                last_id INTEGER NOT NULL DEFAULT 0,
+                compacted INTEGER NOT NULL DEFAULT 0,
+                started_at TEXT,
+                finished_at TEXT
+            )
+            """
+        )
+        # Per-user daily answer rollups, maintained in the answer transactions.
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS user_daily_stats (
+                user_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                answers INTEGER NOT NULL DEFAULT 0,
+                correct INTEGER NOT NULL DEFAULT 0,
+                quizzes_completed INTEGER NOT NULL DEFAULT 0,
                 PRIMARY KEY (user_id, date)
+            ) WITHOUT ROWID
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS weekly_report_runs (
+                week TEXT PRIMARY KEY,
+                last_user_id INTEGER NOT NULL DEFAULT 0,
+                sent INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                started_at TEXT,
+                finished_at TEXT
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS broadcast_runs (
+                date TEXT PRIMARY KEY,
+                last_user_id INTEGER NOT NULL DEFAULT 0,
+                sent INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                started_at TEXT,
+                finished_at TEXT
             )
             """
         )
         conn.commit()
 
 
-def get_or_create_user(user_id: int, username: str | None) -> sqlite3.Row:
+def pending_migrations() -> list[str]:
+    """Return ``"<version> <name>"`` for each schema migration not yet applied."""
+    with get_connection() as conn:
+        return [f"{module.VERSION} {migrations.describe(module)}" for module in migrations.pending(conn)]
+
+
+def _ensure_column(cur: sqlite3.Cursor, table: str, column: str, definition: str) -> None:
+    """Add a column to an existing table created by an older version."""
+    cur.execute(f"PRAGMA table_info({table})")
+    if column not in {row["name"] for row in cur.fetchall()}:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _decode_daily_words(row: dict) -> list[dict]:
+    """Resolve a ``user_daily_words`` row, falling back to legacy JSON copies."""
+    if row["word_ids"] is not None:
+        return resolve_word_ids(unpack_word_ids(row["word_ids"]))
+    return json.loads(row["words_json"])
+
+
+def get_or_create_user(user_id: int, username: str | None) -> dict:
     """Fetch existing user or create a new one."""
     with get_connection() as conn:
         cur = conn.cursor()
@@ -95,7 +398,7 @@ def get_or_create_user(user_id: int, username: str | None) -> sqlite3.Row:
         return cur.fetchone()
 
 
-def get_user(user_id: int) -> sqlite3.Row | None:
+def get_user(user_id: int) -> dict | None:
     """Return user row if present."""
     with get_connection() as conn:
         cur = conn.cursor()
@@ -107,6 +410,7 @@ def calculate_new_streak(
     old_last_active_date: str | None,
     today_date_str: str,
     previous_streak: int | None = None,
+    yesterday_date_str: str | None = None,
 ) -> int:
     """Calculate streak based on last active date and today's date."""
     if previous_streak is None:
@@ -118,7 +422,7 @@ def calculate_new_streak(
     if old_last_active_date == today_date_str:
         return max(1, previous_streak)
 
-    if old_last_active_date == get_yesterday_date_str():
+    if old_last_active_date == (yesterday_date_str or get_yesterday_date_str()):
         return previous_streak + 1
 
     return 1
@@ -129,49 +433,241 @@ def update_user_after_today_request(
     new_last_word_index: int,
     new_streak: int,
     new_last_active_date: str,
+    word_ids: Iterable[int] = (),
 ) -> None:
-    """Update user's progress information after /today command."""
+    """Update user's progress information after /today command.
+
+    ``word_ids`` are the words just assigned; they are marked as seen.
+    """
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute(
-            """
-            UPDATE users
-            SET last_word_index = ?, streak = ?, last_active_date = ?
-            WHERE user_id = ?
-            """,
-            (new_last_word_index, new_streak, new_last_active_date, user_id),
-        )
+        cur.execute("BEGIN IMMEDIATE")
+        _update_user_after_today_request(cur, user_id, new_last_word_index, new_streak, new_last_active_date, word_ids)
+        conn.commit()
+
+
+def _update_user_after_today_request(
+    cur: sqlite3.Cursor,
+    user_id: int,
+    new_last_word_index: int,
+    new_streak: int,
+    new_last_active_date: str,
+    word_ids: Iterable[int],
+) -> None:
+    cur.execute(
+        """
+        UPDATE users
+        SET last_word_index = ?, streak = ?, last_active_date = ?
+        WHERE user_id = ?
+        """,
+        (new_last_word_index, new_streak, new_last_active_date, user_id),
+    )
+    _mark_seen(cur, user_id, word_ids)
+
+
+def _mark_seen(cur: sqlite3.Cursor, user_id: int, word_ids: Iterable[int], seen: bool = True) -> None:
+    """Set (or clear) the given words in the user's seen bitset; call inside a transaction."""
+    bits = mask_of(word_ids)
+    if not bits:
+        return
+    cur.execute("SELECT seen_words FROM users WHERE user_id = ?", (user_id,))
+    row = cur.fetchone()
+    if not row:
+        return
+    old = bits_from_blob(row["seen_words"])
+    new = old | bits if seen else old & ~bits
+    if new != old:
+        cur.execute("UPDATE users SET seen_words = ? WHERE user_id = ?", (bits_to_blob(new), user_id))
+
+
+def record_daily_activity(user_id: int, today_str: str, yesterday_str: str | None = None) -> None:
+    """Count today towards the user's streak unless it is already counted.
+
+    Used when today's words already exist (e.g. delivered by the broadcast),
+    so opening them still keeps the streak going. Writes nothing if the day
+    is already counted.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT last_active_date FROM users WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
+        if not row or row["last_active_date"] == today_str:
+            return
+        _record_daily_activity(cur, user_id, today_str, yesterday_str)
         conn.commit()
 
 
-def save_today_words(user_id: int, date_str: str, words_list: list[dict]) -> None:
-    """Persist today's assigned words for the user."""
-    words_json = json.dumps(words_list, ensure_ascii=False)
+def _record_daily_activity(
+    cur: sqlite3.Cursor,
+    user_id: int,
+    today_str: str,
+    yesterday_str: str | None = None,
+) -> None:
+    cur.execute(
+        """
+        UPDATE users
+        SET streak = CASE WHEN last_active_date = ? THEN COALESCE(streak, 0) + 1 ELSE 1 END,
+            last_active_date = ?
+        WHERE user_id = ? AND (last_active_date IS NULL OR last_active_date != ?)
+        """,
+        (yesterday_str or get_yesterday_date_str(), today_str, user_id, today_str),
+    )
+
+
+def open_today_words(user_id: int, today_str: str, yesterday_str: str | None = None) -> list[dict] | None:
+    """Return today's words and record the day's activity in one transaction.
+
+    Precomputed sets are confirmed on the way. A write transaction is only
+    opened if the day is not counted yet or the set is still precomputed;
+    otherwise this is a plain read. Returns ``None`` (and writes nothing) if
+    no words are assigned yet.
+    """
     with get_connection() as conn:
         cur = conn.cursor()
         cur.execute(
             """
-            INSERT INTO user_daily_words (user_id, date, words_json)
-            VALUES (?, ?, ?)
-            ON CONFLICT(user_id, date) DO UPDATE SET words_json=excluded.words_json
+            SELECT d.word_ids, d.words_json, d.planned_premium, u.last_active_date
+            FROM user_daily_words d LEFT JOIN users u ON u.user_id = d.user_id
+            WHERE d.user_id = ? AND d.date = ?
             """,
-            (user_id, date_str, words_json),
+            (user_id, today_str),
         )
+        row = cur.fetchone()
+        if not row:
+            return None
+        if row["planned_premium"] is None and row["last_active_date"] == today_str:
+            return _decode_daily_words(row)
+
+        cur.execute("BEGIN IMMEDIATE")
+        if row["planned_premium"] is None:
+            words = _decode_daily_words(row)
+        else:
+            # Re-read inside the transaction; confirming twice is a no-op.
+            words = resolve_word_ids(_confirm_precomputed_words(cur, user_id, today_str))
+        _record_daily_activity(cur, user_id, today_str, yesterday_str)
+        conn.commit()
+        return words
+
+
+def save_today_words(user_id: int, date_str: str, word_ids: list[int]) -> None:
+    """Persist today's assigned word ids for the user."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        _save_today_words(cur, user_id, date_str, word_ids)
+        conn.commit()
+
+
+def _save_today_words(cur: sqlite3.Cursor, user_id: int, date_str: str, word_ids: list[int]) -> None:
+    cur.execute(
+        """
+        INSERT INTO user_daily_words (user_id, date, word_ids)
+        VALUES (?, ?, ?)
+        ON CONFLICT(user_id, date)
+        DO UPDATE SET word_ids=excluded.word_ids, words_json=NULL
+        """,
+        (user_id, date_str, pack_word_ids(word_ids)),
+    )
+
+
+def assign_today_words(
+    user_id: int,
+    date_str: str,
+    word_ids: list[int],
+    new_last_word_index: int,
+    new_streak: int,
+) -> None:
+    """Save the day's words and the user's progress in one transaction, marking the words as seen.
+
+    The words and the seen bits therefore land (or are lost) together.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        _save_today_words(cur, user_id, date_str, word_ids)
+        _update_user_after_today_request(cur, user_id, new_last_word_index, new_streak, date_str, word_ids)
         conn.commit()
 
 
 def get_today_words(user_id: int, date_str: str) -> list[dict] | None:
-    """Return today's words for the user if already assigned."""
+    """Return today's words for the user if already assigned.
+
+    A precomputed set is confirmed against the user's current premium status
+    the first time it is read; after that this is a plain read.
+    """
     with get_connection() as conn:
         cur = conn.cursor()
         cur.execute(
-            "SELECT words_json FROM user_daily_words WHERE user_id = ? AND date = ?",
+            """
+            SELECT word_ids, words_json, planned_premium FROM user_daily_words
+            WHERE user_id = ? AND date = ?
+            """,
             (user_id, date_str),
         )
         row = cur.fetchone()
         if not row:
             return None
-        return json.loads(row["words_json"])
+        if row["planned_premium"] is None:
+            return _decode_daily_words(row)
+
+        cur.execute("BEGIN IMMEDIATE")
+        word_ids = _confirm_precomputed_words(cur, user_id, date_str)
+        conn.commit()
+        return resolve_word_ids(word_ids) if word_ids is not None else None
+
+
+def _confirm_precomputed_words(cur: sqlite3.Cursor, user_id: int, date_str: str) -> list[int] | None:
+    """Fit a precomputed set to the user's premium status now; call inside a transaction.
+
+    An upgrade since planning tops the set up from ``last_word_index``; a
+    downgrade truncates it and rewinds ``last_word_index`` unless words were
+    taken after the set in the meantime. Returns the final word ids.
+    """
+    cur.execute(
+        """
+        SELECT d.word_ids, d.planned_premium, u.premium_until, u.last_word_index,
+               u.seen_words, u.mastered_words
+        FROM user_daily_words d JOIN users u ON u.user_id = d.user_id
+        WHERE d.user_id = ? AND d.date = ?
+        """,
+        (user_id, date_str),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    word_ids = unpack_word_ids(row["word_ids"])
+    if row["planned_premium"] is None:
+        return word_ids
+
+    wanted = PREMIUM_DAILY_WORD_COUNT if is_premium(row) else DAILY_WORD_COUNT
+    last_word_index = row["last_word_index"] or 0
+    if wanted > len(word_ids):
+        extra, new_index = select_word_ids(
+            bits_from_blob(row["seen_words"]),
+            bits_from_blob(row["mastered_words"]),
+            last_word_index,
+            wanted - len(word_ids),
+            ALL_WORDS & ~mask_of(word_ids),
+        )
+        word_ids += extra
+        cur.execute("UPDATE users SET last_word_index = ? WHERE user_id = ?", (new_index, user_id))
+        _mark_seen(cur, user_id, extra)
+    elif wanted < len(word_ids):
+        dropped = word_ids[wanted:]
+        word_ids = word_ids[:wanted]
+        _, end_of_set = collect_word_ids(dropped[-1], 1)
+        cur.execute(
+            "UPDATE users SET last_word_index = ? WHERE user_id = ? AND COALESCE(last_word_index, 0) = ?",
+            (dropped[0], user_id, end_of_set),
+        )
+        _mark_seen(cur, user_id, dropped, seen=False)
+    cur.execute(
+        """
+        UPDATE user_daily_words SET word_ids = ?, planned_premium = NULL
+        WHERE user_id = ? AND date = ?
+        """,
+        (pack_word_ids(word_ids), user_id, date_str),
+    )
+    return word_ids
 
 
 def save_quiz_state(
@@ -180,33 +676,42 @@ def save_quiz_state(
     current_question_index: int,
     correct_count: int,
     total_count: int,
+    seed: int | None = None,
+    word_ids: list[int] | None = None,
 ) -> None:
     """Create or replace quiz state for the user."""
+    packed = pack_word_ids(word_ids) if word_ids is not None else None
     with get_connection() as conn:
         cur = conn.cursor()
         cur.execute(
             """
-            INSERT INTO quiz_progress (user_id, date, current_question_index, correct_count, total_count)
-            VALUES (?, ?, ?, ?, ?)
+            INSERT INTO quiz_progress
+                (user_id, date, current_question_index, correct_count, total_count, seed, word_ids)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
             ON CONFLICT(user_id, date)
             DO UPDATE SET current_question_index=excluded.current_question_index,
                           correct_count=excluded.correct_count,
-                          total_count=excluded.total_count
+                          total_count=excluded.total_count,
+                          seed=excluded.seed,
+                          word_ids=excluded.word_ids
             """,
-            (user_id, date_str, current_question_index, correct_count, total_count),
+            (user_id, date_str, current_question_index, correct_count, total_count, seed, packed),
         )
         conn.commit()
 
 
-def get_quiz_state(user_id: int, date_str: str) -> sqlite3.Row | None:
-    """Return stored quiz progress for today."""
+def get_quiz_state(user_id: int, date_str: str) -> dict | None:
+    """Return stored quiz progress for today, with ``word_ids`` decoded."""
     with get_connection() as conn:
         cur = conn.cursor()
         cur.execute(
             "SELECT * FROM quiz_progress WHERE user_id = ? AND date = ?",
             (user_id, date_str),
         )
-        return cur.fetchone()
+        row = cur.fetchone()
+        if row and row["word_ids"] is not None:
+            row["word_ids"] = unpack_word_ids(row["word_ids"])
+        return row
 
 
 def update_quiz_state_on_answer(
@@ -240,6 +745,66 @@ def clear_quiz_state(user_id: int, date_str: str) -> None:
         conn.commit()
 
 
+def answer_quiz_question(
+    user_id: int,
+    date_str: str,
+    question_index: int,
+    is_correct: bool,
+    word_id: int | None = None,
+) -> dict | None:
+    """Record a graded answer: advance the quiz and add XP in one transaction.
+
+    The progress row only advances if it is still on ``question_index``, so a
+    double tap on the same question is applied once. The answer is rolled up
+    and, when ``word_id`` is given, the word's review card is rescheduled in
+    the same transaction. Returns
+    ``None`` when the quiz is missing or has already moved past that question.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute(
+            """
+            UPDATE quiz_progress
+            SET current_question_index = current_question_index + 1,
+                correct_count = COALESCE(correct_count, 0) + ?
+            WHERE user_id = ? AND date = ? AND current_question_index = ?
+            RETURNING current_question_index, correct_count, total_count
+            """,
+            (int(is_correct), user_id, date_str, question_index),
+        )
+        state = cur.fetchone()
+        if not state:
+            return None
+
+        next_index = state["current_question_index"]
+        total = state["total_count"]
+        finished = next_index >= total
+        if finished:
+            cur.execute(
+                "DELETE FROM quiz_progress WHERE user_id = ? AND date = ?",
+                (user_id, date_str),
+            )
+        cur.execute(
+            "UPDATE users SET xp = COALESCE(xp, 0) + ? WHERE user_id = ? RETURNING xp",
+            (int(is_correct), user_id),
+        )
+        xp_row = cur.fetchone()
+        if is_correct:
+            _record_daily_xp(cur, [(user_id, get_clock().today(), 1)])
+        _record_answers(cur, [(user_id, date_str, word_id, is_correct, finished, get_clock().time())])
+        conn.commit()
+
+    return {
+        "is_correct": is_correct,
+        "correct_count": state["correct_count"],
+        "next_index": next_index,
+        "total": total,
+        "finished": finished,
+        "xp": xp_row["xp"] if xp_row else state["correct_count"],
+    }
+
+
 def add_xp(user_id: int, amount: int) -> None:
     """Increase user's XP by the given amount."""
     with get_connection() as conn:
@@ -248,12 +813,589 @@ def add_xp(user_id: int, amount: int) -> None:
             "UPDATE users SET xp = COALESCE(xp, 0) + ? WHERE user_id = ?",
             (amount, user_id),
         )
+        _record_daily_xp(cur, [(user_id, get_clock().today(), amount)])
+        conn.commit()
+
+
+def _record_daily_xp(cur: sqlite3.Cursor, increments: Iterable[tuple[int, str, int]]) -> None:
+    """Add ``(user_id, date, amount)`` XP to the windowed counters of the (default zone) award day."""
+    cur.executemany(
+        """
+        INSERT INTO user_xp_daily (user_id, date, xp) VALUES (?, ?, ?)
+        ON CONFLICT(user_id, date) DO UPDATE SET xp = xp + excluded.xp
+        """,
+        list(increments),
+    )
+
+
+def prune_xp_daily(before_date_str: str) -> int:
+    """Delete XP day rows older than ``before_date_str``, which no window needs; return the count."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM user_xp_daily WHERE date < ?", (before_date_str,))
+        conn.commit()
+        return cur.rowcount
+
+
+def load_leaderboards(since_date_str: str) -> tuple[list[tuple[int, int]], list[tuple[int, str, int]]]:
+    """Return all-time ``(user_id, xp)`` for users with XP and day rows since the date.
+
+    Older day rows are no longer needed by any window and are deleted.
+    """
+    prune_xp_daily(since_date_str)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT user_id, xp FROM users WHERE xp > 0")
+        totals = [(row["user_id"], row["xp"]) for row in cur.fetchall()]
+        cur.execute("SELECT user_id, date, xp FROM user_xp_daily WHERE date >= ?", (since_date_str,))
+        daily = [(row["user_id"], row["date"], row["xp"]) for row in cur.fetchall()]
+    return totals, daily
+
+
+def get_usernames(user_ids: list[int]) -> dict[int, str | None]:
+    """Return ``user_id -> username`` for the given users."""
+    if not user_ids:
+        return {}
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            f"SELECT user_id, username FROM users WHERE user_id IN ({','.join('?' * len(user_ids))})",
+            user_ids,
+        )
+        return {row["user_id"]: row["username"] for row in cur.fetchall()}
+
+
+def apply_write_behind(
+    xp_increments: dict[int, dict[str, int]],
+    progress_updates: dict[tuple[int, str], tuple[int, int]],
+    progress_deletes: set[tuple[int, str]],
+    answers: list[tuple[int, str, int | None, bool, bool, float]] = (),
+) -> None:
+    """Apply a coalesced batch of XP, quiz progress and answer writes in one transaction.
+
+    ``xp_increments`` maps each user to ``{award date: amount}``; ``answers``
+    holds ``(user_id, date, word_id, is_correct, finished_quiz, answered_at)``
+    in answer order.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        cur.executemany(
+            "UPDATE users SET xp = COALESCE(xp, 0) + ? WHERE user_id = ?",
+            [(sum(by_date.values()), user_id) for user_id, by_date in xp_increments.items()],
+        )
+        _record_daily_xp(
+            cur,
+            (
+                (user_id, date_str, amount)
+                for user_id, by_date in xp_increments.items()
+                for date_str, amount in by_date.items()
+            ),
+        )
+        cur.executemany(
+            """
+            UPDATE quiz_progress
+            SET current_question_index = ?, correct_count = ?
+            WHERE user_id = ? AND date = ?
+            """,
+            [
+                (index, correct_count, user_id, date_str)
+                for (user_id, date_str), (index, correct_count) in progress_updates.items()
+            ],
+        )
+        cur.executemany(
+            "DELETE FROM quiz_progress WHERE user_id = ? AND date = ?",
+            list(progress_deletes),
+        )
+        _record_answers(cur, answers)
+        conn.commit()
+
+
+def _record_answers(cur: sqlite3.Cursor, answers: list[tuple[int, str, int | None, bool, bool, float]]) -> None:
+    """Add answers to the daily rollups and reschedule reviews; call inside a transaction.
+
+    The raw answer log is written separately, in batches, by :func:`append_answer_log`.
+    """
+    if not answers:
+        return
+    rollups: dict[tuple[int, str], list[int]] = {}
+    for user_id, date_str, _, is_correct, finished, _ in answers:
+        totals = rollups.setdefault((user_id, date_str), [0, 0, 0])
+        totals[0] += 1
+        totals[1] += int(is_correct)
+        totals[2] += int(finished)
+    cur.executemany(
+        """
+        INSERT INTO user_daily_stats (user_id, date, answers, correct, quizzes_completed)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(user_id, date) DO UPDATE SET
+            answers = answers + excluded.answers,
+            correct = correct + excluded.correct,
+            quizzes_completed = quizzes_completed + excluded.quizzes_completed
+        """,
+        [(user_id, date_str, *totals) for (user_id, date_str), totals in rollups.items()],
+    )
+    for user_id, date_str, word_id, is_correct, _, answered_at in answers:
+        if word_id is not None:
+            _apply_review(cur, user_id, date_str, word_id, srs.answer_quality(is_correct), answered_at)
+
+
+_CARD_FIELDS = ("ease", "interval_days", "repetitions", "lapses", "due_at", "last_review_at")
+
+
+def _apply_review(cur: sqlite3.Cursor, user_id: int, date_str: str, word_id: int, quality: int, now: float) -> None:
+    """Reschedule one word's review card; call inside a transaction.
+
+    Cards due before the end of the user's local ``date_str`` count as due,
+    the same horizon :func:`get_due_reviews` is queried with.
+    """
+    cur.execute(
+        """
+        SELECT u.timezone, c.ease, c.interval_days, c.repetitions, c.lapses, c.due_at, c.last_review_at
+        FROM users u
+        LEFT JOIN review_cards c ON c.user_id = u.user_id AND c.word_id = ?
+        WHERE u.user_id = ?
+        """,
+        (word_id, user_id),
+    )
+    row = cur.fetchone()
+    previous = {field: row[field] for field in _CARD_FIELDS} if row and row["ease"] is not None else None
+    day_end = get_clock().day_end(date_str, row["timezone"] if row else None)
+    card = srs.review(previous, quality, now, due_before=day_end)
+    if srs.is_mastered(card) != srs.is_mastered(previous):
+        _mark_mastered(cur, user_id, word_id, srs.is_mastered(card))
+    cur.execute(
+        """
+        INSERT INTO review_cards
+            (user_id, word_id, ease, interval_days, repetitions, lapses, due_at, last_review_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id, word_id) DO UPDATE SET
+            ease = excluded.ease,
+            interval_days = excluded.interval_days,
+            repetitions = excluded.repetitions,
+            lapses = excluded.lapses,
+            due_at = excluded.due_at,
+            last_review_at = excluded.last_review_at
+        """,
+        (
+            user_id,
+            word_id,
+            card["ease"],
+            card["interval_days"],
+            card["repetitions"],
+            card["lapses"],
+            card["due_at"],
+            card["last_review_at"],
+        ),
+    )
+
+
+def _mark_mastered(cur: sqlite3.Cursor, user_id: int, word_id: int, mastered: bool) -> None:
+    """Set or clear one word in the user's mastered bitset; call inside a transaction."""
+    cur.execute("SELECT mastered_words FROM users WHERE user_id = ?", (user_id,))
+    row = cur.fetchone()
+    if not row:
+        return
+    bits = bits_from_blob(row["mastered_words"])
+    bits = bits | (1 << word_id) if mastered else bits & ~(1 << word_id)
+    cur.execute("UPDATE users SET mastered_words = ? WHERE user_id = ?", (bits_to_blob(bits), user_id))
+
+
+def get_due_reviews(user_id: int, due_before: float, limit: int) -> list[int]:
+    """Return ids of the user's words due for review, most overdue first.
+
+    Served by a range scan on ``idx_review_cards_due``.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT word_id FROM review_cards
+            WHERE user_id = ? AND due_at <= ?
+            ORDER BY due_at
+            LIMIT ?
+            """,
+            (user_id, int(due_before), limit),
+        )
+        return [row["word_id"] for row in cur.fetchall()]
+
+
+def broadcast_run_key(date_str: str, timezone: str | None = None) -> str:
+    """Return the ``broadcast_runs`` key for one zone's day (``"<date> <zone>"``, or the date for the default zone)."""
+    return f"{date_str} {timezone}" if timezone else date_str
+
+
+def fetch_user_timezones() -> list[str]:
+    """Return every time zone users have chosen besides the default."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT DISTINCT timezone FROM users WHERE timezone IS NOT NULL ORDER BY timezone")
+        return [row["timezone"] for row in cur.fetchall()]
+
+
+def get_broadcast_run(date_str: str, timezone: str | None = None) -> dict | None:
+    """Return the broadcast checkpoint for the given day in ``timezone``."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM broadcast_runs WHERE date = ?", (broadcast_run_key(date_str, timezone),))
+        return cur.fetchone()
+
+
+def fetch_broadcast_users(date_str: str, timezone: str | None, after_user_id: int, limit: int) -> list[dict]:
+    """Return the next page of users (keyset on ``user_id``) with their assignment state.
+
+    Only users in ``timezone`` (``None`` for the default zone) are returned,
+    since each zone's broadcast runs at its own local hour. ``has_words``
+    marks a confirmed assignment for the day, ``precomputed`` one made ahead
+    of time that has not been delivered yet.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT u.user_id, u.premium_until, u.last_word_index, u.seen_words, u.mastered_words,
+                   d.user_id IS NOT NULL AND d.planned_premium IS NULL AS has_words,
+                   d.planned_premium IS NOT NULL AS precomputed
+            FROM users u
+            LEFT JOIN user_daily_words d ON d.user_id = u.user_id AND d.date = ?
+            WHERE u.user_id > ? AND u.timezone IS ?
+            ORDER BY u.user_id
+            LIMIT ?
+            """,
+            (date_str, after_user_id, timezone, limit),
+        )
+        return cur.fetchall()
+
+
+def _insert_assignment(
+    cur: sqlite3.Cursor,
+    date_str: str,
+    assignment: tuple[int, list[int], int, int],
+    planned_premium: int | None = None,
+) -> bool:
+    """Insert one ``(user_id, word_ids, old_index, new_index)`` assignment.
+
+    Nothing is written if the user already has words for the day or their
+    ``last_word_index`` moved since it was read. The words are marked as
+    seen. Call inside a transaction.
+    """
+    user_id, word_ids, old_index, new_index = assignment
+    cur.execute(
+        """
+        INSERT OR IGNORE INTO user_daily_words (user_id, date, word_ids, planned_premium)
+        VALUES (?, ?, ?, ?)
+        """,
+        (user_id, date_str, pack_word_ids(word_ids), planned_premium),
+    )
+    if not cur.rowcount:
+        return False
+    cur.execute(
+        """
+        UPDATE users SET last_word_index = ?
+        WHERE user_id = ? AND COALESCE(last_word_index, 0) = ?
+        """,
+        (new_index, user_id, old_index),
+    )
+    if not cur.rowcount:
+        cur.execute(
+            "DELETE FROM user_daily_words WHERE user_id = ? AND date = ?",
+            (user_id, date_str),
+        )
+        return False
+    _mark_seen(cur, user_id, word_ids)
+    return True
+
+
+def save_broadcast_batch(
+    date_str: str,
+    assignments: list[tuple[int, list[int], int, int]],
+    precomputed_user_ids: list[int],
+    last_user_id: int,
+    timezone: str | None = None,
+) -> list[tuple[int, list[int]]]:
+    """Assign a page of daily words and advance the zone's broadcast checkpoint atomically.
+
+    ``assignments`` holds ``(user_id, word_ids, old_index, new_index)`` for
+    users without words; precomputed sets are confirmed instead. Returns the
+    ``(user_id, word_ids)`` pairs to message; the checkpoint moves past them
+    before anything is sent.
+    """
+    claimed: list[tuple[int, list[int]]] = []
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        for assignment in assignments:
+            if _insert_assignment(cur, date_str, assignment):
+                claimed.append((assignment[0], assignment[1]))
+        for user_id in precomputed_user_ids:
+            cur.execute(
+                "SELECT planned_premium FROM user_daily_words WHERE user_id = ? AND date = ?",
+                (user_id, date_str),
+            )
+            row = cur.fetchone()
+            if row is None or row["planned_premium"] is None:
+                continue  # opened with /today since the page was read
+            word_ids = _confirm_precomputed_words(cur, user_id, date_str)
+            if word_ids:
+                claimed.append((user_id, word_ids))
+        cur.execute(
+            """
+            INSERT INTO broadcast_runs (date, last_user_id, started_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(date) DO UPDATE SET last_user_id = excluded.last_user_id
+            """,
+            (broadcast_run_key(date_str, timezone), last_user_id, now_utc_iso()),
+        )
+        conn.commit()
+    return claimed
+
+
+def fetch_precompute_users(
+    today_str: str,
+    target_date_str: str,
+    timezone: str | None,
+    after_user_id: int,
+    limit: int,
+) -> list[dict]:
+    """Return the next page of users in ``timezone`` active today with no words planned for the target day."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT u.user_id, u.premium_until, u.last_word_index, u.seen_words, u.mastered_words
+            FROM users u
+            JOIN user_daily_words t ON t.user_id = u.user_id AND t.date = ?
+            WHERE u.user_id > ? AND u.timezone IS ?
+              AND NOT EXISTS (
+                  SELECT 1 FROM user_daily_words n WHERE n.user_id = u.user_id AND n.date = ?
+              )
+            ORDER BY u.user_id
+            LIMIT ?
+            """,
+            (today_str, after_user_id, timezone, target_date_str, limit),
+        )
+        return cur.fetchall()
+
+
+def save_precomputed_batch(
+    date_str: str,
+    assignments: list[tuple[int, list[int], int, int, bool]],
+) -> int:
+    """Store a page of ahead-of-time assignments in one transaction.
+
+    Each entry is ``(user_id, word_ids, old_index, new_index, premium)``, the
+    premium flag recording the status the set was planned for. Returns the
+    number of rows written.
+    """
+    written = 0
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        for *assignment, premium in assignments:
+            written += _insert_assignment(cur, date_str, tuple(assignment), int(premium))
+        conn.commit()
+    return written
+
+
+def append_answer_log(entries: list[tuple[int, str, int | None, bool, int | None, float]]) -> None:
+    """Insert ``(user_id, date, word_id, is_correct, latency_ms, answered_at)`` log entries in one transaction."""
+    with get_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO quiz_answers (user_id, date, word_id, is_correct, latency_ms, answered_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (user_id, date_str, word_id, int(is_correct), latency_ms, int(answered_at))
+                for user_id, date_str, word_id, is_correct, latency_ms, answered_at in entries
+            ],
+        )
+        conn.commit()
+
+
+def get_answer_log_compaction(date_str: str) -> dict | None:
+    """Return the answer log compaction checkpoint for the given day."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM answer_log_compactions WHERE date = ?", (date_str,))
+        return cur.fetchone()
+
+
+def start_answer_log_compaction(date_str: str, cutoff: float) -> None:
+    """Create the day's compaction checkpoint; an existing one keeps its original cutoff."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT OR IGNORE INTO answer_log_compactions (date, cutoff, started_at) VALUES (?, ?, ?)",
+            (date_str, int(cutoff), now_utc_iso()),
+        )
+        conn.commit()
+
+
+def compact_answer_log_batch(date_str: str, batch_size: int = 5000) -> int:
+    """Fold one batch of log rows older than the day's cutoff into ``word_answer_stats`` and delete them.
+
+    Rows are appended in time order, so the batch is the oldest ids up to the
+    first row inside the retention window. Folding, deleting and advancing
+    the checkpoint happen in one transaction, so an interrupted run resumes
+    cleanly. Per-user totals already live in ``user_daily_stats``. Returns
+    the rows compacted; 0 once the run is finished.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT cutoff, finished_at FROM answer_log_compactions WHERE date = ?", (date_str,))
+        run = cur.fetchone()
+        if run is None or run["finished_at"]:
+            return 0
+        cur.execute(
+            "SELECT id, answered_at FROM quiz_answers ORDER BY id LIMIT ?",
+            (batch_size,),
+        )
+        rows = cur.fetchall()
+        old = 0
+        while old < len(rows) and rows[old]["answered_at"] < run["cutoff"]:
+            old += 1
+        last_id = rows[old - 1]["id"] if old else 0
+        # A batch that reaches the retention window (or an empty log) is the last one.
+        finished = old < len(rows) or not rows
+        cur.execute("BEGIN IMMEDIATE")
+        if old:
+            first_id = rows[0]["id"]
+            cur.execute(
+                """
+                INSERT INTO word_answer_stats
+                    (word_id, date, answers, correct, latency_ms_total, latency_samples)
+                SELECT word_id, date, COUNT(*), SUM(is_correct),
+                       COALESCE(SUM(latency_ms), 0), COUNT(latency_ms)
+                FROM quiz_answers
+                WHERE id BETWEEN ? AND ? AND word_id IS NOT NULL
+                GROUP BY word_id, date
+                ON CONFLICT(word_id, date) DO UPDATE SET
+                    answers = answers + excluded.answers,
+                    correct = correct + excluded.correct,
+                    latency_ms_total = latency_ms_total + excluded.latency_ms_total,
+                    latency_samples = latency_samples + excluded.latency_samples
+                """,
+                (first_id, last_id),
+            )
+            cur.execute("DELETE FROM quiz_answers WHERE id BETWEEN ? AND ?", (first_id, last_id))
+        cur.execute(
+            """
+            UPDATE answer_log_compactions
+            SET last_id = MAX(last_id, ?), compacted = compacted + ?, finished_at = ?
+            WHERE date = ?
+            """,
+            (last_id, old, now_utc_iso() if finished else None, date_str),
+        )
+        conn.commit()
+    return old
+
+
+def get_weekly_report_run(week_str: str) -> dict | None:
+    """Return the weekly report checkpoint for the week starting on ``week_str``."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM weekly_report_runs WHERE week = ?", (week_str,))
+        return cur.fetchone()
+
+
+def fetch_weekly_report_page(
+    week_str: str,
+    end_date_str: str,
+    now_iso: str,
+    after_user_id: int,
+    limit: int,
+) -> list[dict]:
+    """Return the next page of premium users with their week's rollups.
+
+    Totals are summed from ``user_daily_stats`` between ``week_str`` and
+    ``end_date_str`` (inclusive); users with no activity get zeros. The
+    checkpoint is not touched; see :func:`advance_weekly_report_run`.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT u.user_id, u.premium_until, u.streak,
+                   COALESCE(SUM(s.answers), 0) AS answers,
+                   COALESCE(SUM(s.correct), 0) AS correct,
+                   COALESCE(SUM(s.quizzes_completed), 0) AS quizzes_completed,
+                   COUNT(s.date) AS active_days
+            FROM users u
+            LEFT JOIN user_daily_stats s
+                ON s.user_id = u.user_id AND s.date BETWEEN ? AND ?
+            WHERE u.user_id > ? AND u.premium_until > ?
+            GROUP BY u.user_id
+            ORDER BY u.user_id
+            LIMIT ?
+            """,
+            (week_str, end_date_str, after_user_id, now_iso, limit),
+        )
+        return cur.fetchall()
+
+
+def advance_weekly_report_run(week_str: str, last_user_id: int) -> None:
+    """Move the week's checkpoint past ``last_user_id``, before that page is sent."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO weekly_report_runs (week, last_user_id, started_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(week) DO UPDATE SET last_user_id = excluded.last_user_id
+            """,
+            (week_str, last_user_id, now_utc_iso()),
+        )
+        conn.commit()
+
+
+def record_weekly_report_result(week_str: str, sent: int, failed: int, finished: bool = False) -> None:
+    """Add delivery counters to the week's checkpoint and optionally close it."""
+    now = now_utc_iso()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO weekly_report_runs (week, sent, failed, started_at, finished_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(week) DO UPDATE SET
+                sent = sent + excluded.sent,
+                failed = failed + excluded.failed,
+                finished_at = COALESCE(excluded.finished_at, finished_at)
+            """,
+            (week_str, sent, failed, now, now if finished else None),
+        )
+        conn.commit()
+
+
+def record_broadcast_result(
+    date_str: str,
+    sent: int,
+    failed: int,
+    finished: bool = False,
+    timezone: str | None = None,
+) -> None:
+    """Add delivery counters to the zone's day checkpoint and optionally close it."""
+    now = now_utc_iso()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO broadcast_runs (date, sent, failed, started_at, finished_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(date) DO UPDATE SET
+                sent = sent + excluded.sent,
+                failed = failed + excluded.failed,
+                finished_at = COALESCE(excluded.finished_at, finished_at)
+            """,
+            (broadcast_run_key(date_str, timezone), sent, failed, now, now if finished else None),
+        )
         conn.commit()
 
 
 def mark_user_premium(user_id: int, days: int = 30) -> None:
     """Mark a user as premium for the given number of days."""
-    now = datetime.now(UTC)
+    now = get_clock().now_utc()
     expires_at = now + timedelta(days=days)
     with get_connection() as conn:
         cur = conn.cursor()
@@ -268,6 +1410,68 @@ def mark_user_premium(user_id: int, days: int = 30) -> None:
         conn.commit()
 
 
+def migrate_daily_words_to_ids(batch_size: int = 500) -> tuple[int, int]:
+    """Convert legacy ``words_json`` assignments into packed word ids.
+
+    Rows are converted in small committed batches. Rows that mention a word no
+    longer in the bank are left as JSON. Returns ``(converted, skipped)``.
+    """
+    converted = skipped = 0
+    last_key = (-1, "")
+    with get_connection() as conn:
+        cur = conn.cursor()
+        while True:
+            cur.execute(
+                """
+                SELECT user_id, date, words_json FROM user_daily_words
+                WHERE word_ids IS NULL AND words_json IS NOT NULL AND (user_id, date) > (?, ?)
+                ORDER BY user_id, date
+                LIMIT ?
+                """,
+                (*last_key, batch_size),
+            )
+            rows = cur.fetchall()
+            if not rows:
+                break
+
+            updates = []
+            for row in rows:
+                try:
+                    ids = [WORD_ID_BY_TEXT[word["word"]] for word in json.loads(row["words_json"])]
+                except (KeyError, TypeError, ValueError):
+                    skipped += 1
+                    continue
+                updates.append((pack_word_ids(ids), row["user_id"], row["date"]))
+            cur.executemany(
+                """
+                UPDATE user_daily_words SET word_ids = ?, words_json = NULL
+                WHERE user_id = ? AND date = ?
+                """,
+                updates,
+            )
+            conn.commit()
+            converted += len(updates)
+            last_key = (rows[-1]["user_id"], rows[-1]["date"])
+    return converted, skipped
+
+
+def get_user_timezone(user_id: int) -> str | None:
+    """Return the user's own time zone, or ``None`` for the default one."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT timezone FROM users WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
+        return row["timezone"] if row else None
+
+
+def set_user_timezone(user_id: int, timezone: str | None) -> None:
+    """Store the user's time zone (``None`` resets it to the default)."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE users SET timezone = ? WHERE user_id = ?", (timezone, user_id))
+        conn.commit()
+
+
 def is_user_admin(user_id: int) -> bool:
     """Return True if the user is in the admin list."""
     return user_id in ADMIN_IDS
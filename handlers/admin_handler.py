@@ -7,6 +7,7 @@ from aiogram.filters import Command
 from aiogram.types import Message
 
 import db
+import storage
 
 router = Router()
 
@@ -41,6 +42,6 @@ async def cmd_make_premium(message: Message) -> None:
             await message.answer("Kunlar qiymati noto'g'ri.")
             return
 
-    db.get_or_create_user(target_id, None)
-    db.mark_user_premium(target_id, days=days)
+    await storage.get_or_create_user(target_id, None)
+    await storage.mark_user_premium(target_id, days=days)
     await message.answer(f"Foydalanuvchi {target_id} {days} kunga Premiumga o'tkazildi.")
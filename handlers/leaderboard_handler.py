@@ -0,0 +1,55 @@
+### FILE: handlers/leaderboard_handler.py
+"""Handler for the /top XP leaderboard."""
+from __future__ import annotations
+
+from html import escape
+
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+import storage
+
+router = Router()
+
+TOP_LIMIT = 10
+
+# /top argument -> (board window, title)
+_WINDOWS = {
+    "": ("all", "Umumiy reyting 🏆"),
+    "hafta": ("week", "Haftalik reyting 🏆"),
+    "kun": ("day", "Bugungi reyting 🏆"),
+}
+
+
+@router.message(Command("top"))
+async def cmd_top(message: Message) -> None:
+    """Show the top users by XP: all time, this week (/top hafta) or today (/top kun)."""
+    user = message.from_user
+    if not user:
+        return
+
+    parts = (message.text or "").split(maxsplit=1)
+    argument = parts[1].strip().lower() if len(parts) > 1 else ""
+    if argument not in _WINDOWS:
+        await message.answer("Foydalanish: /top, /top hafta yoki /top kun")
+        return
+
+    window, title = _WINDOWS[argument]
+    page = await storage.get_leaderboard(window, TOP_LIMIT)
+    if not page:
+        await message.answer(f"{title}\n\nHali hech kim XP to'plamagan. /quiz bilan birinchi bo'l!")
+        return
+
+    lines = [title, ""]
+    for entry in page:
+        name = escape(entry["username"]) if entry["username"] else f"#{entry['user_id']}"
+        lines.append(f"{entry['rank']}. {name} — {entry['xp']} XP")
+
+    position, players = await storage.get_user_rank(user.id, window)
+    lines.append("")
+    if position:
+        lines.append(f"Sening o'rning: {position}/{players}")
+    else:
+        lines.append("Sen hali bu reytingda yo'qsan. /quiz orqali XP to'pla!")
+    await message.answer("\n".join(lines))
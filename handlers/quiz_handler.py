@@ -2,28 +2,27 @@
 """Handlers for quiz flows."""
 from __future__ import annotations
 
-from urllib.parse import unquote_plus
-
 from aiogram import F, Router
 from aiogram.filters import Command
-from aiogram.types import CallbackQuery, Message
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
 
-from keyboards import quiz_options_keyboard
+from keyboards import QuizAnswerCallback, quiz_options_keyboard
 from services import quiz_service
-from services.quiz_service import QuizUnavailableError
+from services.quiz_service import QuizUnavailableError, StaleAnswerError
 
 router = Router()
 
 
-def _question_with_progress(question: dict, correct_count: int) -> tuple[str, list[str]]:
-    """Return formatted question text and options."""
+def _question_with_progress(question: dict, correct_count: int) -> tuple[str, InlineKeyboardMarkup]:
+    """Return formatted question text and its answer keyboard."""
     text = f"{question['question_text']}\n\nTo'g'ri javoblar: {correct_count}/{question['total']}"
-    return text, question["options"]
+    keyboard = quiz_options_keyboard(question["options"], question["quiz_id"], question["current_index"])
+    return text, keyboard
 
 
-def _handle_quiz_start(user_id: int) -> dict:
+async def _handle_quiz_start(user_id: int) -> dict:
     """Start quiz and return question payload."""
-    result = quiz_service.start_quiz(user_id)
+    result = await quiz_service.start_quiz(user_id)
     return result["question"]
 
 
@@ -35,13 +34,13 @@ async def cmd_quiz(message: Message) -> None:
         return
 
     try:
-        question = _handle_quiz_start(user.id)
+        question = await _handle_quiz_start(user.id)
     except QuizUnavailableError:
         await message.answer("Avval /today bosing 😊")
         return
 
-    text, options = _question_with_progress(question, correct_count=0)
-    await message.answer(text, reply_markup=quiz_options_keyboard(options))
+    text, keyboard = _question_with_progress(question, correct_count=0)
+    await message.answer(text, reply_markup=keyboard)
 
 
 @router.callback_query(F.data == "quiz_start")
@@ -53,29 +52,41 @@ async def cb_quiz_start(callback: CallbackQuery) -> None:
         return
 
     try:
-        question = _handle_quiz_start(user.id)
+        question = await _handle_quiz_start(user.id)
     except QuizUnavailableError:
         await callback.answer("Avval /today bosing 😊", show_alert=True)
         return
 
-    text, options = _question_with_progress(question, correct_count=0)
-    await callback.message.answer(text, reply_markup=quiz_options_keyboard(options))
+    text, keyboard = _question_with_progress(question, correct_count=0)
+    await callback.message.answer(text, reply_markup=keyboard)
     await callback.answer()
 
 
 @router.callback_query(F.data.startswith("quiz_ans|"))
-async def cb_quiz_answer(callback: CallbackQuery) -> None:
+async def cb_legacy_quiz_answer(callback: CallbackQuery) -> None:
+    """Answer buttons sent before the compact callback format cannot be graded."""
+    await callback.answer("Quizni qayta /quiz orqali boshlang.", show_alert=True)
+
+
+@router.callback_query(QuizAnswerCallback.filter())
+async def cb_quiz_answer(callback: CallbackQuery, callback_data: QuizAnswerCallback) -> None:
     """Process a quiz answer option."""
     user = callback.from_user
-    if not user or not callback.data:
+    if not user:
         await callback.answer()
         return
 
-    encoded = callback.data.split("|", maxsplit=1)[1]
-    answer_text = unquote_plus(encoded)
+    try:
+        quiz_id, question_index, option_index = callback_data.decode()
+    except ValueError:
+        await callback.answer("Quizni qayta /quiz orqali boshlang.", show_alert=True)
+        return
 
     try:
-        result = quiz_service.get_next_question(user.id, answer_text)
+        result = await quiz_service.get_next_question(user.id, quiz_id, question_index, option_index)
+    except StaleAnswerError:
+        await callback.answer()
+        return
     except QuizUnavailableError:
         await callback.answer("Quizni qayta /quiz orqali boshlang.", show_alert=True)
         return
@@ -96,5 +107,5 @@ async def cb_quiz_answer(callback: CallbackQuery) -> None:
         return
 
     question = result["question"]
-    text, options = _question_with_progress(question, result["correct_count"])
-    await callback.message.edit_text(text, reply_markup=quiz_options_keyboard(options))
+    text, keyboard = _question_with_progress(question, result["correct_count"])
+    await callback.message.edit_text(text, reply_markup=keyboard)
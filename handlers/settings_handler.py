@@ -0,0 +1,42 @@
+### FILE: handlers/settings_handler.py
+"""Handlers for per-user settings."""
+from __future__ import annotations
+
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+import config
+import storage
+from utils.clock import is_valid_timezone
+
+router = Router()
+
+
+@router.message(Command("timezone"))
+async def cmd_timezone(message: Message) -> None:
+    """Show or change the user's time zone used for daily words."""
+    user = message.from_user
+    if not user:
+        return
+
+    await storage.get_or_create_user(user.id, user.username or user.full_name)
+    parts = (message.text or "").split(maxsplit=1)
+    if len(parts) < 2:
+        current = await storage.get_user_timezone(user.id) or config.TIMEZONE
+        await message.answer(
+            f"Vaqt zonang: {current}\n"
+            "O'zgartirish: /timezone Europe/Moscow\n"
+            "Standartga qaytarish: /timezone default"
+        )
+        return
+
+    requested = parts[1].strip()
+    if requested.lower() in {"default", "standart"}:
+        requested = config.TIMEZONE
+    elif not is_valid_timezone(requested):
+        await message.answer("Bunday vaqt zonasi topilmadi. Masalan: /timezone Asia/Tashkent")
+        return
+
+    await storage.set_user_timezone(user.id, requested)
+    await message.answer(f"Vaqt zonasi saqlandi: {requested}\nYangi kun shu zona bo'yicha boshlanadi.")
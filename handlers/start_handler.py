@@ -6,7 +6,7 @@ from aiogram import Router
 from aiogram.filters import CommandStart
 from aiogram.types import Message
 
-import db
+import storage
 
 router = Router()
 
@@ -19,7 +19,7 @@ async def cmd_start(message: Message) -> None:
         return
 
     username = user.username or user.full_name
-    db.get_or_create_user(user.id, username)
+    await storage.get_or_create_user(user.id, username)
 
     text = (
         "Salom 👋 Bu SozMaster AI.\n"
@@ -29,6 +29,8 @@ async def cmd_start(message: Message) -> None:
         "• /today – bugungi so'zlar\n"
         "• /quiz – bugungi mini-quiz\n"
         "• /stats – XP va streak\n"
+        "• /top – XP reytingi\n"
         "• /upgrade – Premium haqida\n"
+        "• /timezone – vaqt zonasini sozlash\n"
     )
     await message.answer(text)
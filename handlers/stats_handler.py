@@ -8,19 +8,22 @@ from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, Message
 
-import db
+import storage
 from utils.time import is_premium
+from utils.word_bits import TOTAL_WORDS, bits_from_blob
 
 router = Router()
 
 
-def _stats_text(user_row) -> str:
-    """Build a user-friendly statistics message."""
+def _stats_text(user_row, rank: tuple[int | None, int] | None = None) -> str:
+    """Build a user-friendly statistics message; ``rank`` is ``(rank, players)`` on the XP board."""
     if not user_row:
         return "Ma'lumot topilmadi. Avval /start buyrug'ini yuboring."
 
     xp = user_row["xp"] or 0
     streak = user_row["streak"] or 0
+    seen = bits_from_blob(user_row.get("seen_words")).bit_count()
+    mastered = bits_from_blob(user_row.get("mastered_words")).bit_count()
 
     if is_premium(user_row):
         try:
@@ -35,10 +38,15 @@ def _stats_text(user_row) -> str:
     else:
         premium_line = "Premium holati: Oddiy foydalanuvchi"
 
+    position, players = rank or (None, 0)
+    rank_line = f"Reyting: {position}-o'rin ({players} ta ishtirokchi)\n" if position else ""
+
     return (
         "Statistikang 📈\n\n"
         f"XP: {xp}\n"
         f"Ketma-ket kunlar: {streak}\n"
+        f"Ko'rilgan so'zlar: {seen}/{TOTAL_WORDS} (o'zlashtirilgan: {mastered})\n"
+        f"{rank_line}"
         f"{premium_line}"
     )
 
@@ -50,8 +58,10 @@ async def cmd_stats(message: Message) -> None:
     if not user:
         return
 
-    user_row = db.get_user(user.id) or db.get_or_create_user(user.id, user.username or user.full_name)
-    await message.answer(_stats_text(user_row))
+    user_row = await storage.get_user(user.id) or await storage.get_or_create_user(
+        user.id, user.username or user.full_name
+    )
+    await message.answer(_stats_text(user_row, await storage.get_user_rank(user.id)))
 
 
 @router.callback_query(lambda c: c.data == "show_stats")
@@ -62,6 +72,8 @@ async def cb_show_stats(callback: CallbackQuery) -> None:
         await callback.answer()
         return
 
-    user_row = db.get_user(user.id) or db.get_or_create_user(user.id, user.username or user.full_name)
-    await callback.message.answer(_stats_text(user_row))
+    user_row = await storage.get_user(user.id) or await storage.get_or_create_user(
+        user.id, user.username or user.full_name
+    )
+    await callback.message.answer(_stats_text(user_row, await storage.get_user_rank(user.id)))
     await callback.answer()
@@ -6,10 +6,11 @@ from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message
 
-import db
+import config
+import storage
 from keyboards import today_actions_keyboard
-from services import word_service
-from utils.time import get_tashkent_date_str, is_premium
+from services import review_service, word_service
+from utils.time import is_premium
 
 router = Router()
 
@@ -22,8 +23,9 @@ async def cmd_today(message: Message) -> None:
         return
 
     username = user.username or user.full_name
-    words = word_service.get_or_assign_today_words(user.id, username)
-    formatted = word_service.format_words_for_user(words)
+    words = await word_service.get_or_assign_today_words(user.id, username)
+    due_words = await review_service.get_due_words(user.id, config.REVIEW_TODAY_LIMIT, exclude=words)
+    formatted = word_service.format_words_for_user(words, review_words=due_words)
     await message.answer(formatted, reply_markup=today_actions_keyboard())
 
 
@@ -34,7 +36,7 @@ async def cmd_more(message: Message) -> None:
     if not user:
         return
 
-    user_row = db.get_user(user.id)
+    user_row = await storage.get_user(user.id)
     if not is_premium(user_row):
         await message.answer(
             "Bu funksiya faqat Premium uchun ⭐\n"
@@ -47,11 +49,11 @@ async def cmd_more(message: Message) -> None:
         return
 
     username = user.username or user.full_name
-    today = get_tashkent_date_str()
-    if not db.get_today_words(user.id, today):
-        word_service.get_or_assign_today_words(user.id, username)
+    today = (await storage.get_user_day(user.id)).today
+    if not await storage.get_today_words(user.id, today):
+        await word_service.get_or_assign_today_words(user.id, username)
 
-    extra_words = word_service.assign_additional_words(user.id, username, count=5)
+    extra_words = await word_service.assign_additional_words(user.id, username, count=5)
     extra_message = word_service.format_words_for_user(extra_words)
     extra_message = extra_message.replace("Bugungi so'zlaring 🔥", "Bonus so'zlar ⭐", 1)
     await message.answer(extra_message)
@@ -8,7 +8,7 @@ from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, Message
 
-import db
+import storage
 from utils.time import is_premium
 
 router = Router()
@@ -46,7 +46,7 @@ async def cmd_upgrade(message: Message) -> None:
     if not user:
         return
 
-    user_row = db.get_user(user.id)
+    user_row = await storage.get_user(user.id)
     await message.answer(_upgrade_text(user_row))
 
 
@@ -58,6 +58,6 @@ async def cb_show_upgrade(callback: CallbackQuery) -> None:
         await callback.answer()
         return
 
-    user_row = db.get_user(user.id)
+    user_row = await storage.get_user(user.id)
     await callback.message.answer(_upgrade_text(user_row))
     await callback.answer()
@@ -2,11 +2,45 @@
 """Inline keyboard builders for SozMaster AI."""
 from __future__ import annotations
 
-from urllib.parse import quote_plus
+import base64
+import binascii
+import struct
 
+from aiogram.filters.callback_data import CallbackData
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+_QUIZ_ANSWER = struct.Struct(">IBB")
+
+
+class QuizAnswerCallback(CallbackData, prefix="qa"):
+    """Quiz answer button payload.
+
+    Quiz id, question index and option index are packed into six bytes and
+    sent as eight URL-safe base64 characters, e.g. ``qa:AAAwOQMB``.
+    """
+
+    token: str
+
+    @classmethod
+    def build(cls, quiz_id: int, question_index: int, option_index: int) -> "QuizAnswerCallback":
+        """Pack the answer coordinates into a callback payload."""
+        try:
+            raw = _QUIZ_ANSWER.pack(quiz_id, question_index, option_index)
+        except struct.error as exc:
+            raise ValueError(str(exc)) from exc
+        return cls(token=base64.urlsafe_b64encode(raw).decode("ascii"))
+
+    def decode(self) -> tuple[int, int, int]:
+        """Return ``(quiz_id, question_index, option_index)``; raise ``ValueError`` if malformed."""
+        try:
+            raw = base64.urlsafe_b64decode(self.token.encode("ascii"))
+        except (binascii.Error, UnicodeEncodeError) as exc:
+            raise ValueError("malformed quiz answer token") from exc
+        if len(raw) != _QUIZ_ANSWER.size:
+            raise ValueError("malformed quiz answer token")
+        return _QUIZ_ANSWER.unpack(raw)
+
 
 def today_actions_keyboard() -> InlineKeyboardMarkup:
     """Return keyboard with shortcuts after /today."""
@@ -18,11 +52,13 @@ def today_actions_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def quiz_options_keyboard(options: list[str]) -> InlineKeyboardMarkup:
+def quiz_options_keyboard(options: list[str], quiz_id: int, question_index: int) -> InlineKeyboardMarkup:
     """Build keyboard for quiz answers."""
     builder = InlineKeyboardBuilder()
-    for option in options:
-        encoded = quote_plus(option)
-        builder.button(text=option, callback_data=f"quiz_ans|{encoded}")
+    for index, option in enumerate(options):
+        builder.button(
+            text=option,
+            callback_data=QuizAnswerCallback.build(quiz_id, question_index, index),
+        )
     builder.adjust(2)
     return builder.as_markup()
@@ -0,0 +1,190 @@
+### FILE: leaderboard.py
+"""In-memory XP leaderboards with logarithmic rank queries.
+
+Each :class:`XpBoard` keeps a Fenwick tree of how many users hold each XP
+value, so "how many users have more XP than me" and "who is k-th" cost
+O(log max_xp), and a top-N page is read without touching SQLite.
+:class:`Leaderboards` holds the all-time board plus the current day's and
+week's boards, starting fresh ones when the window rolls over. The storage
+layer loads them from the database once and then updates them on every XP
+award. All methods must be called from the event loop thread.
+"""
+from __future__ import annotations
+
+import heapq
+from datetime import date, timedelta
+from typing import Iterable
+
+
+class XpBoard:
+    """Ranks users by XP; users with no XP are not on the board."""
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self._size = 1
+        while self._size < capacity:
+            self._size *= 2
+        self._tree = [0] * (self._size + 1)
+        self._xp: dict[int, int] = {}
+        self._users_by_xp: dict[int, set[int]] = {}
+
+    @classmethod
+    def from_totals(cls, totals: Iterable[tuple[int, int]]) -> "XpBoard":
+        """Build a board from ``(user_id, xp)`` pairs in linear time."""
+        board = cls()
+        for user_id, xp in totals:
+            if xp > 0:
+                board._xp[user_id] = xp
+                board._users_by_xp.setdefault(xp, set()).add(user_id)
+        board._grow(max(board._users_by_xp, default=1))
+        return board
+
+    def __len__(self) -> int:
+        return len(self._xp)
+
+    def xp(self, user_id: int) -> int:
+        """Return the user's XP on this board."""
+        return self._xp.get(user_id, 0)
+
+    def add(self, user_id: int, amount: int) -> None:
+        """Add ``amount`` XP to the user."""
+        self.set(user_id, self._xp.get(user_id, 0) + amount)
+
+    def set(self, user_id: int, xp: int) -> None:
+        """Move the user to the given XP value."""
+        old = self._xp.get(user_id, 0)
+        if old == xp:
+            return
+        if old > 0:
+            self._update(old, -1)
+            users = self._users_by_xp[old]
+            users.discard(user_id)
+            if not users:
+                del self._users_by_xp[old]
+        if xp > 0:
+            self._update(xp, 1)
+            self._users_by_xp.setdefault(xp, set()).add(user_id)
+            self._xp[user_id] = xp
+        else:
+            self._xp.pop(user_id, None)
+
+    def rank(self, user_id: int) -> int | None:
+        """Return the user's 1-based rank (ties share a rank), or ``None`` if not on the board."""
+        xp = self._xp.get(user_id)
+        if xp is None:
+            return None
+        return len(self._xp) - self._prefix(xp) + 1
+
+    def top(self, limit: int) -> list[tuple[int, int]]:
+        """Return up to ``limit`` ``(user_id, xp)`` pairs, highest XP first."""
+        page: list[tuple[int, int]] = []
+        k = 1
+        while len(page) < limit and k <= len(self._xp):
+            xp = self._kth_largest(k)
+            users = self._users_by_xp[xp]
+            page.extend((user_id, xp) for user_id in heapq.nsmallest(limit - len(page), users))
+            k += len(users)
+        return page
+
+    # -------------------------------------------------------------- fenwick
+    def _update(self, xp: int, delta: int) -> None:
+        if xp > self._size:
+            self._grow(xp)
+        index = xp
+        while index <= self._size:
+            self._tree[index] += delta
+            index += index & -index
+
+    def _prefix(self, xp: int) -> int:
+        """Count users with XP in ``1..xp``."""
+        index = min(xp, self._size)
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+    def _kth_largest(self, k: int) -> int:
+        """Return the XP value held by the k-th highest user."""
+        target = len(self._xp) - k + 1
+        position, step = 0, self._size
+        while step:
+            nxt = position + step
+            if nxt <= self._size and self._tree[nxt] < target:
+                position = nxt
+                target -= self._tree[nxt]
+            step //= 2
+        return position + 1
+
+    def _grow(self, xp: int) -> None:
+        """Resize the tree to hold ``xp`` and rebuild it from the buckets in O(size)."""
+        while self._size < xp:
+            self._size *= 2
+        tree = [0] * (self._size + 1)
+        for value, users in self._users_by_xp.items():
+            tree[value] = len(users)
+        for index in range(1, self._size + 1):
+            parent = index + (index & -index)
+            if parent <= self._size:
+                tree[parent] += tree[index]
+        self._tree = tree
+
+
+def week_start(date_str: str) -> str:
+    """Return the Monday of the week containing ``date_str``."""
+    day = date.fromisoformat(date_str)
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+class Leaderboards:
+    """All-time, weekly and daily XP boards."""
+
+    def __init__(self, today: str) -> None:
+        self.all = XpBoard()
+        self._week_key = week_start(today)
+        self._day_key = today
+        self.week = XpBoard()
+        self.day = XpBoard()
+
+    @classmethod
+    def load(
+        cls,
+        today: str,
+        totals: Iterable[tuple[int, int]],
+        daily: Iterable[tuple[int, str, int]],
+    ) -> "Leaderboards":
+        """Build the boards from all-time ``(user_id, xp)`` and ``(user_id, date, xp)`` day rows."""
+        boards = cls(today)
+        boards.all = XpBoard.from_totals(totals)
+        for user_id, date_str, xp in daily:
+            if date_str >= boards._week_key:
+                boards.week.add(user_id, xp)
+            if date_str == today:
+                boards.day.add(user_id, xp)
+        return boards
+
+    def add(self, user_id: int, amount: int, today: str) -> None:
+        """Record an XP award made on ``today``."""
+        self.roll(today)
+        self.all.add(user_id, amount)
+        self.week.add(user_id, amount)
+        self.day.add(user_id, amount)
+
+    def roll(self, today: str) -> bool:
+        """Start fresh daily and weekly boards once their window has passed.
+
+        Returns True when a new week has started.
+        """
+        if today != self._day_key:
+            self._day_key = today
+            self.day = XpBoard()
+            week_key = week_start(today)
+            if week_key != self._week_key:
+                self._week_key = week_key
+                self.week = XpBoard()
+                return True
+        return False
+
+    def board(self, window: str, today: str) -> XpBoard:
+        """Return the board for ``"all"``, ``"week"`` or ``"day"``."""
+        self.roll(today)
+        return getattr(self, window)
@@ -0,0 +1,139 @@
+### FILE: loop_watchdog.py
+"""Event-loop stall detector that names the code holding the loop.
+
+A heartbeat task stamps the time every ``interval``; a daemon thread checks
+the stamp every ``sample_interval`` and, while it is older than
+``threshold``, samples the event-loop thread's stack with
+``sys._current_frames()``. When the loop wakes up again the heartbeat logs
+the stall's length with the handler, ``db`` function and innermost project
+frame seen most often in the samples. Between stalls the thread only reads a
+float, so it is cheap enough to leave on.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from types import FrameType
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__)) + os.sep
+_HANDLERS_DIR = os.path.join(_PROJECT_ROOT, "handlers") + os.sep
+_DB_FILE = os.path.join(_PROJECT_ROOT, "db.py")
+_THIS_FILE = os.path.abspath(__file__)
+
+# (handler, db function, innermost project frame); any may be None.
+Site = tuple[str | None, str | None, str | None]
+
+
+def describe_stack(frame: FrameType | None) -> Site:
+    """Attribute a stack, innermost frame first, to its handler, ``db`` call and project frame."""
+    handler = db_function = site = None
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        if filename.startswith(_PROJECT_ROOT) and filename != _THIS_FILE:
+            if site is None:
+                site = f"{os.path.relpath(filename, _PROJECT_ROOT)}:{frame.f_lineno} {code.co_name}"
+            if filename == _DB_FILE:
+                # Keep walking: the outermost db frame is the public entry point.
+                db_function = f"db.{code.co_name}"
+            elif handler is None and filename.startswith(_HANDLERS_DIR):
+                module = os.path.splitext(os.path.basename(filename))[0]
+                handler = f"{module}.{code.co_name}"
+        frame = frame.f_back
+    return handler, db_function, site
+
+
+class LoopWatchdog:
+    """Heartbeat task plus sampling thread; see the module docstring."""
+
+    def __init__(self, threshold_ms: int = 100, interval_ms: int = 50, sample_ms: int = 50) -> None:
+        self._threshold = threshold_ms / 1000
+        self._interval = interval_ms / 1000
+        self._sample_interval = sample_ms / 1000
+        self._lock = threading.Lock()
+        self._samples: Counter[Site] = Counter()
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+        self.stalls = 0
+        self.longest_ms = 0.0
+        self.recent: deque[dict] = deque(maxlen=20)
+
+    def start(self) -> None:
+        """Start the heartbeat and the sampling thread; must run inside the event loop."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-watchdog")
+        self._thread = threading.Thread(target=self._sample_loop, name="loop-watchdog-sampler", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and the sampling thread."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        logger.info("Loop watchdog stopped: %s", self.stats())
+
+    def stats(self) -> dict[str, float]:
+        """Return the stall count and the longest stall seen."""
+        return {"stalls": self.stalls, "longest_ms": round(self.longest_ms, 1)}
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self._interval
+            await asyncio.sleep(self._interval)
+            lag = loop.time() - scheduled
+            self._last_beat = time.monotonic()
+            with self._lock:
+                samples, self._samples = self._samples, Counter()
+            if lag >= self._threshold:
+                self._report(lag, samples)
+
+    def _report(self, lag: float, samples: Counter[Site]) -> None:
+        handler, db_function, site = samples.most_common(1)[0][0] if samples else (None, None, None)
+        lag_ms = lag * 1000
+        self.stalls += 1
+        self.longest_ms = max(self.longest_ms, lag_ms)
+        self.recent.append(
+            {"lag_ms": round(lag_ms, 1), "handler": handler, "db": db_function, "site": site,
+             "samples": sum(samples.values())}
+        )
+        metrics.LOOP_STALLS.inc(handler or "unknown", db_function or "none")
+        logger.warning(
+            "Event loop blocked for %.0f ms: handler=%s db=%s at %s (%s samples)",
+            lag_ms, handler or "-", db_function or "-", site or "unknown", sum(samples.values()),
+        )
+
+    def _sample_loop(self) -> None:
+        while not self._stopped.wait(self._sample_interval):
+            if time.monotonic() - self._last_beat < self._threshold + self._interval:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            site = describe_stack(frame)
+            del frame
+            with self._lock:
+                self._samples[site] += 1
@@ -0,0 +1,305 @@
+### FILE: metrics.py
+"""Process metrics in the Prometheus text format, served on a local port.
+
+A tiny registry of counters, gauges and histograms, so the bot needs no extra
+dependency. Counters and histograms may be updated from any thread (the SQL
+timings come from the database thread); callback gauges are read when
+``/metrics`` is scraped. :func:`start_metrics_server` exposes the registry
+over HTTP and :func:`monitor_loop_lag` feeds the event-loop lag gauge.
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import bisect
+import logging
+import re
+import threading
+from typing import Any, Callable, Sequence
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HANDLER_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 0.5, 1.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abc.abstractmethod
+    def samples(self) -> list[str]:
+        """Return the exposition lines for every label set."""
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Add ``amount`` to the counter for ``labels``."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values)
+        ]
+
+
+class Gauge(_Metric):
+    """Point-in-time value, either set directly or read from a callback on scrape."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        func: Callable[[], float] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._func = func
+
+    def set(self, value: float, *labels: str) -> None:
+        """Set the gauge for ``labels``."""
+        with self._lock:
+            self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> list[str]:
+        if self._func is not None:
+            try:
+                return [f"{self.name} {_format_value(self._func())}"]
+            except Exception:
+                logger.exception("Gauge %s callback failed", self.name)
+                return []
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values)
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = HANDLER_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._series: dict[tuple[str, ...], list[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record one observation for ``labels``."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        lines = []
+        for labels, counts, total in sorted(snapshot):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add ``metric``, replacing any earlier one with the same name."""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name: str) -> None:
+        self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines: list[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HANDLER_SECONDS = REGISTRY.register(
+    Histogram(
+        "sozmaster_handler_seconds",
+        "Time spent handling one update, by router and handler.",
+        ("router", "handler"),
+        HANDLER_BUCKETS,
+    )
+)
+HANDLER_ERRORS = REGISTRY.register(
+    Counter(
+        "sozmaster_handler_errors_total",
+        "Updates whose handler raised, by router and handler.",
+        ("router", "handler"),
+    )
+)
+SQL_SECONDS = REGISTRY.register(
+    Histogram(
+        "sozmaster_sql_seconds",
+        "Time spent executing SQL statements (excluding row fetches), by query.",
+        ("query",),
+        SQL_BUCKETS,
+    )
+)
+LOOP_LAG = REGISTRY.register(
+    Gauge("sozmaster_event_loop_lag_seconds", "Delay of the last event-loop lag probe beyond its sleep.")
+)
+LOOP_LAG_SECONDS = REGISTRY.register(
+    Histogram("sozmaster_event_loop_lag_probe_seconds", "Event-loop lag probe delays.", (), LAG_BUCKETS)
+)
+
+LOOP_STALLS = REGISTRY.register(
+    Counter(
+        "sozmaster_event_loop_stalls_total",
+        "Event-loop stalls caught by the watchdog, by blocking handler and db function.",
+        ("handler", "db"),
+    )
+)
+
+
+def register_gauge(name: str, documentation: str, func: Callable[[], float]) -> None:
+    """Expose ``func()`` as a gauge read on every scrape (e.g. a queue depth)."""
+    REGISTRY.register(Gauge(name, documentation, func=func))
+
+
+# --------------------------------------------------------------------- SQL
+_SQL_VERB = re.compile(r"\s*(\w+)", re.ASCII)
+_SQL_TABLE = re.compile(
+    r"\b(?:FROM|INTO|UPDATE|TABLE(?:\s+IF\s+(?:NOT\s+)?EXISTS)?|INDEX(?:\s+IF\s+NOT\s+EXISTS)?\s+\w+\s+ON)\s+(\w+)",
+    re.I,
+)
+_sql_labels: dict[str, str] = {}
+_SQL_LABEL_CACHE_SIZE = 4096
+
+
+def sql_label(sql: str) -> str:
+    """Return a low-cardinality label for a statement, e.g. ``"SELECT users"``.
+
+    Built from the leading keyword and the first table it touches, so queries
+    that differ only in literals or ``IN (...)`` lengths share one series.
+    """
+    label = _sql_labels.get(sql)
+    if label is None:
+        verb = _SQL_VERB.match(sql)
+        label = verb.group(1).upper() if verb else "OTHER"
+        table = _SQL_TABLE.search(sql)
+        if table:
+            label = f"{label} {table.group(1).lower()}"
+        if len(_sql_labels) >= _SQL_LABEL_CACHE_SIZE:
+            _sql_labels.clear()
+        _sql_labels[sql] = label
+    return label
+
+
+def observe_statement(sql: str, parameters: Any, seconds: float) -> None:
+    """Statement observer for :func:`db.add_statement_observer`."""
+    SQL_SECONDS.observe(seconds, sql_label(sql))
+
+
+# -------------------------------------------------------------- event loop
+async def monitor_loop_lag(interval: float = 0.5) -> None:
+    """Sleep ``interval`` in a loop and record how late each wake-up was."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(loop.time() - start - interval, 0.0)
+        LOOP_LAG.set(lag)
+        LOOP_LAG_SECONDS.observe(lag)
+
+
+# ------------------------------------------------------------------ server
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(body=REGISTRY.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Serve ``GET /metrics`` on ``host:port``; call ``cleanup()`` on the runner to stop."""
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Metrics on http://%s:%s/metrics", host, port)
+    return runner
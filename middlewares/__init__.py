@@ -0,0 +1,2 @@
+### FILE: middlewares/__init__.py
+"""Dispatcher and session middlewares for SozMaster AI."""
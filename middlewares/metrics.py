@@ -0,0 +1,73 @@
+### FILE: middlewares/metrics.py
+"""Per-router and per-handler latency and error metrics.
+
+:class:`HandlerMetricsMiddleware` wraps each update as an outer ``update``
+middleware installed after the user scheduler, so it times the handler run
+itself rather than the queue wait. Which handler ran is only known deeper in
+the dispatch, so :class:`HandlerLabelMiddleware`, an inner middleware on the
+message and callback observers, writes the router and handler names into a
+slot the outer middleware reads when the update finishes.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject
+
+import metrics
+
+_LABELS_KEY = "metrics_labels"
+UNHANDLED = ("none", "unhandled")
+
+
+def handler_labels(callback: Callable[..., Any]) -> tuple[str, str]:
+    """Return ``(router, handler)`` labels, e.g. ``("quiz", "cb_quiz_answer")``."""
+    module = getattr(callback, "__module__", "") or ""
+    router = module.rsplit(".", 1)[-1].removesuffix("_handler") or "unknown"
+    return router, getattr(callback, "__name__", "unknown")
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Observe handler latency and count handler errors for every update."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        labels = data[_LABELS_KEY] = list(UNHANDLED)
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            metrics.HANDLER_ERRORS.inc(*labels)
+            raise
+        finally:
+            metrics.HANDLER_SECONDS.observe(time.perf_counter() - start, *labels)
+
+
+class HandlerLabelMiddleware(BaseMiddleware):
+    """Record which router and handler is about to run."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        labels = data.get(_LABELS_KEY)
+        handler_object = data.get("handler")
+        if labels is not None and handler_object is not None:
+            labels[:] = handler_labels(handler_object.callback)
+        return await handler(event, data)
+
+
+def install_metrics_middleware(dp: Dispatcher) -> None:
+    """Attach both middlewares; call after the user scheduler is installed."""
+    dp.update.outer_middleware(HandlerMetricsMiddleware())
+    label_middleware = HandlerLabelMiddleware()
+    dp.message.middleware(label_middleware)
+    dp.callback_query.middleware(label_middleware)
@@ -0,0 +1,319 @@
+### FILE: middlewares/send_queue.py
+"""Rate-limit-aware outbound queue for Bot API calls.
+
+:class:`OutboundSendQueue` is a session request middleware. Message-producing
+calls (``send*``, ``edit*``, ``copyMessage``, ``forwardMessage``) are queued
+and released under a global token bucket and per-chat token buckets, so the
+bot stays under Telegram's flood limits instead of hitting them. Other calls
+(``answerCallbackQuery``, ``getUpdates``, ...) pass straight through.
+
+* Priority lanes: interactive traffic (the default) always goes before bulk
+  traffic sent inside ``with send_priority(PRIORITY_BULK)``.
+* ``retry_after``: a 429 pauses the affected chat for the requested time and
+  the call is retried; pass-through calls simply sleep and retry.
+* Coalescing: a queued ``editMessageText`` for a message is replaced by a
+  newer edit of the same message; every caller gets the final result.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+_QUEUED_PREFIXES = ("send", "edit", "copyMessage", "forwardMessage")
+_SCAN_LIMIT = 256
+
+_priority: ContextVar[int] = ContextVar("send_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def send_priority(priority: int) -> Iterator[None]:
+    """Send every Bot API call made inside the block with the given priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Classic token bucket that can also be paused until a point in time."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 if available now)."""
+        self._refill(now)
+        blocked = max(0.0, self.blocked_until - now)
+        missing = max(0.0, 1 - self.tokens) / self.rate
+        return max(blocked, missing)
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, now: float, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    def is_idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst and self.blocked_until <= now
+
+
+class _Item:
+    __slots__ = ("method", "make_request", "bot", "chat_id", "priority", "futures", "attempts", "coalesce_key")
+
+    def __init__(
+        self,
+        method: TelegramMethod[Any],
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        chat_id: int | str,
+        priority: int,
+        coalesce_key: tuple | None,
+    ) -> None:
+        self.method = method
+        self.make_request = make_request
+        self.bot = bot
+        self.chat_id = chat_id
+        self.priority = priority
+        self.coalesce_key = coalesce_key
+        self.futures: list[asyncio.Future] = [asyncio.get_running_loop().create_future()]
+        self.attempts = 0
+
+
+class OutboundSendQueue(BaseRequestMiddleware):
+    """Session middleware that paces message sends under Telegram's limits."""
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        global_burst: float = 1.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        group_rate: float = 20 / 60,
+        max_retries: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._clock = clock
+        self._global = TokenBucket(global_rate, global_burst, clock())
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._group_rate = group_rate
+        self._max_retries = max_retries
+        self._chats: dict[int | str, TokenBucket] = {}
+        self._lanes: tuple[deque[_Item], deque[_Item]] = (deque(), deque())
+        self._edits: dict[tuple, _Item] = {}
+        self._wakeup = asyncio.Event()
+        self._pump_task: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+        self.sent = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Any:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None or not method.__api_method__.startswith(_QUEUED_PREFIXES):
+            return await self._call_direct(make_request, bot, method)
+
+        coalesce_key = None
+        if method.__api_method__ == "editMessageText" and getattr(method, "message_id", None):
+            coalesce_key = (chat_id, method.message_id)
+            pending = self._edits.get(coalesce_key)
+            if pending is not None:
+                pending.method = method
+                future = asyncio.get_running_loop().create_future()
+                pending.futures.append(future)
+                self.coalesced += 1
+                return await future
+
+        item = _Item(method, make_request, bot, chat_id, _priority.get(), coalesce_key)
+        if coalesce_key is not None:
+            self._edits[coalesce_key] = item
+        self._lanes[min(item.priority, PRIORITY_BULK)].append(item)
+        self._ensure_pump()
+        self._wakeup.set()
+        return await item.futures[0]
+
+    def stats(self) -> dict[str, int]:
+        """Return queue depth and delivery counters."""
+        return {
+            "queued_interactive": len(self._lanes[PRIORITY_INTERACTIVE]),
+            "queued_bulk": len(self._lanes[PRIORITY_BULK]),
+            "inflight": len(self._inflight),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+    async def close(self) -> None:
+        """Stop the pump; queued calls fail with ``CancelledError``."""
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            await asyncio.gather(self._pump_task, return_exceptions=True)
+            self._pump_task = None
+        for lane in self._lanes:
+            while lane:
+                for future in lane.popleft().futures:
+                    future.cancel()
+        self._edits.clear()
+
+    # ---------------------------------------------------------------- internal
+    async def _call_direct(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Any:
+        attempts = 0
+        while True:
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as exc:
+                attempts += 1
+                if attempts > self._max_retries:
+                    raise
+                self.retried += 1
+                await asyncio.sleep(exc.retry_after)
+
+    def _chat_bucket(self, chat_id: int | str, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 10000:
+                self._chats = {key: value for key, value in self._chats.items() if not value.is_idle(now)}
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self._group_rate if is_group else self._chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, self._chat_burst, now)
+        return bucket
+
+    def _ensure_pump(self) -> None:
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump(), name="outbound-send-queue")
+
+    def _next_ready(self, now: float) -> tuple[_Item | None, float]:
+        """Pop the highest-priority item whose chat may send now.
+
+        Returns ``(None, wait)`` with the shortest wait until something could
+        become sendable when nothing is ready.
+        """
+        shortest = float("inf")
+        for lane in self._lanes:
+            for position, item in enumerate(lane):
+                if position >= _SCAN_LIMIT:
+                    break
+                if all(future.done() for future in item.futures):
+                    # Every caller gave up (e.g. a cancelled broadcast); drop it.
+                    del lane[position]
+                    if item.coalesce_key is not None and self._edits.get(item.coalesce_key) is item:
+                        del self._edits[item.coalesce_key]
+                    return None, 0.0
+                wait = self._chat_bucket(item.chat_id, now).wait_time(now)
+                if wait <= 0:
+                    del lane[position]
+                    return item, 0.0
+                shortest = min(shortest, wait)
+        return None, shortest
+
+    async def _pump(self) -> None:
+        while True:
+            if not any(self._lanes):
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = self._clock()
+            global_wait = self._global.wait_time(now)
+            if global_wait > 0:
+                await asyncio.sleep(global_wait)
+                continue
+
+            item, wait = self._next_ready(now)
+            if item is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._global.take(now)
+            self._chat_bucket(item.chat_id, now).take(now)
+            if item.coalesce_key is not None and self._edits.get(item.coalesce_key) is item:
+                del self._edits[item.coalesce_key]
+            task = asyncio.create_task(self._execute(item))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _execute(self, item: _Item) -> None:
+        try:
+            result = await item.make_request(item.bot, item.method)
+        except TelegramRetryAfter as exc:
+            item.attempts += 1
+            if item.attempts > self._max_retries:
+                self.failed += 1
+                self._resolve(item, exc=exc)
+                return
+            self.retried += 1
+            logger.warning("Flood limit for chat %s, retrying in %ss", item.chat_id, exc.retry_after)
+            now = self._clock()
+            self._chat_bucket(item.chat_id, now).block(now, exc.retry_after)
+            newer = self._edits.get(item.coalesce_key) if item.coalesce_key is not None else None
+            if newer is not None:
+                # A newer edit of the same message is already queued; let it win.
+                newer.futures.extend(item.futures)
+                self.coalesced += 1
+                return
+            if item.coalesce_key is not None:
+                self._edits[item.coalesce_key] = item
+            self._lanes[min(item.priority, PRIORITY_BULK)].appendleft(item)
+            self._wakeup.set()
+        except Exception as exc:
+            self.failed += 1
+            self._resolve(item, exc=exc)
+        else:
+            self.sent += 1
+            self._resolve(item, result=result)
+
+    @staticmethod
+    def _resolve(item: _Item, result: Any = None, exc: BaseException | None = None) -> None:
+        for future in item.futures:
+            if future.done():
+                continue
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
@@ -0,0 +1,147 @@
+### FILE: middlewares/user_scheduler.py
+"""Per-user ordered, cross-user concurrent update execution.
+
+Installed as an outer ``update`` middleware, :class:`UserSchedulerMiddleware`
+puts each update on a FIFO queue for the user who sent it and returns at
+once. A shared pool of workers drains the queues: one user's updates run
+strictly one after another, while different users' updates run in parallel.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[Any]]
+
+
+class UserSchedulerMiddleware(BaseMiddleware):
+    """Shard updates into bounded per-user queues drained by worker tasks.
+
+    ``max_user_depth`` caps how many updates one user may have queued; extra
+    updates from that user are dropped. ``max_pending`` caps updates queued
+    across all users: when it is reached, :meth:`submit` waits, which stalls
+    polling or fills the webhook queue until workers catch up.
+    """
+
+    def __init__(self, workers: int = 64, max_user_depth: int = 20, max_pending: int = 10000) -> None:
+        self._worker_count = workers
+        self._max_user_depth = max_user_depth
+        self._capacity = asyncio.Semaphore(max_pending)
+        self._queues: dict[Hashable, deque[tuple[float, contextvars.Context, Job]]] = {}
+        self._ready: asyncio.Queue[Hashable] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        self.pending = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is not None:
+            key: Hashable = user.id
+        elif isinstance(event, Update):
+            key = ("update", event.update_id)
+        else:
+            key = ("event", id(event))
+        await self.submit(key, lambda: handler(event, data))
+        return None
+
+    async def submit(self, key: Hashable, job: Job) -> bool:
+        """Queue ``job`` behind earlier jobs with the same key.
+
+        Returns ``False`` if the job was dropped because that key's queue is full.
+        """
+        self._ensure_started()
+        queue = self._queues.get(key)
+        if queue is not None and len(queue) >= self._max_user_depth:
+            self.dropped += 1
+            logger.warning("Dropping update for %s: %s updates already queued", key, len(queue))
+            return False
+
+        await self._capacity.acquire()
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            self._ready.put_nowait(key)
+        queue.append((time.perf_counter(), contextvars.copy_context(), job))
+        self.pending += 1
+        self._idle.clear()
+        return True
+
+    def stats(self) -> dict[str, float]:
+        """Return queue depth, throughput and queue wait counters."""
+        return {
+            "pending": self.pending,
+            "active_users": len(self._queues),
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "wait_seconds_avg": self.wait_seconds_total / self.processed if self.processed else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+    async def join(self) -> None:
+        """Wait until every queued update has been handled."""
+        await self._idle.wait()
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        """Let queued updates finish, then stop the workers."""
+        try:
+            await asyncio.wait_for(self.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Dropping %s queued updates on shutdown", self.pending)
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("User scheduler stopped: %s", self.stats())
+
+    def _ensure_started(self) -> None:
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"user-scheduler-{index}")
+                for index in range(self._worker_count)
+            ]
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            queue = self._queues[key]
+            enqueued_at, context, job = queue.popleft()
+            wait = time.perf_counter() - enqueued_at
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            try:
+                await asyncio.create_task(job(), context=context)
+            except Exception:
+                self.failed += 1
+                logger.exception("Update handler for %s failed", key)
+            finally:
+                self.processed += 1
+                self.pending -= 1
+                self._capacity.release()
+                if queue:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._queues[key]
+                if not self.pending:
+                    self._idle.set()
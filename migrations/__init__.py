@@ -0,0 +1,2 @@
+### FILE: migrations/__init__.py
+"""Versioned schema migrations for SozMaster AI (see ``migrations.runner``)."""
@@ -0,0 +1,31 @@
+### FILE: migrations/m001_performance_indexes.py
+"""Add indexes for XP ranking, premium lookups and per-date queries.
+
+``users(xp)`` serves leaderboard loads (``init_db`` already creates it on
+new databases), ``users(premium_until)`` the premium-only weekly report
+pages, and the ``date`` indexes let per-day queries (retention cleanups,
+daily counts) find a day's rows without scanning every user's rows.
+"""
+from __future__ import annotations
+
+import sqlite3
+
+from migrations.runner import create_index, estimate_index
+
+VERSION = 1
+
+INDEXES = (
+    ("idx_users_xp", "users", "xp"),
+    ("idx_users_premium_until", "users", "premium_until"),
+    ("idx_user_daily_words_date", "user_daily_words", "date"),
+    ("idx_quiz_progress_date", "quiz_progress", "date"),
+)
+
+
+def estimate(conn: sqlite3.Connection) -> list[tuple[str, int]]:
+    return [estimate_index(conn, name, table) for name, table, _ in INDEXES]
+
+
+def apply(conn: sqlite3.Connection, batch_size: int, pause: float) -> int:
+    # One transaction per index, so writers only wait for one build at a time.
+    return sum(create_index(conn, name, table, columns) for name, table, columns in INDEXES)
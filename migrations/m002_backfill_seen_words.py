@@ -0,0 +1,63 @@
+### FILE: migrations/m002_backfill_seen_words.py
+"""Backfill seen-word bitsets from daily word history.
+
+Seen bits are only set for words assigned since the bitsets were added, so
+long-time users were being offered words they had already learned. This
+ORs every word from the user's past assignments (precomputed sets not yet
+shown are skipped) into ``users.seen_words``. ORing is idempotent, so an
+interrupted run simply resumes.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+
+from migrations.runner import backfill, count_rows
+from utils.word_bits import bits_from_blob, bits_to_blob, mask_of
+from utils.word_ids import WORD_ID_BY_TEXT, unpack_word_ids
+
+VERSION = 2
+
+
+def _row_word_ids(row: dict) -> list[int]:
+    if row["word_ids"] is not None:
+        return unpack_word_ids(row["word_ids"])
+    try:
+        words = json.loads(row["words_json"] or "[]")
+    except ValueError:
+        return []
+    return [WORD_ID_BY_TEXT[word["word"]] for word in words if word.get("word") in WORD_ID_BY_TEXT]
+
+
+def _merge_batch(cur: sqlite3.Cursor, user_ids: list[int]) -> int:
+    placeholders = ",".join("?" * len(user_ids))
+    history: dict[int, int] = {}
+    cur.execute(
+        f"""
+        SELECT user_id, word_ids, words_json FROM user_daily_words
+        WHERE user_id IN ({placeholders}) AND planned_premium IS NULL
+        """,
+        user_ids,
+    )
+    for row in cur.fetchall():
+        history[row["user_id"]] = history.get(row["user_id"], 0) | mask_of(_row_word_ids(row))
+    cur.execute(f"SELECT user_id, seen_words FROM users WHERE user_id IN ({placeholders})", user_ids)
+    updates = []
+    for row in cur.fetchall():
+        old = bits_from_blob(row["seen_words"])
+        new = old | history.get(row["user_id"], 0)
+        if new != old:
+            updates.append((bits_to_blob(new), row["user_id"]))
+    cur.executemany("UPDATE users SET seen_words = ? WHERE user_id = ?", updates)
+    return len(updates)
+
+
+def estimate(conn: sqlite3.Connection) -> list[tuple[str, int]]:
+    return [
+        ("read daily word history", count_rows(conn, "user_daily_words", "planned_premium IS NULL")),
+        ("merge into users.seen_words (upper bound)", count_rows(conn, "users")),
+    ]
+
+
+def apply(conn: sqlite3.Connection, batch_size: int, pause: float) -> int:
+    return backfill(conn, "users", _merge_batch, batch_size, pause)
@@ -0,0 +1,199 @@
+### FILE: migrations/runner.py
+"""Apply ordered schema migrations to a live database.
+
+``db.init_db`` still creates missing tables; everything that must change an
+existing database (indexes on large tables, backfills, new column layouts)
+is a migration module in this package named ``m<version>_<name>.py`` with:
+
+* ``VERSION`` (int) and a docstring whose first line names the migration;
+* ``estimate(conn) -> list[tuple[str, int]]``: each step and the rows it
+  would touch, without writing anything (used by ``--dry-run``);
+* ``apply(conn, batch_size, pause) -> int``: run it, returning rows touched.
+
+Applied versions are recorded in ``schema_migrations`` once a migration
+finishes, so one interrupted half way runs again from the start next time
+and must be safe to repeat (idempotent updates). To stay online, long steps are split into short write
+transactions (:func:`backfill`) with a pause between them so the bot's own
+writes get the lock. SQLite has no in-place column type change; instead add
+a new column, backfill it in batches, switch the code over, then stop
+using the old one.
+
+``python -m scripts.migrate`` is the command-line entry point.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import pkgutil
+import re
+import sqlite3
+import time
+from types import ModuleType
+from typing import Callable
+
+from utils.time import now_utc_iso
+
+logger = logging.getLogger(__name__)
+
+_MODULE_NAME = re.compile(r"^m(\d+)_\w+$")
+
+# (cursor, rowids of one batch) -> rows changed
+BatchFunc = Callable[[sqlite3.Cursor, list[int]], int]
+
+
+def discover() -> list[ModuleType]:
+    """Import every migration module, ordered by version."""
+    package = importlib.import_module("migrations")
+    modules = []
+    for info in pkgutil.iter_modules(package.__path__):
+        match = _MODULE_NAME.match(info.name)
+        if match:
+            module = importlib.import_module(f"migrations.{info.name}")
+            if module.VERSION != int(match.group(1)):
+                raise ValueError(f"{info.name}: VERSION {module.VERSION} does not match the file name")
+            modules.append(module)
+    modules.sort(key=lambda module: module.VERSION)
+    versions = [module.VERSION for module in modules]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions: {versions}")
+    return modules
+
+
+def describe(module: ModuleType) -> str:
+    """Return the migration's one-line name."""
+    return (module.__doc__ or module.__name__).strip().splitlines()[0].rstrip(".")
+
+
+def ensure_version_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL,
+            rows_touched INTEGER NOT NULL,
+            seconds REAL NOT NULL
+        )
+        """
+    )
+    conn.commit()
+
+
+def applied_versions(conn: sqlite3.Connection) -> set[int]:
+    """Return the versions already applied (none if the version table is missing)."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'"
+    ).fetchone()
+    if not exists:
+        return set()
+    return {row["version"] for row in conn.execute("SELECT version FROM schema_migrations")}
+
+
+def pending(conn: sqlite3.Connection, target: int | None = None) -> list[ModuleType]:
+    """Return migrations not yet applied, up to ``target`` if given."""
+    done = applied_versions(conn)
+    return [
+        module
+        for module in discover()
+        if module.VERSION not in done and (target is None or module.VERSION <= target)
+    ]
+
+
+def estimate(conn: sqlite3.Connection, target: int | None = None) -> list[tuple[ModuleType, list[tuple[str, int]]]]:
+    """Return each pending migration with the steps it would run and rows each touches."""
+    return [(module, module.estimate(conn)) for module in pending(conn, target)]
+
+
+def migrate(
+    conn: sqlite3.Connection,
+    target: int | None = None,
+    batch_size: int = 500,
+    pause: float = 0.05,
+) -> list[tuple[ModuleType, int, float]]:
+    """Apply pending migrations in order; return ``(module, rows touched, seconds)`` for each."""
+    ensure_version_table(conn)
+    results = []
+    for module in pending(conn, target):
+        logger.info("Applying migration %s: %s", module.VERSION, describe(module))
+        start = time.perf_counter()
+        rows = module.apply(conn, batch_size, pause)
+        seconds = time.perf_counter() - start
+        conn.execute(
+            "INSERT INTO schema_migrations (version, name, applied_at, rows_touched, seconds) VALUES (?, ?, ?, ?, ?)",
+            (module.VERSION, describe(module), now_utc_iso(), rows, round(seconds, 3)),
+        )
+        conn.commit()
+        results.append((module, rows, seconds))
+    return results
+
+
+# ------------------------------------------------------------------ helpers
+def index_exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+
+def count_rows(conn: sqlite3.Connection, table: str, where: str = "1", params: tuple = ()) -> int:
+    return conn.execute(f"SELECT COUNT(*) AS n FROM {table} WHERE {where}", params).fetchone()["n"]
+
+
+def estimate_index(conn: sqlite3.Connection, name: str, table: str) -> tuple[str, int]:
+    """Dry-run step for :func:`create_index`: the rows the build would read."""
+    if index_exists(conn, name):
+        return f"index {name} exists", 0
+    return f"build index {name} on {table}", count_rows(conn, table)
+
+
+def create_index(conn: sqlite3.Connection, name: str, table: str, columns: str) -> int:
+    """Create one index in its own transaction; return rows indexed (0 if it existed).
+
+    SQLite builds an index in a single write transaction: readers carry on
+    (WAL), writers wait up to the busy timeout. Check ``--dry-run`` row counts
+    and build indexes on very large tables off-peak.
+    """
+    if index_exists(conn, name):
+        return 0
+    rows = count_rows(conn, table)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+    conn.commit()
+    return rows
+
+
+def backfill(
+    conn: sqlite3.Connection,
+    table: str,
+    process: BatchFunc,
+    batch_size: int,
+    pause: float,
+    where: str = "1",
+) -> int:
+    """Walk ``table`` in rowid order, ``batch_size`` rows per short write transaction.
+
+    ``process`` gets the batch's rowids inside ``BEGIN IMMEDIATE`` and must
+    re-read what it changes there, since the bot keeps writing between
+    batches. Sleeping ``pause`` seconds after each commit gives the bot's
+    own writes the lock. Returns the rows ``process`` reports as changed.
+    """
+    touched = 0
+    last = -1
+    while True:
+        rowids = [
+            row["rid"]
+            for row in conn.execute(
+                f"SELECT rowid AS rid FROM {table} WHERE rowid > ? AND ({where}) ORDER BY rowid LIMIT ?",
+                (last, batch_size),
+            )
+        ]
+        if not rowids:
+            return touched
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            touched += process(cur, rowids)
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        last = rowids[-1]
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,2 @@
+### FILE: scripts/__init__.py
+"""Maintenance scripts for SozMaster AI."""
@@ -0,0 +1,56 @@
+### FILE: scripts/compact_daily_words.py
+"""Convert stored daily word assignments to packed word ids and report the size.
+
+Usage::
+
+    python -m scripts.compact_daily_words [--batch-size 500] [--no-vacuum]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+
+import db
+
+
+def _database_size() -> tuple[int, int]:
+    """Return ``(file bytes, bytes used by user_daily_words)``."""
+    with db.get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("PRAGMA page_count")
+        pages = cur.fetchone()["page_count"]
+        cur.execute("PRAGMA page_size")
+        page_size = cur.fetchone()["page_size"]
+        cur.execute(
+            """
+            SELECT COALESCE(SUM(LENGTH(words_json)), 0) + COALESCE(SUM(LENGTH(word_ids)), 0) AS payload
+            FROM user_daily_words
+            """
+        )
+        payload = cur.fetchone()["payload"]
+    return pages * page_size, payload
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--no-vacuum", action="store_true", help="skip VACUUM after converting")
+    args = parser.parse_args()
+
+    db.init_db()
+    file_before, payload_before = _database_size()
+    converted, skipped = db.migrate_daily_words_to_ids(batch_size=args.batch_size)
+    if not args.no_vacuum:
+        with db.get_connection() as conn:
+            conn.execute("VACUUM")
+    file_after, payload_after = _database_size()
+
+    print(f"Database: {os.path.abspath(db.DB_PATH)}")
+    print(f"Rows converted: {converted}, left as JSON: {skipped}")
+    print(f"user_daily_words payload: {payload_before:,} B -> {payload_after:,} B")
+    print(f"Database file:            {file_before:,} B -> {file_after:,} B")
+    db.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+### FILE: scripts/migrate.py
+"""Apply pending schema migrations, or show what they would touch.
+
+Safe to run while the bot is up: backfills commit every ``--batch-size``
+rows and pause ``--pause-ms`` between batches so the bot's writes get
+through.
+
+Usage::
+
+    python -m scripts.migrate [--dry-run] [--status] [--target N] [--batch-size 500] [--pause-ms 50]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sqlite3
+
+import db
+from migrations import runner
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="estimate rows touched without writing")
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    parser.add_argument("--target", type=int, help="stop after this version")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per backfill transaction")
+    parser.add_argument("--pause-ms", type=int, default=50, help="sleep between backfill batches")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+
+    print(f"Database: {os.path.abspath(db.DB_PATH)}")
+    with db.get_connection() as conn:
+        if args.status:
+            done = runner.applied_versions(conn)
+            for module in runner.discover():
+                state = "applied" if module.VERSION in done else "pending"
+                print(f"  {module.VERSION:>4}  {state:<8} {runner.describe(module)}")
+        elif args.dry_run:
+            plans = runner.estimate(conn, args.target)
+            if not plans:
+                print("No pending migrations.")
+            for module, steps in plans:
+                print(f"  {module.VERSION:>4}  {runner.describe(module)}")
+                for step, rows in steps:
+                    print(f"        {step}: {rows:,} rows")
+        else:
+            # Make sure every table exists before altering it.
+            db.init_db()
+            results = runner.migrate(conn, args.target, args.batch_size, args.pause_ms / 1000)
+            if not results:
+                print("No pending migrations.")
+            for module, rows, seconds in results:
+                print(f"  {module.VERSION:>4}  {runner.describe(module)}: {rows:,} rows in {seconds:.1f} s")
+    db.close_connections()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except sqlite3.OperationalError as exc:
+        raise SystemExit(f"Migration failed: {exc}") from exc
@@ -0,0 +1,98 @@
+### FILE: scripts/slow_queries.py
+"""Summarise the slow-query log, worst statements first.
+
+Entries are grouped by statement. Executions skipped by the log's rate limit
+count towards the total with the group's average duration, so the ranking
+reflects the time a statement costs overall, not just the logged samples.
+Full table scans are flagged with an index suggestion; columns are checked
+against the database schema when it is available.
+
+Usage::
+
+    python -m scripts.slow_queries [--log slow_queries.jsonl] [--top 10] [--db sozmaster.db]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+from collections import defaultdict
+
+import config
+from slow_query_log import suggest_index
+
+
+def load_groups(path: str) -> list[dict]:
+    """Read the JSON-lines log and return one summary per statement, worst first."""
+    groups: dict[str, dict] = defaultdict(
+        lambda: {"samples": 0, "executions": 0, "sample_ms": 0.0, "max_ms": 0.0, "params": set()}
+    )
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            group = groups[entry["sql"]]
+            group["sql"] = entry["sql"]
+            group["samples"] += 1
+            group["executions"] += 1 + entry.get("skipped", 0)
+            group["sample_ms"] += entry["ms"]
+            group["max_ms"] = max(group["max_ms"], entry["ms"])
+            group["params"].add(entry.get("params", ""))
+            group["plan"] = entry.get("plan")
+            group["full_scans"] = entry.get("full_scans", [])
+            group["last_at"] = entry.get("at")
+    summaries = []
+    for group in groups.values():
+        group["avg_ms"] = group["sample_ms"] / group["samples"]
+        group["total_ms"] = group["avg_ms"] * group["executions"]
+        summaries.append(group)
+    summaries.sort(key=lambda group: group["total_ms"], reverse=True)
+    return summaries
+
+
+def _table_columns(db_path: str) -> dict[str, set[str]]:
+    if not os.path.exists(db_path):
+        return {}
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        return {table: {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')} for table in tables}
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", default=config.SLOW_QUERY_LOG_PATH, help="slow-query log to read")
+    parser.add_argument("--top", type=int, default=10, help="statements to show")
+    parser.add_argument("--db", default=config.DB_PATH, help="database used to check suggested columns")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.log):
+        print(f"{args.log}: no slow queries recorded")
+        return
+    groups = load_groups(args.log)
+    columns = _table_columns(args.db)
+    print(f"{len(groups)} slow statements in {args.log}")
+    for rank, group in enumerate(groups[: args.top], start=1):
+        print(
+            f"\n#{rank}  ~{group['total_ms']:,.1f} ms total  {group['executions']} runs "
+            f"({group['samples']} logged)  avg {group['avg_ms']:.1f} ms  max {group['max_ms']:.1f} ms"
+        )
+        print(f"    {group['sql'][:300]}")
+        print(f"    params: {', '.join(sorted(group['params']))}")
+        if group["plan"]:
+            print(f"    plan:   {' | '.join(group['plan'])}")
+        for table in group["full_scans"]:
+            advice = suggest_index(group["sql"], table, columns.get(table))
+            print(f"    FULL SCAN of {table}" + (f" -> consider: {advice}" if advice else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+### FILE: services/answer_log_service.py
+"""Nightly compaction of the quiz answer log.
+
+Raw ``quiz_answers`` rows are kept for ``ANSWER_LOG_RETENTION_DAYS``; older
+ones are folded into per-word daily aggregates (``word_answer_stats``) and
+deleted. Per-user totals never need the raw rows, they are rolled up as the
+answers arrive. The job runs in short batches with a per-day checkpoint in
+``answer_log_compactions``; a run interrupted by a restart is resumed at
+startup.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import storage
+from srs import DAY_SECONDS
+from utils.clock import get_clock
+from utils.time import get_tashkent_date_str, seconds_until_local_hour
+
+logger = logging.getLogger(__name__)
+
+
+async def compact_answer_log(retention_days: int) -> int:
+    """Compact log rows older than ``retention_days``; return how many were folded."""
+    cutoff = get_clock().time() - retention_days * DAY_SECONDS
+    compacted = await storage.compact_answer_log(get_tashkent_date_str(), cutoff)
+    logger.info("Compacted %s answer log rows older than %s days", compacted, retention_days)
+    return compacted
+
+
+async def compaction_scheduler(hour: int, retention_days: int) -> None:
+    """Run :func:`compact_answer_log` every day at ``hour`` local time."""
+    run = await storage.get_answer_log_compaction(get_tashkent_date_str())
+    if run is not None and not run["finished_at"]:
+        # Interrupted today (e.g. by a restart): finish it now.
+        await _run_safely(retention_days)
+    while True:
+        await asyncio.sleep(seconds_until_local_hour(hour))
+        await _run_safely(retention_days)
+
+
+async def _run_safely(retention_days: int) -> None:
+    try:
+        await compact_answer_log(retention_days)
+    except Exception:
+        logger.exception("Answer log compaction failed")
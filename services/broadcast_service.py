@@ -0,0 +1,115 @@
+### FILE: services/broadcast_service.py
+"""Daily push of each user's word set.
+
+Users are walked in ``user_id`` order, one page per transaction: the page's
+words are assigned and the checkpoint in ``broadcast_runs`` is moved past it
+before any message is sent. A crash mid-broadcast therefore resumes after the
+last claimed page and never messages anyone twice (a user whose page was
+claimed but not sent simply opens the words with /today). Only the read of
+the next page overlaps with sending; it is claimed once the current page is
+out, so a crash loses at most one page of pushes. Messages go out as
+bulk traffic through the outbound send queue, so they never delay replies.
+Users with their own time zone are broadcast per zone, at the configured hour
+of that zone's day, each zone with its own checkpoint.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+import storage
+from keyboards import today_actions_keyboard
+from middlewares.send_queue import PRIORITY_BULK, send_priority
+from services import word_service
+from utils.time import get_tashkent_date_str, local_hour, seconds_until_local_hour
+from utils.word_ids import resolve_word_ids
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the scheduler's sleep, so newly chosen zones are picked up.
+ZONE_REFRESH_SECONDS = 300
+
+
+async def _send_words(bot: Bot, user_id: int, word_ids: list[int]) -> bool:
+    text = word_service.format_words_for_user(resolve_word_ids(word_ids))
+    try:
+        await bot.send_message(user_id, text, reply_markup=today_actions_keyboard())
+    except TelegramAPIError as exc:
+        logger.info("Daily words not delivered to %s: %s", user_id, exc)
+        return False
+    return True
+
+
+async def run_daily_broadcast(
+    bot: Bot,
+    date_str: str,
+    batch_size: int = 1000,
+    timezone: str | None = None,
+) -> dict:
+    """Deliver today's words to every user in ``timezone``, resuming from the stored checkpoint.
+
+    The next page is read while the current one is being sent, so the
+    database work overlaps with the rate-limited sending, but it is only
+    claimed (words assigned, checkpoint moved) after the current page is out.
+    """
+    run = await storage.get_broadcast_run(date_str, timezone)
+    if run and run["finished_at"]:
+        return run
+    after_user_id = run["last_user_id"] if run else 0
+
+    sent = failed = 0
+    next_page = asyncio.create_task(
+        storage.fetch_broadcast_users(date_str, timezone, after_user_id, batch_size)
+    )
+    try:
+        while True:
+            users = await next_page
+            if not users:
+                break
+            deliveries = await word_service.claim_broadcast_page(date_str, users, timezone)
+            next_page = asyncio.create_task(
+                storage.fetch_broadcast_users(date_str, timezone, users[-1]["user_id"], batch_size)
+            )
+            with send_priority(PRIORITY_BULK):
+                results = await asyncio.gather(
+                    *(_send_words(bot, user_id, word_ids) for user_id, word_ids in deliveries)
+                )
+            delivered = sum(results)
+            await storage.record_broadcast_result(date_str, delivered, len(results) - delivered, timezone=timezone)
+            sent += delivered
+            failed += len(results) - delivered
+    finally:
+        if not next_page.done():
+            next_page.cancel()
+
+    await storage.record_broadcast_result(date_str, 0, 0, finished=True, timezone=timezone)
+    logger.info(
+        "Daily broadcast for %s (%s) finished: sent=%s failed=%s",
+        date_str,
+        timezone or "default zone",
+        sent,
+        failed,
+    )
+    return await storage.get_broadcast_run(date_str, timezone)
+
+
+async def broadcast_scheduler(bot: Bot, hour: int, batch_size: int = 1000) -> None:
+    """Run each zone's daily broadcast at ``hour`` in that zone, resuming unfinished runs."""
+    while True:
+        zones = [None, *await storage.get_user_timezones()]
+        delay = float(ZONE_REFRESH_SECONDS)
+        for timezone in zones:
+            today = get_tashkent_date_str(timezone)
+            run = await storage.get_broadcast_run(today, timezone)
+            if (run is None or not run["finished_at"]) and (run is not None or local_hour(timezone) >= hour):
+                try:
+                    await run_daily_broadcast(bot, today, batch_size, timezone)
+                except Exception:
+                    logger.exception("Daily broadcast for %s (%s) failed; retrying in a minute", today, timezone)
+                    delay = min(delay, 60)
+                    continue
+            delay = min(delay, seconds_until_local_hour(hour, timezone))
+        await asyncio.sleep(delay)
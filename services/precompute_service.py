@@ -0,0 +1,64 @@
+### FILE: services/precompute_service.py
+"""Off-peak planning of tomorrow's word sets.
+
+Right after midnight every active user asks for new words at once. This job
+runs late in the evening and assigns the next day's sets for everyone who was
+active today, one page per transaction, so ``/today`` at rollover only reads.
+Sets remember the premium status they were planned for and are topped up or
+truncated on first read if it changed (see :func:`db.get_today_words`).
+The job is idempotent: users who already have tomorrow's set are skipped.
+Users with their own time zone are planned per zone, at the configured hour
+of that zone's evening.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import storage
+from services import word_service
+from utils.time import get_tashkent_date_str, get_tomorrow_date_str, local_hour, seconds_until_local_hour
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the scheduler's sleep, so newly chosen zones are picked up.
+ZONE_REFRESH_SECONDS = 300
+
+
+async def precompute_tomorrow(batch_size: int = 1000, timezone: str | None = None) -> int:
+    """Assign tomorrow's words to every user in ``timezone`` active today; return rows written."""
+    today = get_tashkent_date_str(timezone)
+    tomorrow = get_tomorrow_date_str(timezone)
+    written = 0
+    after_user_id: int | None = 0
+    while after_user_id is not None:
+        page_written, after_user_id = await word_service.precompute_batch(
+            today, tomorrow, after_user_id, batch_size, timezone
+        )
+        written += page_written
+    logger.info("Precomputed %s word sets for %s (%s)", written, tomorrow, timezone or "default zone")
+    return written
+
+
+async def precompute_scheduler(hour: int, batch_size: int = 1000) -> None:
+    """Run :func:`precompute_tomorrow` for each zone every day at ``hour`` in that zone."""
+    # zone -> local date it was last planned on; a zone past its slot and not
+    # yet planned today (e.g. after a restart) catches up at once.
+    planned: dict[str | None, str] = {}
+    while True:
+        zones = [None, *await storage.get_user_timezones()]
+        delay = float(ZONE_REFRESH_SECONDS)
+        for timezone in zones:
+            today = get_tashkent_date_str(timezone)
+            if planned.get(timezone) != today and local_hour(timezone) >= hour:
+                await _run_safely(batch_size, timezone)
+                planned[timezone] = today
+            delay = min(delay, seconds_until_local_hour(hour, timezone))
+        await asyncio.sleep(delay)
+
+
+async def _run_safely(batch_size: int, timezone: str | None) -> None:
+    try:
+        await precompute_tomorrow(batch_size, timezone)
+    except Exception:
+        logger.exception("Precomputing tomorrow's words failed (%s)", timezone or "default zone")
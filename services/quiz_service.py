@@ -2,102 +2,185 @@
 """Quiz management logic for SozMaster AI."""
 from __future__ import annotations
 
+import random
+from collections import OrderedDict
 from typing import Any, Dict
 
-import db
+import config
+import storage
+from services import review_service
 from services.word_service import build_quiz_options_for_word
-from utils.time import get_tashkent_date_str
+from session_cache import MISSING
+from utils.clock import get_clock
+from utils.word_ids import resolve_word_ids
 from wordbank import WORD_BANK
 
 
+# (user_id, quiz_id, question_index) -> when the question was served; LRU bounded.
+_served_at: OrderedDict[tuple[int, int, int], float] = OrderedDict()
+
+
+def _mark_served(user_id: int, quiz_id: int, index: int) -> None:
+    _served_at[(user_id, quiz_id, index)] = get_clock().time()
+    while len(_served_at) > max(config.SESSION_CACHE_MAX_ENTRIES, 1):
+        _served_at.popitem(last=False)
+
+
+def _answer_latency_ms(user_id: int, quiz_id: int, index: int) -> int | None:
+    """Return milliseconds since the question was served, if this process served it."""
+    served_at = _served_at.pop((user_id, quiz_id, index), None)
+    if served_at is None:
+        return None
+    return max(0, round((get_clock().time() - served_at) * 1000))
+
+
 class QuizUnavailableError(Exception):
     """Raised when a quiz cannot be started or continued."""
 
 
-def _build_question_payload(words: list[dict], index: int) -> Dict[str, Any]:
-    """Prepare question data for the given word index."""
-    word_obj = words[index]
-    options = build_quiz_options_for_word(word_obj, WORD_BANK)
-    total = len(words)
+class StaleAnswerError(QuizUnavailableError):
+    """Raised when an answer arrives for a question that was already answered."""
+
+
+def build_quiz_plan(words: list[dict], seed: int) -> list[dict]:
+    """Derive question order and shuffled options for a whole quiz from a seed."""
+    rng = random.Random(seed)
+    order = list(range(len(words)))
+    rng.shuffle(order)
+
+    plan = []
+    for word_index in order:
+        word_obj = words[word_index]
+        options = build_quiz_options_for_word(word_obj, WORD_BANK, rng=rng)
+        plan.append(
+            {
+                "word": word_obj,
+                "options": options,
+                "correct_option": options.index(word_obj["translation_uz"]),
+            }
+        )
+    return plan
+
+
+def _get_quiz_plan(user_id: int, date_str: str, words: list[dict], seed: int) -> list[dict]:
+    """Return the quiz plan from the session cache, generating it on a miss."""
+    plan = storage.session_cache.get_quiz_plan(user_id, date_str, seed)
+    if plan is MISSING:
+        plan = build_quiz_plan(words, seed)
+        storage.session_cache.set_quiz_plan(user_id, date_str, seed, plan)
+    return plan
+
+
+def _build_question_payload(plan: list[dict], index: int, quiz_id: int) -> Dict[str, Any]:
+    """Prepare question data for the given position in the quiz plan."""
+    step = plan[index]
+    word_obj = step["word"]
+    total = len(plan)
     question_text = (
         f"Savol {index + 1}/{total}\n"
         f"\"{word_obj['word']}\" so'zining ma'nosi qaysi?"
     )
     return {
         "question_text": question_text,
-        "options": options,
+        "options": step["options"],
         "correct_answer": word_obj["translation_uz"],
         "word": word_obj["word"],
         "current_index": index,
         "total": total,
+        "quiz_id": quiz_id,
     }
 
 
-def start_quiz(user_id: int) -> Dict[str, Any]:
+async def start_quiz(user_id: int) -> Dict[str, Any]:
     """Initialize quiz for the user and return the first question payload."""
-    today = get_tashkent_date_str()
-    words = db.get_today_words(user_id, today)
+    today = (await storage.get_user_day(user_id)).today
+    words = await storage.get_today_words(user_id, today)
     if not words:
         raise QuizUnavailableError("no words for today")
 
+    words = words + await review_service.get_due_words(user_id, config.REVIEW_QUIZ_LIMIT, exclude=words)
     total = len(words)
     if total == 0:
         raise QuizUnavailableError("empty word list")
 
-    db.save_quiz_state(user_id, today, 0, 0, total)
-    question = _build_question_payload(words, 0)
+    word_ids = [review_service.word_id_of(word) for word in words]
+    seed = random.getrandbits(31)
+    await storage.save_quiz_state(
+        user_id, today, 0, 0, total, seed=seed, word_ids=None if None in word_ids else word_ids
+    )
+    plan = _get_quiz_plan(user_id, today, words, seed)
+    question = _build_question_payload(plan, 0, seed)
+    _mark_served(user_id, seed, 0)
     return {"status": "question", "question": question}
 
 
-def get_next_question(user_id: int, selected_option: str) -> Dict[str, Any]:
-    """Process user's answer and provide next question or final summary."""
-    today = get_tashkent_date_str()
-    state = db.get_quiz_state(user_id, today)
-    if not state:
+async def get_next_question(
+    user_id: int,
+    quiz_id: int,
+    question_index: int,
+    option_index: int,
+) -> Dict[str, Any]:
+    """Process user's answer and provide next question or final summary.
+
+    The answer coordinates come from the callback payload and are checked
+    against the server-side quiz state before anything is graded.
+    """
+    today = (await storage.get_user_day(user_id)).today
+    state = await storage.get_quiz_state(user_id, today)
+    if not state or state.get("seed") is None:
         raise QuizUnavailableError("quiz not started")
-
-    words = db.get_today_words(user_id, today)
+    if state["seed"] != quiz_id:
+        raise QuizUnavailableError("answer belongs to another quiz")
+    if state["current_question_index"] != question_index:
+        raise StaleAnswerError("question already answered")
+
+    if state.get("word_ids") is not None:
+        words = resolve_word_ids(state["word_ids"])
+    else:
+        words = await storage.get_today_words(user_id, today)
     if not words:
-        db.clear_quiz_state(user_id, today)
+        await storage.clear_quiz_state(user_id, today)
         raise QuizUnavailableError("no words for today")
 
+    plan = _get_quiz_plan(user_id, today, words, state["seed"])
     current_index = state["current_question_index"]
-    total = state["total_count"] or len(words)
-    if current_index >= total:
-        db.clear_quiz_state(user_id, today)
+    if current_index >= len(plan):
+        await storage.clear_quiz_state(user_id, today)
         raise QuizUnavailableError("quiz already completed")
 
-    current_word = words[current_index]
-    correct_answer = current_word["translation_uz"]
-    is_correct = selected_option == correct_answer
-
-    correct_count = state["correct_count"] or 0
-    if is_correct:
-        correct_count += 1
-        db.add_xp(user_id, 1)
-
-    next_index = current_index + 1
+    step = plan[current_index]
+    if not 0 <= option_index < len(step["options"]):
+        raise QuizUnavailableError("invalid option")
+    is_correct = option_index == step["correct_option"]
+    result = await storage.answer_quiz_question(
+        user_id,
+        today,
+        current_index,
+        is_correct,
+        review_service.word_id_of(step["word"]),
+        _answer_latency_ms(user_id, quiz_id, current_index),
+    )
+    if result is None:
+        raise StaleAnswerError("question already answered")
 
-    if next_index >= total:
-        db.clear_quiz_state(user_id, today)
-        user_row = db.get_user(user_id)
-        xp_total = user_row["xp"] if user_row else correct_count
+    correct_answer = step["word"]["translation_uz"]
+    if result["finished"]:
         return {
             "status": "finished",
             "is_correct": is_correct,
             "correct_answer": correct_answer,
-            "correct_count": correct_count,
-            "total": total,
-            "xp": xp_total,
+            "correct_count": result["correct_count"],
+            "total": result["total"],
+            "xp": result["xp"],
         }
 
-    db.update_quiz_state_on_answer(user_id, today, next_index, correct_count)
-    next_question = _build_question_payload(words, next_index)
+    next_question = _build_question_payload(plan, result["next_index"], quiz_id)
+    _mark_served(user_id, quiz_id, result["next_index"])
     return {
         "status": "next",
         "is_correct": is_correct,
         "correct_answer": correct_answer,
-        "correct_count": correct_count,
-        "total": total,
+        "correct_count": result["correct_count"],
+        "total": result["total"],
         "question": next_question,
     }
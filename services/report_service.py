@@ -0,0 +1,119 @@
+### FILE: services/report_service.py
+"""Weekly progress report for premium users.
+
+Every answered quiz question is logged in ``quiz_answers`` and added to the
+user's ``user_daily_stats`` row in the same transaction, so a report is a sum
+over at most seven rollup rows per user and never rescans the raw log.
+Premium users are walked in ``user_id`` order and the checkpoint in
+``weekly_report_runs`` is moved past each page before it is sent, like the
+daily broadcast. Only the read of the next page overlaps with sending; the
+checkpoint is moved once the current page is out, so a crash loses at most
+one page of reports. Reports go out as bulk traffic through the send queue.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, timedelta
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+import storage
+from leaderboard import week_start
+from middlewares.send_queue import PRIORITY_BULK, send_priority
+from utils.time import get_tashkent_date_str, is_premium, local_hour, now_utc_iso, seconds_until_local_hour
+
+logger = logging.getLogger(__name__)
+
+
+def previous_week(today_str: str) -> tuple[str, str]:
+    """Return the Monday and Sunday of the week before the one containing ``today_str``."""
+    monday = date.fromisoformat(week_start(today_str)) - timedelta(days=7)
+    return monday.isoformat(), (monday + timedelta(days=6)).isoformat()
+
+
+def format_weekly_report(row: dict, week_str: str, end_date_str: str) -> str:
+    """Build the Uzbek weekly report text from a user's summed rollups."""
+    answers = row["answers"]
+    correct = row["correct"]
+    accuracy = round(correct * 100 / answers) if answers else 0
+    lines = [
+        "Haftalik hisobot 📊",
+        f"{week_str} — {end_date_str}",
+        "",
+        f"Javoblar: {answers} ta (to'g'ri: {correct}, {accuracy}%)",
+        f"Tugatilgan quizlar: {row['quizzes_completed']}",
+        f"Faol kunlar: {row['active_days']}/7",
+        f"Ketma-ket kunlar: {row['streak'] or 0}",
+        "",
+    ]
+    if answers:
+        lines.append("Zo'r ish! Shu hafta ham davom et: /today")
+    else:
+        lines.append("O'tgan hafta mashq qilinmadi. Bugun /quiz bilan qayta boshla! 💪")
+    return "\n".join(lines)
+
+
+async def _send_report(bot: Bot, row: dict, week_str: str, end_date_str: str) -> bool:
+    try:
+        await bot.send_message(row["user_id"], format_weekly_report(row, week_str, end_date_str))
+    except TelegramAPIError as exc:
+        logger.info("Weekly report not delivered to %s: %s", row["user_id"], exc)
+        return False
+    return True
+
+
+async def run_weekly_report(bot: Bot, week_str: str, end_date_str: str, batch_size: int = 1000) -> dict:
+    """Send the report for the given week to every premium user, resuming from the checkpoint."""
+    run = await storage.get_weekly_report_run(week_str)
+    if run and run["finished_at"]:
+        return run
+    after_user_id = run["last_user_id"] if run else 0
+    now_iso = now_utc_iso()
+
+    sent = failed = 0
+    next_page = asyncio.create_task(
+        storage.fetch_weekly_report_page(week_str, end_date_str, now_iso, after_user_id, batch_size)
+    )
+    try:
+        while True:
+            rows = await next_page
+            if not rows:
+                break
+            await storage.advance_weekly_report_run(week_str, rows[-1]["user_id"])
+            next_page = asyncio.create_task(
+                storage.fetch_weekly_report_page(week_str, end_date_str, now_iso, rows[-1]["user_id"], batch_size)
+            )
+            with send_priority(PRIORITY_BULK):
+                results = await asyncio.gather(
+                    *(_send_report(bot, row, week_str, end_date_str) for row in rows if is_premium(row))
+                )
+            delivered = sum(results)
+            await storage.record_weekly_report_result(week_str, delivered, len(results) - delivered)
+            sent += delivered
+            failed += len(results) - delivered
+    finally:
+        if not next_page.done():
+            next_page.cancel()
+
+    await storage.record_weekly_report_result(week_str, 0, 0, finished=True)
+    logger.info("Weekly report for %s finished: sent=%s failed=%s", week_str, sent, failed)
+    return await storage.get_weekly_report_run(week_str)
+
+
+async def weekly_report_scheduler(bot: Bot, hour: int, batch_size: int = 1000) -> None:
+    """Send last week's report on Monday at ``hour`` local time (or later if missed)."""
+    while True:
+        today = get_tashkent_date_str()
+        week_str, end_date_str = previous_week(today)
+        run = await storage.get_weekly_report_run(week_str)
+        due = today != week_start(today) or local_hour() >= hour
+        if (run is None or not run["finished_at"]) and (run is not None or due):
+            try:
+                await run_weekly_report(bot, week_str, end_date_str, batch_size)
+            except Exception:
+                logger.exception("Weekly report for %s failed; retrying in a minute", week_str)
+                await asyncio.sleep(60)
+            continue
+        await asyncio.sleep(seconds_until_local_hour(hour))
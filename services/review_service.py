@@ -0,0 +1,31 @@
+### FILE: services/review_service.py
+"""Spaced-repetition reviews for SozMaster AI.
+
+Every graded quiz answer reschedules the word's card (see :mod:`srs`). Cards
+due before the end of the user's local day are mixed into /today and /quiz
+next to the new words. Due cards are read with a range scan on the
+``(user_id, due_at)`` index, so the cost depends on the number of due cards
+returned, not on how many cards the user has.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+import storage
+from utils.word_ids import WORD_ID_BY_TEXT, resolve_word_ids
+
+
+def word_id_of(word: dict) -> int | None:
+    """Return the bank id of a word dict (legacy JSON words carry none)."""
+    word_id = word.get("id")
+    return word_id if word_id is not None else WORD_ID_BY_TEXT.get(word["word"])
+
+
+async def get_due_words(user_id: int, limit: int, exclude: Iterable[dict] = ()) -> list[dict]:
+    """Return up to ``limit`` words due for review today, skipping ``exclude``."""
+    if limit <= 0:
+        return []
+    excluded = {word_id_of(word) for word in exclude}
+    day = await storage.get_user_day(user_id)
+    due_ids = await storage.get_due_reviews(user_id, day.end, limit + len(excluded))
+    return resolve_word_ids([word_id for word_id in due_ids if word_id not in excluded][:limit])
@@ -3,64 +3,143 @@
 from __future__ import annotations
 
 import random
-from typing import List, Tuple
+from typing import Tuple
 
-import db
-from utils.time import get_tashkent_date_str, is_premium
+import storage
+from config import DAILY_WORD_COUNT, PREMIUM_DAILY_WORD_COUNT
+from utils.time import is_premium
+from utils.word_bits import bits_from_blob, select_word_ids
+from utils.word_ids import resolve_word_ids
 from wordbank import WORD_BANK
 
 
-def _collect_words(start_index: int, count: int) -> Tuple[list[dict], int]:
-    """Collect a sequential slice of words from the bank with wrap-around."""
-    total_words = len(WORD_BANK)
-    selected: List[dict] = []
-    index = start_index
-    for _ in range(count):
-        word = WORD_BANK[index % total_words]
-        selected.append(dict(word))
-        index += 1
-    return selected, index % total_words
+def daily_word_count(user_row: dict | None) -> int:
+    """Return how many words the user gets per day."""
+    return PREMIUM_DAILY_WORD_COUNT if is_premium(user_row) else DAILY_WORD_COUNT
 
 
-def get_or_assign_today_words(user_id: int, username: str | None) -> list[dict]:
+def _pick_words(user_row: dict, count: int) -> Tuple[list[int], int]:
+    """Pick ``count`` words for the user, unseen ones first, from ``last_word_index`` on."""
+    return select_word_ids(
+        bits_from_blob(user_row.get("seen_words")),
+        bits_from_blob(user_row.get("mastered_words")),
+        user_row["last_word_index"] or 0,
+        count,
+    )
+
+
+def plan_daily_words(user_row: dict) -> Tuple[list[int], int]:
+    """Pick the user's next daily word ids and the resulting ``last_word_index``."""
+    return _pick_words(user_row, daily_word_count(user_row))
+
+
+async def get_or_assign_today_words(user_id: int, username: str | None) -> list[dict]:
     """Return today's words for the user, assigning them if needed."""
-    today = get_tashkent_date_str()
-    existing = db.get_today_words(user_id, today)
+    day = await storage.get_user_day(user_id)
+    today = day.today
+    # Words may have been pushed or precomputed; opening them is still activity.
+    existing = await storage.open_today_words(user_id, today, day.yesterday)
     if existing:
         return existing
 
-    user = db.get_or_create_user(user_id, username)
-    word_count = 20 if is_premium(user) else 5
-    start_index = user["last_word_index"] or 0
-    selected, new_index = _collect_words(start_index, word_count)
+    user = await storage.get_or_create_user(user_id, username)
+    selected, new_index = plan_daily_words(user)
 
     from db import calculate_new_streak  # Local import to avoid circularity
 
     previous_streak = user["streak"] or 0
-    new_streak = calculate_new_streak(user.get("last_active_date"), today, previous_streak)
+    new_streak = calculate_new_streak(user.get("last_active_date"), today, previous_streak, day.yesterday)
 
-    db.save_today_words(user_id, today, selected)
-    db.update_user_after_today_request(user_id, new_index, new_streak, today)
-    return selected
+    await storage.assign_today_words(user_id, today, selected, new_index, new_streak)
+    return resolve_word_ids(selected)
 
 
-def assign_additional_words(user_id: int, username: str | None, count: int = 5) -> list[dict]:
+async def assign_additional_words(user_id: int, username: str | None, count: int = 5) -> list[dict]:
     """Assign additional practice words for premium users."""
-    user = db.get_or_create_user(user_id, username)
-    start_index = user["last_word_index"] or 0
-    selected, new_index = _collect_words(start_index, count)
+    user = await storage.get_or_create_user(user_id, username)
+    selected, new_index = _pick_words(user, count)
 
     from db import calculate_new_streak
 
-    today = get_tashkent_date_str()
+    day = await storage.get_user_day(user_id)
     previous_streak = user["streak"] or 0
-    new_streak = calculate_new_streak(user.get("last_active_date"), today, previous_streak)
-    db.update_user_after_today_request(user_id, new_index, new_streak, today)
-    return selected
-
-
-def format_words_for_user(words_list: list[dict]) -> str:
-    """Format word list into a friendly Uzbek message."""
+    new_streak = calculate_new_streak(user.get("last_active_date"), day.today, previous_streak, day.yesterday)
+    await storage.update_user_after_today_request(user_id, new_index, new_streak, day.today, selected)
+    return resolve_word_ids(selected)
+
+
+async def assign_broadcast_batch(
+    date_str: str,
+    after_user_id: int,
+    batch_size: int,
+    timezone: str | None = None,
+) -> Tuple[list[tuple[int, list[int]]], int | None]:
+    """Assign daily words to the next page of the zone's users in one transaction.
+
+    Users who already have today's words are skipped; precomputed sets are
+    confirmed and delivered. Returns the ``(user_id, word_ids)`` pairs to
+    deliver and the last user id of the page, or ``None`` once every user has
+    been visited.
+    """
+    users = await storage.fetch_broadcast_users(date_str, timezone, after_user_id, batch_size)
+    if not users:
+        return [], None
+    return await claim_broadcast_page(date_str, users, timezone), users[-1]["user_id"]
+
+
+async def claim_broadcast_page(
+    date_str: str,
+    users: list[dict],
+    timezone: str | None = None,
+) -> list[tuple[int, list[int]]]:
+    """Assign words to a page read by ``fetch_broadcast_users`` and move the checkpoint past it.
+
+    The page may have been read a while ago (it is prefetched while the
+    previous one is sent); the transaction re-checks every user, so anyone
+    who opened /today since is skipped. Returns the pairs to deliver.
+    """
+    assignments = []
+    precomputed = []
+    for user in users:
+        if user["precomputed"]:
+            precomputed.append(user["user_id"])
+        elif not user["has_words"]:
+            word_ids, new_index = plan_daily_words(user)
+            assignments.append((user["user_id"], word_ids, user["last_word_index"] or 0, new_index))
+
+    return await storage.save_broadcast_batch(date_str, assignments, precomputed, users[-1]["user_id"], timezone)
+
+
+async def precompute_batch(
+    today_str: str,
+    target_date_str: str,
+    after_user_id: int,
+    batch_size: int,
+    timezone: str | None = None,
+) -> Tuple[int, int | None]:
+    """Plan the target day's words for the next page of the zone's users active today.
+
+    Sets follow the usual ``last_word_index``/premium rules and remember the
+    premium status they were planned for, so a change before delivery is
+    reconciled on first read. Returns the rows written and the page's last
+    user id, or ``None`` when done.
+    """
+    users = await storage.fetch_precompute_users(today_str, target_date_str, timezone, after_user_id, batch_size)
+    if not users:
+        return 0, None
+
+    assignments = []
+    for user in users:
+        word_ids, new_index = plan_daily_words(user)
+        assignments.append(
+            (user["user_id"], word_ids, user["last_word_index"] or 0, new_index, is_premium(user))
+        )
+    written = await storage.save_precomputed_batch(target_date_str, assignments)
+    return written, users[-1]["user_id"]
+
+
+def format_words_for_user(words_list: list[dict], review_words: list[dict] | None = None) -> str:
+    """Format word list (and any words due for review) into a friendly Uzbek message."""
     lines = ["Bugungi so'zlaring 🔥", ""]
     for idx, word in enumerate(words_list, start=1):
         lines.append(f"{idx}) {word['word']}")
@@ -70,20 +149,76 @@ def format_words_for_user(words_list: list[dict]) -> str:
         lines.append(f"   mashq: {word['exercise']}")
         lines.append("")
 
+    if review_words:
+        lines.append("Takrorlash vaqti keldi 🔁")
+        for word in review_words:
+            lines.append(f"• {word['word']} — {word['translation_uz']}")
+        lines.append("")
+
     lines.append("Quiz qilish uchun: /quiz")
     lines.append("Statistika: /stats")
     lines.append("Premium: /upgrade")
     return "\n".join(lines)
 
 
-def build_quiz_options_for_word(target_word: dict, all_words_list: list[dict] | None = None) -> list[str]:
-    """Generate multiple-choice options for a quiz question."""
-    if all_words_list is None:
-        all_words_list = WORD_BANK
+class DistractorIndex:
+    """Deduplicated translations that can be sampled as wrong quiz options.
+
+    Built once per word list; drawing distractors costs O(k) regardless of
+    how many words the bank holds.
+    """
+
+    def __init__(self, words: list[dict]) -> None:
+        self.translations: list[str] = []
+        self.positions: dict[str, int] = {}
+        for word in words:
+            translation = word["translation_uz"]
+            if translation not in self.positions:
+                self.positions[translation] = len(self.translations)
+                self.translations.append(translation)
+
+    def sample(self, correct: str, k: int = 3, rng: random.Random | None = None) -> list[str]:
+        """Return ``k`` distinct translations different from ``correct``."""
+        rng = rng or random
+        total = len(self.translations)
+        excluded = self.positions.get(correct, -1)
+        available = total - (excluded >= 0)
+        if available < k:
+            raise ValueError("not enough distinct translations for distractors")
+
+        # Rejection sampling is O(k) while the pool is much larger than k.
+        if available > 2 * k:
+            picked: list[int] = []
+            while len(picked) < k:
+                index = rng.randrange(total)
+                if index != excluded and index not in picked:
+                    picked.append(index)
+            return [self.translations[index] for index in picked]
+
+        pool = [t for index, t in enumerate(self.translations) if index != excluded]
+        return rng.sample(pool, k)
+
+
+_WORD_BANK_DISTRACTORS = DistractorIndex(WORD_BANK)
+
+
+def build_quiz_options_for_word(
+    target_word: dict,
+    all_words_list: list[dict] | None = None,
+    rng: random.Random | None = None,
+) -> list[str]:
+    """Generate multiple-choice options for a quiz question.
+
+    Pass a seeded ``rng`` to make the options reproducible.
+    """
+    rng = rng or random
+    if all_words_list is None or all_words_list is WORD_BANK:
+        index = _WORD_BANK_DISTRACTORS
+    else:
+        index = DistractorIndex(all_words_list)
 
     correct = target_word["translation_uz"]
-    pool = [w["translation_uz"] for w in all_words_list if w["translation_uz"] != correct]
-    wrong_choices = random.sample(pool, k=3)
+    wrong_choices = index.sample(correct, k=3, rng=rng)
     options = wrong_choices + [correct]
-    random.shuffle(options)
+    rng.shuffle(options)
     return options
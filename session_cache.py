@@ -0,0 +1,164 @@
+### FILE: session_cache.py
+"""In-process cache of each user's daily session.
+
+Entries are keyed by ``(user_id, date_str)`` and hold the decoded list of
+today's words, the quiz cursor, the quiz plan derived from its seed and
+whether the day already counts towards the streak. The storage layer writes through this
+cache, so it stays coherent with the database as long as a single bot process
+owns the database. All methods must be called from the event loop thread.
+"""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+MISSING: Any = object()
+"""Returned when the cache has no answer and the database must be consulted."""
+
+SessionKey = tuple[int, str]
+
+
+class _Entry:
+    __slots__ = ("words", "quiz_state", "quiz_plan", "activity", "expires_at")
+
+    def __init__(self, expires_at: float) -> None:
+        self.words: Any = MISSING
+        self.quiz_state: Any = MISSING
+        self.quiz_plan: Any = MISSING
+        self.activity: Any = MISSING
+        self.expires_at = expires_at
+
+
+class SessionCache:
+    """LRU + TTL cache of today's words and quiz state per user.
+
+    Users may live in different time zones, so each user rolls over on their
+    own: a user's entry for an earlier date is dropped the first time a newer
+    date is seen for that user.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[SessionKey, _Entry] = OrderedDict()
+        # user_id -> newest date cached for the user
+        self._user_dates: dict[int, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_words(self, user_id: int, date_str: str) -> list[dict] | None:
+        """Return cached words, ``None`` if known to be unassigned, or ``MISSING``."""
+        return self._get(user_id, date_str, "words")
+
+    def set_words(self, user_id: int, date_str: str, words: list[dict] | None) -> None:
+        """Store the decoded word list for the user's day."""
+        self._set(user_id, date_str, "words", words)
+
+    def get_quiz_state(self, user_id: int, date_str: str) -> dict | None:
+        """Return a copy of the cached quiz state, ``None`` or ``MISSING``."""
+        state = self._get(user_id, date_str, "quiz_state")
+        return dict(state) if isinstance(state, dict) else state
+
+    def set_quiz_state(self, user_id: int, date_str: str, state: dict | None) -> None:
+        """Store the quiz cursor for the user's day (``None`` means no quiz)."""
+        self._set(user_id, date_str, "quiz_state", dict(state) if state else None)
+
+    def update_quiz_state(self, user_id: int, date_str: str, **fields: Any) -> None:
+        """Patch a cached quiz state in place, or drop the entry if it is not cached."""
+        entry = self._entries.get((user_id, date_str))
+        if entry is not None and isinstance(entry.quiz_state, dict):
+            entry.quiz_state.update(fields)
+        else:
+            self.invalidate(user_id, date_str)
+
+    def get_quiz_plan(self, user_id: int, date_str: str, seed: int) -> list[dict]:
+        """Return the cached plan for the quiz started with ``seed`` or ``MISSING``."""
+        cached = self._get(user_id, date_str, "quiz_plan")
+        if cached is MISSING or cached[0] != seed:
+            return MISSING
+        return cached[1]
+
+    def set_quiz_plan(self, user_id: int, date_str: str, seed: int, plan: list[dict]) -> None:
+        """Store the plan generated for the quiz started with ``seed``."""
+        self._set(user_id, date_str, "quiz_plan", (seed, plan))
+
+    def is_activity_recorded(self, user_id: int, date_str: str) -> bool:
+        """Return True if the day is known to already count towards the user's streak."""
+        return self._get(user_id, date_str, "activity") is True
+
+    def mark_activity_recorded(self, user_id: int, date_str: str) -> None:
+        """Remember that the user's day already counts towards the streak."""
+        self._set(user_id, date_str, "activity", True)
+
+    def invalidate(self, user_id: int, date_str: str) -> None:
+        """Forget everything cached for the user's day."""
+        self._drop((user_id, date_str))
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+        self._user_dates.clear()
+
+    def stats(self) -> dict[str, float]:
+        """Return size and hit-rate counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _get(self, user_id: int, date_str: str, field: str) -> Any:
+        self._roll_over(user_id, date_str)
+        key = (user_id, date_str)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= self._clock():
+            self._drop(key)
+            entry = None
+        value = MISSING if entry is None else getattr(entry, field)
+        if value is MISSING:
+            self.misses += 1
+            return MISSING
+
+        self.hits += 1
+        entry.expires_at = self._clock() + self._ttl
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, user_id: int, date_str: str, field: str, value: Any) -> None:
+        if self._max_entries <= 0:
+            return
+        self._roll_over(user_id, date_str)
+        key = (user_id, date_str)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(0.0)
+            if date_str > self._user_dates.get(user_id, ""):
+                self._user_dates[user_id] = date_str
+            while len(self._entries) > self._max_entries:
+                self._drop(next(iter(self._entries)))
+        setattr(entry, field, value)
+        entry.expires_at = self._clock() + self._ttl
+        self._entries.move_to_end(key)
+
+    def _roll_over(self, user_id: int, date_str: str) -> None:
+        previous = self._user_dates.get(user_id)
+        if previous is not None and previous < date_str:
+            self._drop((user_id, previous))
+
+    def _drop(self, key: SessionKey) -> None:
+        self._entries.pop(key, None)
+        user_id, date_str = key
+        if self._user_dates.get(user_id) == date_str:
+            del self._user_dates[user_id]
@@ -0,0 +1,200 @@
+### FILE: slow_query_log.py
+"""Record slow SQL statements with their query plans as JSON lines.
+
+:class:`SlowQueryLog` is a statement observer (see
+:func:`db.add_statement_observer`). A statement slower than the threshold is
+written to the log with its parameter shape (types only, never values), its
+duration and its ``EXPLAIN QUERY PLAN`` output, plus the tables the plan
+reads with a full scan. Plans come from a separate read-only connection:
+``EXPLAIN QUERY PLAN`` only compiles the statement, and the read-only
+connection guarantees a write can never run a second time. Each distinct
+statement is written at most once per ``min_interval`` seconds; the
+executions skipped in between are counted on the next entry.
+
+``python -m scripts.slow_queries`` groups the log into a report.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = {"SELECT", "WITH", "UPDATE", "DELETE", "INSERT", "REPLACE"}
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+_PLAN_CACHE_SIZE = 512
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace so the same statement always groups together."""
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def parameter_shape(parameters: Any, many: bool = False) -> str:
+    """Describe parameters by type only, e.g. ``"(int, str)"`` or ``"(int, str) x 500"``."""
+    if many:
+        if not isinstance(parameters, (list, tuple)):
+            return "iterable"
+        first = parameter_shape(parameters[0]) if parameters else "()"
+        return f"{first} x {len(parameters)}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _is_many(parameters: Any) -> bool:
+    """Tell ``executemany`` parameter sequences from a single ``execute`` binding."""
+    if isinstance(parameters, dict):
+        return False
+    if isinstance(parameters, (list, tuple)):
+        return bool(parameters) and isinstance(parameters[0], (list, tuple, dict))
+    return True
+
+
+def full_scans(plan: list[str]) -> list[str]:
+    """Return tables a query plan reads end to end without an index."""
+    tables = []
+    for detail in plan:
+        match = _FULL_SCAN.match(detail.strip())
+        if match and match.group(1) not in tables:
+            tables.append(match.group(1))
+    return tables
+
+
+class SlowQueryLog:
+    """Statement observer appending slow statements to a JSON-lines file."""
+
+    def __init__(self, db_path: str, log_path: str, threshold_ms: float = 50, min_interval: float = 1.0) -> None:
+        self._db_path = db_path
+        self._log_path = log_path
+        self._threshold = threshold_ms / 1000
+        self._min_interval = min_interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._plans: dict[str, list[str] | None] = {}
+        # normalized sql -> (last written at, executions skipped since)
+        self._last_written: dict[str, tuple[float, int]] = {}
+        self.recorded = 0
+        self.skipped = 0
+
+    def __call__(self, sql: str, parameters: Any, seconds: float) -> None:
+        if seconds < self._threshold:
+            return
+        text = normalize_sql(sql)
+        now = time.time()
+        with self._lock:
+            last, skipped = self._last_written.get(text, (0.0, 0))
+            if now - last < self._min_interval:
+                self._last_written[text] = (last, skipped + 1)
+                self.skipped += 1
+                return
+            self._last_written[text] = (now, 0)
+        many = _is_many(parameters)
+        plan = self._plan(sql, text, parameters, many)
+        entry = {
+            "at": round(now, 3),
+            "sql": text,
+            "params": parameter_shape(parameters, many),
+            "ms": round(seconds * 1000, 3),
+            "skipped": skipped,
+            "plan": plan,
+            "full_scans": full_scans(plan or []),
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            with open(self._log_path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+            self.recorded += 1
+
+    def _plan(self, sql: str, text: str, parameters: Any, many: bool) -> list[str] | None:
+        """Return ``EXPLAIN QUERY PLAN`` details, cached per statement."""
+        if text in self._plans:
+            return self._plans[text]
+        verb = text.split(" ", 1)[0].upper()
+        if many:
+            # Plan with the first row; a consumed iterator leaves nothing to bind.
+            parameters = parameters[0] if isinstance(parameters, (list, tuple)) and parameters else None
+        plan = None
+        if verb in _EXPLAINABLE and parameters is not None:
+            try:
+                rows = self._connection().execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+                plan = [row[3] for row in rows]
+            except sqlite3.Error as exc:
+                logger.debug("Could not explain %s: %s", text, exc)
+        with self._lock:
+            if len(self._plans) >= _PLAN_CACHE_SIZE:
+                self._plans.clear()
+            self._plans[text] = plan
+        return plan
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self._db_path}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+
+_TABLE_REF = re.compile(
+    r"""
+    \b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)
+    (?:\s+(?:AS\s+)?(?!WHERE|JOIN|ON|SET|LEFT|INNER|ORDER|GROUP|LIMIT|VALUES)(\w+))?  # optional alias
+    """,
+    re.I | re.VERBOSE,
+)
+_FILTER_COLUMN = re.compile(
+    r"(?:(\w+)\.)?(\w+)\s*(=|==|<=|>=|<|>|\bIN\b|\bBETWEEN\b|\bIS\b)", re.I
+)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|$)", re.I)
+
+
+def suggest_index(sql: str, table: str, columns: set[str] | None = None) -> str | None:
+    """Suggest an index for a full scan of ``table``: filtered equality columns, then ranges, then ORDER BY.
+
+    Only a hint: columns come from a pattern match on the SQL, so review it
+    before creating the index. ``columns`` (the table's real columns)
+    filters out aliases and expressions when given.
+    """
+    text = normalize_sql(sql)
+    aliases = {table.lower()}
+    tables = set()
+    for match in _TABLE_REF.finditer(text):
+        tables.add(match.group(1).lower())
+        if match.group(1).lower() == table.lower() and match.group(2):
+            aliases.add(match.group(2).lower())
+    single_table = len(tables) <= 1
+
+    def belongs(qualifier: str) -> bool:
+        return single_table if not qualifier else qualifier.lower() in aliases
+
+    where = re.split(r"\bWHERE\b", text, maxsplit=1, flags=re.I)
+    equality: list[str] = []
+    ranges: list[str] = []
+    if len(where) == 2:
+        for qualifier, column, operator in _FILTER_COLUMN.findall(where[1]):
+            if not belongs(qualifier) or (columns is not None and column not in columns):
+                continue
+            target = equality if operator.strip().upper() in {"=", "==", "IN"} else ranges
+            if column not in equality and column not in ranges:
+                target.append(column)
+    ordered: list[str] = []
+    order_by = _ORDER_BY.search(text)
+    if order_by:
+        for item in order_by.group(1).split(","):
+            qualifier, _, column = item.strip().split(" ")[0].rpartition(".")
+            if belongs(qualifier) and (columns is None or column in columns):
+                if column not in equality and column not in ranges and column not in ordered:
+                    ordered.append(column)
+    # An index can serve every equality column but only the first range.
+    picked = equality + ranges[:1] + (ordered if not ranges else [])
+    if not picked:
+        return None
+    return f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(picked)} ON {table}({', '.join(picked)})"
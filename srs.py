@@ -0,0 +1,73 @@
+### FILE: srs.py
+"""SM-2 spaced-repetition scheduling.
+
+A card is the scheduling state of one word for one user. :func:`review`
+applies a graded answer (quality 0-5, 3 and above counts as recalled) and
+returns the updated card with its next due time as a POSIX timestamp.
+"""
+from __future__ import annotations
+
+DAY_SECONDS = 86400
+MIN_EASE = 1.3
+INITIAL_EASE = 2.5
+
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+# A word counts as mastered once its review interval reaches three weeks.
+MASTERED_INTERVAL_DAYS = 21.0
+
+
+def new_card() -> dict:
+    """Return the state of a word that has never been reviewed."""
+    return {"ease": INITIAL_EASE, "interval_days": 0.0, "repetitions": 0, "lapses": 0}
+
+
+def review(card: dict | None, quality: int, now: float, due_before: float | None = None) -> dict:
+    """Apply one graded review to ``card`` and return the new state.
+
+    The result holds ``ease``, ``interval_days``, ``repetitions``, ``lapses``,
+    ``due_at`` and ``last_review_at``. A card is due once ``due_at`` is at or
+    before ``due_before`` (default ``now``); pass the end of the user's local
+    day, the horizon /today and /quiz use to pick due cards. An answer to a
+    card that is not due yet (several quizzes on one day) does not
+    reschedule it: the interval and due time stay, and a wrong answer only
+    lowers the ease.
+    """
+    card = dict(card or new_card())
+    quality = max(0, min(5, quality))
+    if card.get("due_at") is not None and card["due_at"] > (now if due_before is None else due_before):
+        if quality < 3:
+            card["ease"] = _next_ease(card["ease"], quality)
+        card["last_review_at"] = int(now)
+        return card
+    if quality < 3:
+        card["repetitions"] = 0
+        card["interval_days"] = 1.0
+        card["lapses"] += 1
+    else:
+        card["repetitions"] += 1
+        if card["repetitions"] == 1:
+            card["interval_days"] = 1.0
+        elif card["repetitions"] == 2:
+            card["interval_days"] = 6.0
+        else:
+            card["interval_days"] = round(card["interval_days"] * card["ease"], 2)
+    card["ease"] = _next_ease(card["ease"], quality)
+    card["due_at"] = int(now + card["interval_days"] * DAY_SECONDS)
+    card["last_review_at"] = int(now)
+    return card
+
+
+def _next_ease(ease: float, quality: int) -> float:
+    return max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+
+def answer_quality(is_correct: bool) -> int:
+    """Map a multiple-choice quiz answer to an SM-2 quality grade."""
+    return QUALITY_CORRECT if is_correct else QUALITY_WRONG
+
+
+def is_mastered(card: dict | None) -> bool:
+    """Return True once a card's interval has reached :data:`MASTERED_INTERVAL_DAYS`."""
+    return bool(card) and card["interval_days"] >= MASTERED_INTERVAL_DAYS
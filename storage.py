@@ -0,0 +1,613 @@
+### FILE: storage.py
+"""Asynchronous storage API for SozMaster AI.
+
+Every function here mirrors one in :mod:`db`, but runs it on a dedicated
+database thread so a slow disk write never stalls the event loop. When
+``WRITE_BEHIND_ENABLED`` is set, XP and quiz progress writes go through a
+:class:`~write_behind.WriteBehindBuffer` and reads overlay what is pending.
+
+Today's words and quiz state are served from a :class:`~session_cache.SessionCache`
+that every write below keeps up to date. Cache entries are filled only after
+the database call returns; the DB thread runs jobs in FIFO order, so a fill can
+never overwrite the result of a later write.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, TypeVar
+
+import config
+import db
+from answer_log import AnswerLog
+from leaderboard import Leaderboards, XpBoard, week_start
+from session_cache import MISSING, SessionCache
+from utils.clock import LocalDay, get_clock
+from utils.word_ids import resolve_word_ids
+from write_behind import WriteBehindBuffer
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_write_behind: WriteBehindBuffer | None = None
+_answer_log: AnswerLog | None = None
+_answer_locks: weakref.WeakValueDictionary[int, asyncio.Lock] = weakref.WeakValueDictionary()
+session_cache = SessionCache(
+    max_entries=config.SESSION_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.SESSION_CACHE_TTL_SECONDS,
+)
+# user_id -> own time zone (None for the default); LRU bounded like the session cache.
+_user_timezones: OrderedDict[int, str | None] = OrderedDict()
+_leaderboards: Leaderboards | None = None
+_leaderboards_lock = asyncio.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the single-thread executor that owns all SQLite work."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sozmaster-db")
+    return _executor
+
+
+async def run(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a synchronous DB function on the database thread and await it."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown() -> None:
+    """Wait for queued DB work, stop the database thread and close connections."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    db.close_connections()
+
+
+async def _flush_write_behind(
+    xp_increments: dict[int, dict[str, int]],
+    progress_updates: dict[tuple[int, str], tuple[int, int]],
+    progress_deletes: set[tuple[int, str]],
+    answers: list[tuple[int, str, int | None, bool, bool, float]],
+) -> None:
+    await run(db.apply_write_behind, xp_increments, progress_updates, progress_deletes, answers)
+
+
+def start_write_behind() -> WriteBehindBuffer | None:
+    """Enable the write-behind buffer if configured; must run inside the event loop."""
+    global _write_behind
+    if config.WRITE_BEHIND_ENABLED and _write_behind is None:
+        _write_behind = WriteBehindBuffer(
+            _flush_write_behind,
+            max_delay_ms=config.WRITE_BEHIND_MAX_DELAY_MS,
+            max_pending=config.WRITE_BEHIND_MAX_PENDING,
+        )
+        _write_behind.start()
+    return _write_behind
+
+
+def start_answer_log() -> AnswerLog | None:
+    """Enable the batched answer log if configured; must run inside the event loop."""
+    global _answer_log
+    if config.ANSWER_LOG_ENABLED and _answer_log is None:
+        _answer_log = AnswerLog(
+            functools.partial(run, db.append_answer_log),
+            max_delay_ms=config.ANSWER_LOG_FLUSH_MS,
+            max_pending=config.ANSWER_LOG_MAX_PENDING,
+        )
+        _answer_log.start()
+    return _answer_log
+
+
+async def stop_answer_log() -> None:
+    """Flush and disable the answer log."""
+    global _answer_log
+    if _answer_log is not None:
+        await _answer_log.stop()
+        _answer_log = None
+
+
+async def get_answer_log_compaction(date_str: str) -> dict | None:
+    """Return the answer log compaction checkpoint for the given day."""
+    return await run(db.get_answer_log_compaction, date_str)
+
+
+async def compact_answer_log(date_str: str, cutoff: float, batch_size: int = 5000) -> int:
+    """Fold answer log rows older than ``cutoff`` into per-word aggregates and prune them.
+
+    Each batch is its own job on the database thread and the loop yields in
+    between, so handler queries queued meanwhile run before the next batch
+    instead of waiting for the whole compaction. Progress is checkpointed
+    under ``date_str``: a run resumed after an interruption keeps its
+    original cutoff. Returns the rows compacted by this call.
+    """
+    await run(db.start_answer_log_compaction, date_str, cutoff)
+    compacted = 0
+    while True:
+        folded = await run(db.compact_answer_log_batch, date_str, batch_size)
+        if not folded:
+            return compacted
+        compacted += folded
+        await asyncio.sleep(0)
+
+
+async def stop_write_behind() -> None:
+    """Flush and disable the write-behind buffer."""
+    global _write_behind
+    if _write_behind is not None:
+        await _write_behind.stop()
+        _write_behind = None
+
+
+def pending_writes() -> dict[str, int]:
+    """Return how many buffered writes are waiting for the database."""
+    return {
+        "write_behind": _write_behind.stats()["pending_updates"] if _write_behind is not None else 0,
+        "answer_log": _answer_log.stats()["pending"] if _answer_log is not None else 0,
+    }
+
+
+def _with_pending_xp(user_row: dict | None) -> dict | None:
+    if user_row is None or _write_behind is None:
+        return user_row
+    pending = _write_behind.pending_xp(user_row["user_id"])
+    if pending:
+        user_row["xp"] = (user_row["xp"] or 0) + pending
+    return user_row
+
+
+async def init_db() -> None:
+    """Initialize database tables if they do not exist."""
+    await run(db.init_db)
+
+
+async def pending_migrations() -> list[str]:
+    """Return the schema migrations not yet applied."""
+    return await run(db.pending_migrations)
+
+
+async def get_or_create_user(user_id: int, username: str | None) -> dict:
+    """Fetch existing user or create a new one."""
+    user_row = await run(db.get_or_create_user, user_id, username)
+    _remember_timezone(user_id, user_row.get("timezone"))
+    return _with_pending_xp(user_row)
+
+
+async def get_user(user_id: int) -> dict | None:
+    """Return user row if present."""
+    user_row = await run(db.get_user, user_id)
+    if user_row is not None:
+        _remember_timezone(user_id, user_row.get("timezone"))
+    return _with_pending_xp(user_row)
+
+
+def _remember_timezone(user_id: int, timezone: str | None) -> None:
+    _user_timezones[user_id] = timezone
+    _user_timezones.move_to_end(user_id)
+    while len(_user_timezones) > max(config.SESSION_CACHE_MAX_ENTRIES, 1):
+        _user_timezones.popitem(last=False)
+
+
+async def get_user_timezone(user_id: int) -> str | None:
+    """Return the user's own time zone (``None`` means the default one)."""
+    if user_id in _user_timezones:
+        _user_timezones.move_to_end(user_id)
+        return _user_timezones[user_id]
+    timezone = await run(db.get_user_timezone, user_id)
+    _remember_timezone(user_id, timezone)
+    return timezone
+
+
+async def set_user_timezone(user_id: int, timezone: str | None) -> None:
+    """Store the user's time zone; the default zone is stored as ``None``."""
+    if timezone == config.TIMEZONE:
+        timezone = None
+    await run(db.set_user_timezone, user_id, timezone)
+    _remember_timezone(user_id, timezone)
+
+
+async def get_user_day(user_id: int) -> LocalDay:
+    """Return the user's current local day (today/yesterday date strings)."""
+    return get_clock().day(await get_user_timezone(user_id))
+
+
+async def update_user_after_today_request(
+    user_id: int,
+    new_last_word_index: int,
+    new_streak: int,
+    new_last_active_date: str,
+    word_ids: Iterable[int] = (),
+) -> None:
+    """Update user's progress information after /today command, marking ``word_ids`` as seen."""
+    await run(
+        db.update_user_after_today_request,
+        user_id,
+        new_last_word_index,
+        new_streak,
+        new_last_active_date,
+        word_ids,
+    )
+    session_cache.mark_activity_recorded(user_id, new_last_active_date)
+
+
+async def record_daily_activity(user_id: int, today_str: str, yesterday_str: str | None = None) -> None:
+    """Count today towards the user's streak unless it is already counted."""
+    if session_cache.is_activity_recorded(user_id, today_str):
+        return
+    await run(db.record_daily_activity, user_id, today_str, yesterday_str)
+    session_cache.mark_activity_recorded(user_id, today_str)
+
+
+async def open_today_words(user_id: int, today_str: str, yesterday_str: str | None = None) -> list[dict] | None:
+    """Return today's words (if assigned) and record the day's activity.
+
+    On a cache miss both happen in a single database call, which only writes
+    if the day is not counted yet or a precomputed set needs confirming. Once
+    the day is counted, a repeated /today is served from the cache alone.
+    """
+    words = session_cache.get_words(user_id, today_str)
+    if words is MISSING:
+        words = await run(db.open_today_words, user_id, today_str, yesterday_str)
+        session_cache.set_words(user_id, today_str, words)
+        if words:
+            session_cache.mark_activity_recorded(user_id, today_str)
+    elif words:
+        await record_daily_activity(user_id, today_str, yesterday_str)
+    return words
+
+
+async def save_today_words(user_id: int, date_str: str, word_ids: list[int]) -> None:
+    """Persist today's assigned word ids for the user."""
+    await run(db.save_today_words, user_id, date_str, word_ids)
+    session_cache.set_words(user_id, date_str, resolve_word_ids(word_ids))
+
+
+async def assign_today_words(
+    user_id: int,
+    date_str: str,
+    word_ids: list[int],
+    new_last_word_index: int,
+    new_streak: int,
+) -> None:
+    """Save today's words together with the user's progress and seen bits in one transaction."""
+    await run(db.assign_today_words, user_id, date_str, word_ids, new_last_word_index, new_streak)
+    session_cache.set_words(user_id, date_str, resolve_word_ids(word_ids))
+    session_cache.mark_activity_recorded(user_id, date_str)
+
+
+async def get_today_words(user_id: int, date_str: str) -> list[dict] | None:
+    """Return today's words for the user if already assigned.
+
+    The returned list is shared with the session cache and must not be mutated.
+    """
+    words = session_cache.get_words(user_id, date_str)
+    if words is MISSING:
+        words = await run(db.get_today_words, user_id, date_str)
+        session_cache.set_words(user_id, date_str, words)
+    return words
+
+
+async def save_quiz_state(
+    user_id: int,
+    date_str: str,
+    current_question_index: int,
+    correct_count: int,
+    total_count: int,
+    seed: int | None = None,
+    word_ids: list[int] | None = None,
+) -> None:
+    """Create or replace quiz state for the user."""
+    if _write_behind is not None:
+        _write_behind.discard_progress(user_id, date_str)
+    await run(
+        db.save_quiz_state,
+        user_id,
+        date_str,
+        current_question_index,
+        correct_count,
+        total_count,
+        seed,
+        word_ids,
+    )
+    session_cache.set_quiz_state(
+        user_id,
+        date_str,
+        {
+            "user_id": user_id,
+            "date": date_str,
+            "current_question_index": current_question_index,
+            "correct_count": correct_count,
+            "total_count": total_count,
+            "seed": seed,
+            "word_ids": word_ids,
+        },
+    )
+
+
+async def get_quiz_state(user_id: int, date_str: str) -> dict | None:
+    """Return stored quiz progress for today."""
+    row = session_cache.get_quiz_state(user_id, date_str)
+    if row is not MISSING:
+        return row
+
+    row = await run(db.get_quiz_state, user_id, date_str)
+    if _write_behind is not None:
+        row = _write_behind.overlay_progress(user_id, date_str, row)
+    session_cache.set_quiz_state(user_id, date_str, row)
+    return row
+
+
+def _cache_quiz_progress(user_id: int, date_str: str, index: int | None, correct_count: int = 0) -> None:
+    """Mirror a progress update (``index=None`` means cleared) into the session cache."""
+    if index is None:
+        session_cache.set_quiz_state(user_id, date_str, None)
+        return
+    session_cache.update_quiz_state(
+        user_id, date_str, current_question_index=index, correct_count=correct_count
+    )
+
+
+async def update_quiz_state_on_answer(
+    user_id: int,
+    date_str: str,
+    current_question_index: int,
+    correct_count: int,
+) -> None:
+    """Update quiz progress after processing an answer."""
+    if _write_behind is not None:
+        _write_behind.update_progress(user_id, date_str, current_question_index, correct_count)
+    else:
+        await run(db.update_quiz_state_on_answer, user_id, date_str, current_question_index, correct_count)
+    _cache_quiz_progress(user_id, date_str, current_question_index, correct_count)
+
+
+async def clear_quiz_state(user_id: int, date_str: str) -> None:
+    """Remove quiz state when quiz is completed."""
+    if _write_behind is not None:
+        _write_behind.discard_progress(user_id, date_str)
+    await run(db.clear_quiz_state, user_id, date_str)
+    _cache_quiz_progress(user_id, date_str, None)
+
+
+async def answer_quiz_question(
+    user_id: int,
+    date_str: str,
+    question_index: int,
+    is_correct: bool,
+    word_id: int | None = None,
+    latency_ms: int | None = None,
+) -> dict | None:
+    """Record a graded answer: advance the quiz, add XP and reschedule the word's review.
+
+    With write-behind enabled the same checks run against the overlaid state
+    and the resulting writes are buffered instead of committed immediately.
+    Accepted answers are also appended to the batched answer log.
+    """
+    if _write_behind is None:
+        result = await run(db.answer_quiz_question, user_id, date_str, question_index, is_correct, word_id)
+    else:
+        lock = _answer_locks.get(user_id)
+        if lock is None:
+            lock = _answer_locks[user_id] = asyncio.Lock()
+        async with lock:
+            result = await _answer_quiz_question_buffered(
+                _write_behind, user_id, date_str, question_index, is_correct, word_id
+            )
+
+    if result is None:
+        session_cache.invalidate(user_id, date_str)
+    else:
+        if result["is_correct"]:
+            await _award_xp(user_id, 1)
+        if _answer_log is not None:
+            _answer_log.append((user_id, date_str, word_id, is_correct, latency_ms, get_clock().time()))
+        _cache_quiz_progress(
+            user_id,
+            date_str,
+            None if result["finished"] else result["next_index"],
+            result["correct_count"],
+        )
+    return result
+
+
+async def _answer_quiz_question_buffered(
+    buffer: WriteBehindBuffer,
+    user_id: int,
+    date_str: str,
+    question_index: int,
+    is_correct: bool,
+    word_id: int | None,
+) -> dict | None:
+    state = await get_quiz_state(user_id, date_str)
+    if not state or state["current_question_index"] != question_index:
+        return None
+
+    correct_count = (state["correct_count"] or 0) + int(is_correct)
+    next_index = question_index + 1
+    total = state["total_count"]
+    if is_correct:
+        buffer.add_xp(user_id, 1, get_clock().today())
+    buffer.record_answer(user_id, date_str, word_id, is_correct, next_index >= total, get_clock().time())
+    if next_index >= total:
+        buffer.clear_progress(user_id, date_str)
+    else:
+        buffer.update_progress(user_id, date_str, next_index, correct_count)
+
+    user_row = await get_user(user_id)
+    return {
+        "is_correct": is_correct,
+        "correct_count": correct_count,
+        "next_index": next_index,
+        "total": total,
+        "finished": next_index >= total,
+        "xp": user_row["xp"] if user_row else correct_count,
+    }
+
+
+async def add_xp(user_id: int, amount: int) -> None:
+    """Increase user's XP by the given amount."""
+    if _write_behind is not None:
+        _write_behind.add_xp(user_id, amount, get_clock().today())
+    else:
+        await run(db.add_xp, user_id, amount)
+    await _award_xp(user_id, amount)
+
+
+async def _award_xp(user_id: int, amount: int) -> None:
+    if _leaderboards is not None:
+        today = get_clock().today()
+        await _roll_leaderboards(_leaderboards, today)
+        _leaderboards.add(user_id, amount, today)
+
+
+async def _roll_leaderboards(boards: Leaderboards, today: str) -> None:
+    """Roll the boards' windows; once a new week starts, prune the day rows no window needs."""
+    if boards.roll(today):
+        await run(db.prune_xp_daily, week_start(today))
+
+
+async def load_leaderboards() -> Leaderboards:
+    """Build the in-memory leaderboards from the database once and return them.
+
+    XP still pending in the write-behind buffer is not in the snapshot and
+    is added on top.
+    """
+    global _leaderboards
+    async with _leaderboards_lock:
+        if _leaderboards is None:
+            today = get_clock().today()
+            totals, daily = await run(db.load_leaderboards, week_start(today))
+            boards = Leaderboards.load(today, totals, daily)
+            if _write_behind is not None:
+                for user_id, amount in _write_behind.pending_xp_totals().items():
+                    boards.add(user_id, amount, today)
+            _leaderboards = boards
+    return _leaderboards
+
+
+async def _get_board(window: str) -> XpBoard:
+    boards = _leaderboards or await load_leaderboards()
+    today = get_clock().today()
+    await _roll_leaderboards(boards, today)
+    return boards.board(window, today)
+
+
+async def get_leaderboard(window: str = "all", limit: int = 10) -> list[dict]:
+    """Return the top of a board (``"all"``, ``"week"`` or ``"day"``) with usernames."""
+    board = await _get_board(window)
+    page = board.top(limit)
+    names = await run(db.get_usernames, [user_id for user_id, _ in page])
+    return [
+        {"user_id": user_id, "username": names.get(user_id), "xp": xp, "rank": board.rank(user_id)}
+        for user_id, xp in page
+    ]
+
+
+async def get_user_rank(user_id: int, window: str = "all") -> tuple[int | None, int]:
+    """Return the user's rank on a board (``None`` without XP there) and the board's size."""
+    board = await _get_board(window)
+    return board.rank(user_id), len(board)
+
+
+async def get_user_timezones() -> list[str]:
+    """Return every time zone users have chosen besides the default."""
+    return await run(db.fetch_user_timezones)
+
+
+async def get_broadcast_run(date_str: str, timezone: str | None = None) -> dict | None:
+    """Return the broadcast checkpoint for the given day in ``timezone``."""
+    return await run(db.get_broadcast_run, date_str, timezone)
+
+
+async def fetch_broadcast_users(date_str: str, timezone: str | None, after_user_id: int, limit: int) -> list[dict]:
+    """Return the next keyset page of the zone's users for the broadcast."""
+    return await run(db.fetch_broadcast_users, date_str, timezone, after_user_id, limit)
+
+
+async def save_broadcast_batch(
+    date_str: str,
+    assignments: list[tuple[int, list[int], int, int]],
+    precomputed_user_ids: list[int],
+    last_user_id: int,
+    timezone: str | None = None,
+) -> list[tuple[int, list[int]]]:
+    """Assign or confirm a page of daily words and advance the zone's broadcast checkpoint."""
+    claimed = await run(
+        db.save_broadcast_batch, date_str, assignments, precomputed_user_ids, last_user_id, timezone
+    )
+    for user_id, _ in claimed:
+        session_cache.invalidate(user_id, date_str)
+    return claimed
+
+
+async def fetch_precompute_users(
+    today_str: str,
+    target_date_str: str,
+    timezone: str | None,
+    after_user_id: int,
+    limit: int,
+) -> list[dict]:
+    """Return the next keyset page of the zone's users to plan the target day for."""
+    return await run(db.fetch_precompute_users, today_str, target_date_str, timezone, after_user_id, limit)
+
+
+async def save_precomputed_batch(
+    date_str: str,
+    assignments: list[tuple[int, list[int], int, int, bool]],
+) -> int:
+    """Store a page of ahead-of-time assignments in one transaction."""
+    written = await run(db.save_precomputed_batch, date_str, assignments)
+    for user_id, *_ in assignments:
+        session_cache.invalidate(user_id, date_str)
+    return written
+
+
+async def get_weekly_report_run(week_str: str) -> dict | None:
+    """Return the weekly report checkpoint for the week starting on ``week_str``."""
+    return await run(db.get_weekly_report_run, week_str)
+
+
+async def fetch_weekly_report_page(
+    week_str: str,
+    end_date_str: str,
+    now_iso: str,
+    after_user_id: int,
+    limit: int,
+) -> list[dict]:
+    """Return the next page of premium users' weekly rollups (read only)."""
+    return await run(db.fetch_weekly_report_page, week_str, end_date_str, now_iso, after_user_id, limit)
+
+
+async def advance_weekly_report_run(week_str: str, last_user_id: int) -> None:
+    """Move the week's checkpoint past ``last_user_id``."""
+    await run(db.advance_weekly_report_run, week_str, last_user_id)
+
+
+async def record_weekly_report_result(week_str: str, sent: int, failed: int, finished: bool = False) -> None:
+    """Add delivery counters to the week's checkpoint and optionally close it."""
+    await run(db.record_weekly_report_result, week_str, sent, failed, finished)
+
+
+async def record_broadcast_result(
+    date_str: str,
+    sent: int,
+    failed: int,
+    finished: bool = False,
+    timezone: str | None = None,
+) -> None:
+    """Add delivery counters to the zone's day broadcast checkpoint."""
+    await run(db.record_broadcast_result, date_str, sent, failed, finished, timezone)
+
+
+async def get_due_reviews(user_id: int, due_before: float, limit: int) -> list[int]:
+    """Return ids of the user's words due for review, most overdue first."""
+    return await run(db.get_due_reviews, user_id, due_before, limit)
+
+
+async def mark_user_premium(user_id: int, days: int = 30) -> None:
+    """Mark a user as premium for the given number of days."""
+    await run(db.mark_user_premium, user_id, days=days)
@@ -0,0 +1,157 @@
+### FILE: utils/clock.py
+"""Clock service with cached time zones and day boundaries.
+
+Resolving a ``ZoneInfo`` and formatting dates on every call is wasted work
+when the answer only changes at midnight. :class:`Clock` resolves each zone
+once and keeps yesterday's, today's and tomorrow's date strings until the
+precomputed instant the local day ends. Users may have their own zone; every
+zone gets its own cached day.
+
+The process-wide clock is returned by :func:`get_clock`; tests and benchmarks
+swap in a :class:`FakeClock` with :func:`set_clock`.
+"""
+from __future__ import annotations
+
+import time
+from datetime import UTC, date, datetime, timedelta
+from typing import Callable, NamedTuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from config import TIMEZONE
+
+
+class LocalDay(NamedTuple):
+    """A local calendar day in one zone and the UTC instants bounding it."""
+
+    start: float
+    end: float
+    yesterday: str
+    today: str
+    tomorrow: str
+
+
+def is_valid_timezone(name: str) -> bool:
+    """Return True if ``name`` is a known IANA time zone such as ``Asia/Tashkent``."""
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+class Clock:
+    """Wall clock that caches zones and each zone's current day."""
+
+    def __init__(self, default_timezone: str = TIMEZONE, time_func: Callable[[], float] = time.time) -> None:
+        self.default_timezone = default_timezone
+        self._time = time_func
+        self._zones: dict[str, ZoneInfo] = {}
+        self._days: dict[str, LocalDay] = {}
+
+    def time(self) -> float:
+        """Return the current POSIX timestamp."""
+        return self._time()
+
+    def now_utc(self) -> datetime:
+        """Return the current time as an aware UTC datetime."""
+        return datetime.fromtimestamp(self._time(), UTC)
+
+    def zone(self, name: str | None = None) -> ZoneInfo:
+        """Return the cached zone for ``name`` (the default zone if missing or unknown)."""
+        name = name or self.default_timezone
+        zone = self._zones.get(name)
+        if zone is None:
+            try:
+                zone = ZoneInfo(name)
+            except (ZoneInfoNotFoundError, ValueError):
+                zone = self.zone(None) if name != self.default_timezone else ZoneInfo("UTC")
+            self._zones[name] = zone
+        return zone
+
+    def local_now(self, timezone: str | None = None) -> datetime:
+        """Return the current time in the given zone."""
+        return datetime.fromtimestamp(self._time(), self.zone(timezone))
+
+    def day(self, timezone: str | None = None) -> LocalDay:
+        """Return the current local day, recomputed only once its end has passed."""
+        key = timezone or self.default_timezone
+        now = self._time()
+        day = self._days.get(key)
+        if day is None or not day.start <= now < day.end:
+            day = self._days[key] = self._compute_day(self.zone(key), now)
+        return day
+
+    def today(self, timezone: str | None = None) -> str:
+        """Return today's date string (``YYYY-MM-DD``) in the zone."""
+        return self.day(timezone).today
+
+    def yesterday(self, timezone: str | None = None) -> str:
+        """Return yesterday's date string in the zone."""
+        return self.day(timezone).yesterday
+
+    def tomorrow(self, timezone: str | None = None) -> str:
+        """Return tomorrow's date string in the zone."""
+        return self.day(timezone).tomorrow
+
+    def day_end(self, date_str: str, timezone: str | None = None) -> float:
+        """Return the UTC instant the local day ``date_str`` (``YYYY-MM-DD``) ends in the zone."""
+        day = self.day(timezone)
+        if day.today == date_str:
+            return day.end
+        return _local_midnight(date.fromisoformat(date_str) + timedelta(days=1), self.zone(timezone)).timestamp()
+
+    def seconds_until_local_hour(self, hour: int, timezone: str | None = None) -> float:
+        """Return seconds from now until the next ``hour``:00 in the zone."""
+        now = self.local_now(timezone)
+        target = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+        if target <= now:
+            target = _local_midnight(now.date() + timedelta(days=1), now.tzinfo).replace(hour=hour)
+        return target.timestamp() - now.timestamp()
+
+    @staticmethod
+    def _compute_day(zone: ZoneInfo, now: float) -> LocalDay:
+        today = datetime.fromtimestamp(now, zone).date()
+        yesterday = today - timedelta(days=1)
+        tomorrow = today + timedelta(days=1)
+        return LocalDay(
+            start=_local_midnight(today, zone).timestamp(),
+            end=_local_midnight(tomorrow, zone).timestamp(),
+            yesterday=yesterday.isoformat(),
+            today=today.isoformat(),
+            tomorrow=tomorrow.isoformat(),
+        )
+
+
+class FakeClock(Clock):
+    """Clock whose time only moves when told to."""
+
+    def __init__(self, start: float | datetime = 0.0, default_timezone: str = TIMEZONE) -> None:
+        self._now = start.timestamp() if isinstance(start, datetime) else float(start)
+        super().__init__(default_timezone, time_func=lambda: self._now)
+
+    def set(self, when: float | datetime) -> None:
+        """Jump to the given instant."""
+        self._now = when.timestamp() if isinstance(when, datetime) else float(when)
+
+    def advance(self, seconds: float) -> None:
+        """Move time forward by ``seconds``."""
+        self._now += seconds
+
+
+def _local_midnight(day: date, zone) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=zone)
+
+
+_clock: Clock = Clock()
+
+
+def get_clock() -> Clock:
+    """Return the process-wide clock."""
+    return _clock
+
+
+def set_clock(clock: Clock) -> Clock:
+    """Install ``clock`` as the process-wide clock and return the previous one."""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
@@ -1,23 +1,24 @@
 ### FILE: utils/time.py
-"""Time helpers for SozMaster AI."""
+"""Time helpers for SozMaster AI.
+
+Dates come from the process-wide :class:`~utils.clock.Clock`, which caches
+the zone and the current day; pass ``timezone`` for a user's own zone.
+"""
 from __future__ import annotations
 
-from datetime import UTC, datetime, timedelta
-from zoneinfo import ZoneInfo
+from datetime import datetime
 
-from config import TIMEZONE
+from utils.clock import get_clock
 
 
-def get_tashkent_date_str() -> str:
-    """Return today's date string in Asia/Tashkent timezone."""
-    tz = ZoneInfo(TIMEZONE)
-    now = datetime.now(tz)
-    return now.strftime("%Y-%m-%d")
+def get_tashkent_date_str(timezone: str | None = None) -> str:
+    """Return today's date string in Asia/Tashkent (or the given) timezone."""
+    return get_clock().today(timezone)
 
 
 def now_utc_iso() -> str:
     """Return current UTC time formatted as ISO string."""
-    return datetime.now(UTC).replace(microsecond=0).isoformat()
+    return get_clock().now_utc().replace(microsecond=0).isoformat()
 
 
 def is_premium(user_row: dict | None) -> bool:
@@ -34,12 +35,24 @@ def is_premium(user_row: dict | None) -> bool:
     except ValueError:
         return False
 
-    return premium_dt > datetime.now(UTC)
+    return premium_dt > get_clock().now_utc()
+
+
+def get_yesterday_date_str(timezone: str | None = None) -> str:
+    """Return yesterday's date string in Asia/Tashkent (or the given) timezone."""
+    return get_clock().yesterday(timezone)
+
+
+def get_tomorrow_date_str(timezone: str | None = None) -> str:
+    """Return tomorrow's date string in Asia/Tashkent (or the given) timezone."""
+    return get_clock().tomorrow(timezone)
+
+
+def seconds_until_local_hour(hour: int, timezone: str | None = None) -> float:
+    """Return seconds from now until the next ``hour``:00 in the bot's (or the given) timezone."""
+    return get_clock().seconds_until_local_hour(hour, timezone)
 
 
-def get_yesterday_date_str() -> str:
-    """Return yesterday's date string in Asia/Tashkent timezone."""
-    tz = ZoneInfo(TIMEZONE)
-    now = datetime.now(tz)
-    yesterday = now - timedelta(days=1)
-    return yesterday.strftime("%Y-%m-%d")
+def local_hour(timezone: str | None = None) -> int:
+    """Return the current hour in the bot's (or the given) timezone."""
+    return get_clock().local_now(timezone).hour
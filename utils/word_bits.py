@@ -0,0 +1,136 @@
+### FILE: utils/word_bits.py
+"""Per-user word bitsets and category masks.
+
+Bit ``i`` stands for the word with id ``i`` (its position in
+:data:`wordbank.WORD_BANK`). Sets are Python ints in memory, so ``&``, ``|``
+and ``~`` run over 30-bit digits in C, and little-endian bytes in SQLite
+(``users.seen_words``, ``users.mastered_words``), one bit per word.
+
+Category masks are built once from optional ``level`` and ``topic`` keys on
+the bank entries and named ``"level:B1"``, ``"topic:travel"`` and so on.
+"""
+from __future__ import annotations
+
+import itertools
+import re
+from typing import Iterable, Iterator
+
+from wordbank import WORD_BANK
+
+TOTAL_WORDS = len(WORD_BANK)
+ALL_WORDS = (1 << TOTAL_WORDS) - 1
+
+_NONZERO_BYTE = re.compile(rb"[^\x00]")
+_FIRST_WINDOW_BITS = 1024
+
+
+def bits_from_blob(blob: bytes | None) -> int:
+    """Decode a stored bitset (``NULL`` is the empty set)."""
+    return int.from_bytes(blob, "little") if blob else 0
+
+
+def bits_to_blob(bits: int) -> bytes | None:
+    """Encode a bitset for storage (the empty set is stored as ``NULL``)."""
+    if not bits:
+        return None
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def blob_has_word(blob: bytes | None, word_id: int) -> bool:
+    """Return True if a stored bitset holds ``word_id``; O(1), no decoding."""
+    byte = word_id >> 3
+    return bool(blob) and byte < len(blob) and bool(blob[byte] >> (word_id & 7) & 1)
+
+
+def mask_of(word_ids: Iterable[int]) -> int:
+    """Return the bitset holding the given word ids."""
+    bits = 0
+    for word_id in word_ids:
+        bits |= 1 << word_id
+    return bits
+
+
+def iter_word_ids(bits: int, lo: int = 0, hi: int | None = None) -> Iterator[int]:
+    """Yield the ids in a bitset that fall in ``[lo, hi)``, in ascending order.
+
+    The set is read in windows that double in size, and zero bytes inside a
+    window are skipped by a regex search in C, so taking the first few ids
+    of a dense set stays cheap while a full pass remains linear.
+    """
+    hi = bits.bit_length() if hi is None else min(hi, bits.bit_length())
+    pos, width = lo, _FIRST_WINDOW_BITS
+    while pos < hi:
+        size = min(width, hi - pos)
+        window = (bits >> pos) & ((1 << size) - 1)
+        if window:
+            buf = window.to_bytes((size + 7) // 8, "little")
+            for match in _NONZERO_BYTE.finditer(buf):
+                index = match.start()
+                byte = buf[index]
+                while byte:
+                    lowest = byte & -byte
+                    yield pos + index * 8 + lowest.bit_length() - 1
+                    byte ^= lowest
+        pos += size
+        width *= 2
+
+
+def _build_category_masks() -> dict[str, int]:
+    masks: dict[str, int] = {}
+    for word_id, word in enumerate(WORD_BANK):
+        for field in ("level", "topic"):
+            value = word.get(field)
+            if value:
+                key = f"{field}:{value}"
+                masks[key] = masks.get(key, 0) | (1 << word_id)
+    return masks
+
+
+CATEGORY_MASKS = _build_category_masks()
+
+
+def category_mask(*categories: str) -> int:
+    """Return the words in all of the given categories (the whole bank if none given).
+
+    Unknown categories match nothing.
+    """
+    mask = ALL_WORDS
+    for category in categories:
+        mask &= CATEGORY_MASKS.get(category, 0)
+    return mask
+
+
+def _take_from(candidates: int, start: int, count: int, taken: list[int]) -> None:
+    """Append up to ``count`` ids from ``candidates``, from ``start`` upwards with wrap-around."""
+    for word_id in itertools.chain(iter_word_ids(candidates, start), iter_word_ids(candidates, 0, start)):
+        if len(taken) >= count:
+            return
+        taken.append(word_id)
+
+
+def select_word_ids(
+    seen: int,
+    mastered: int,
+    start: int,
+    count: int,
+    mask: int = ALL_WORDS,
+    total_words: int = TOTAL_WORDS,
+) -> tuple[list[int], int]:
+    """Pick ``count`` words inside ``mask`` for a user, preferring unseen ones.
+
+    Unseen words come first, in bank order from ``start`` with wrap-around.
+    Once those run out, seen but not yet mastered words fill the set, then
+    any word in the mask. Returns the ids and the index to continue from.
+    """
+    count = min(count, (mask & ((1 << total_words) - 1)).bit_count())
+    start %= total_words or 1
+    taken: list[int] = []
+    remaining = mask
+    for pool in (mask & ~seen, mask & seen & ~mastered, mask):
+        _take_from(pool & remaining, start, count, taken)
+        if len(taken) == count:
+            break
+        remaining &= ~mask_of(taken)
+    if not taken:
+        return [], start
+    return taken, (taken[-1] + 1) % total_words
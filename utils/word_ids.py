@@ -0,0 +1,54 @@
+### FILE: utils/word_ids.py
+"""Compact word-id encoding for daily word assignments.
+
+A word id is the word's position in :data:`wordbank.WORD_BANK`. Assignments
+are stored as a one-byte typecode (``H`` for uint16, ``I`` for uint32)
+followed by the little-endian id array.
+"""
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import Iterable
+
+from wordbank import WORD_BANK
+
+# Shared, read-only word dicts that also carry their id.
+_WORDS_WITH_IDS = [dict(word, id=index) for index, word in enumerate(WORD_BANK)]
+WORD_ID_BY_TEXT = {word["word"]: index for index, word in enumerate(WORD_BANK)}
+
+
+def pack_word_ids(word_ids: Iterable[int]) -> bytes:
+    """Pack word ids into the smallest fixed-width little-endian array."""
+    ids = list(word_ids)
+    typecode = "H" if max(ids, default=0) <= 0xFFFF else "I"
+    packed = array(typecode, ids)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return typecode.encode("ascii") + packed.tobytes()
+
+
+def unpack_word_ids(blob: bytes) -> list[int]:
+    """Decode a blob produced by :func:`pack_word_ids`."""
+    if not blob:
+        return []
+    unpacked = array(chr(blob[0]))
+    unpacked.frombytes(blob[1:])
+    if sys.byteorder == "big":
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+
+def collect_word_ids(start_index: int, count: int) -> tuple[list[int], int]:
+    """Collect a sequential slice of word ids from the bank with wrap-around.
+
+    Returns the ids and the index to continue from next time.
+    """
+    total_words = len(WORD_BANK)
+    selected = [(start_index + offset) % total_words for offset in range(count)]
+    return selected, (start_index + count) % total_words
+
+
+def resolve_word_ids(word_ids: Iterable[int]) -> list[dict]:
+    """Return the word bank entries for the given ids (shared, do not mutate)."""
+    return [_WORDS_WITH_IDS[word_id] for word_id in word_ids]
@@ -0,0 +1,135 @@
+### FILE: webhook.py
+"""Webhook serving mode for SozMaster AI.
+
+Telegram POSTs updates to an aiohttp endpoint. The endpoint checks the
+secret token, queues the update and answers 200 at once; a fixed pool of
+worker tasks feeds queued updates to the dispatcher in the background.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import secrets
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """aiohttp webhook endpoint backed by a bounded queue and worker tasks."""
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        path: str,
+        secret: str,
+        workers: int = 16,
+        queue_size: int = 10000,
+    ) -> None:
+        if not secret:
+            raise ValueError("A webhook secret is required; without it anyone can post updates.")
+        self.dp = dp
+        self.bot = bot
+        self.path = path
+        self.secret = secret
+        self.worker_count = workers
+        self.queue: asyncio.Queue[Update] = asyncio.Queue(maxsize=queue_size)
+        self._workers: list[asyncio.Task] = []
+        self._runner: web.AppRunner | None = None
+        self.received = 0
+        self.processed = 0
+        self.rejected = 0
+
+    def build_app(self) -> web.Application:
+        """Return the aiohttp application serving the webhook path."""
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Accept one update from Telegram without waiting for its handlers."""
+        # Compared as bytes: compare_digest rejects str with non-ASCII characters.
+        if not secrets.compare_digest(request.headers.get(SECRET_HEADER, "").encode(), self.secret.encode()):
+            return web.Response(status=401, text="Unauthorized")
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except ValueError:
+            return web.Response(status=400, text="Bad update")
+
+        try:
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            # A non-2xx status makes Telegram redeliver the update later.
+            self.rejected += 1
+            return web.Response(status=503, text="Busy")
+        self.received += 1
+        return web.Response()
+
+    async def _worker(self) -> None:
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception:
+                logger.exception("Update %s failed", update.update_id)
+            finally:
+                self.processed += 1
+                self.queue.task_done()
+
+    async def start(self, host: str, port: int) -> None:
+        """Start the worker pool and the HTTP listener."""
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"webhook-worker-{index}")
+            for index in range(self.worker_count)
+        ]
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info("Webhook %s:%s%s, %s workers", host, port, self.path, self.worker_count)
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        """Stop accepting updates, let queued ones finish, then stop workers."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Dropping %s queued updates on shutdown", self.queue.qsize())
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+async def run_webhook(
+    dp: Dispatcher,
+    bot: Bot,
+    *,
+    url: str,
+    path: str,
+    secret: str,
+    host: str,
+    port: int,
+    workers: int,
+    queue_size: int,
+) -> None:
+    """Register the webhook with Telegram and serve until cancelled."""
+    server = WebhookServer(dp, bot, path=path, secret=secret, workers=workers, queue_size=queue_size)
+    await server.start(host, port)
+    await bot.set_webhook(
+        url=url.rstrip("/") + path,
+        secret_token=secret,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
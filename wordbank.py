@@ -1,5 +1,9 @@
 ### FILE: wordbank.py
-"""Static word bank for SozMaster AI."""
+"""Static word bank for SozMaster AI.
+
+A word's position in ``WORD_BANK`` is its id in stored assignments, so new
+words must only ever be appended.
+"""
 WORD_BANK = [
     {"word": "achieve", "pronunciation": "/əˈtʃiːv/", "translation_uz": "erishmoq", "example": "You can achieve your goals if you try.", "exercise": "You can _____ your goals if you try."},
     {"word": "enjoy", "pronunciation": "/ɪnˈdʒɔɪ/", "translation_uz": "zavqlanmoq", "example": "We enjoy learning new words every day.", "exercise": "We _____ learning new words every day."},
@@ -0,0 +1,241 @@
+### FILE: write_behind.py
+"""Write-behind buffer for hot per-tap updates.
+
+XP increments (per user and award day) and quiz progress updates are coalesced in memory and
+flushed to SQLite in one transaction once either the delay or the size bound
+is reached. Answered questions (which feed the answer log, the daily rollups and
+review scheduling) cannot be coalesced and are flushed in answer order.
+All methods must be called from the event loop thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+ProgressKey = tuple[int, str]
+# (user_id, date_str, word_id or None, is_correct, finished_quiz, answered_at)
+Answer = tuple[int, str, int | None, bool, bool, float]
+# user_id -> {award date (default zone): amount}
+XpIncrements = dict[int, dict[str, int]]
+FlushFunc = Callable[
+    [XpIncrements, dict[ProgressKey, tuple[int, int]], set[ProgressKey], list[Answer]],
+    Awaitable[None],
+]
+
+
+class WriteBehindBuffer:
+    """Coalesce XP and quiz progress writes and flush them in batches."""
+
+    def __init__(self, flush_func: FlushFunc, max_delay_ms: int, max_pending: int) -> None:
+        self._flush_func = flush_func
+        self._max_delay = max_delay_ms / 1000
+        self._max_pending = max_pending
+
+        self._xp: XpIncrements = {}
+        self._progress: dict[ProgressKey, tuple[int, int]] = {}
+        self._deleted: set[ProgressKey] = set()
+        self._answers: list[Answer] = []
+        self._pending_updates = 0
+
+        # Batch currently being written; reads overlay it until the write lands.
+        self._inflight_xp: XpIncrements = {}
+        self._inflight_progress: dict[ProgressKey, tuple[int, int]] = {}
+        self._inflight_deleted: set[ProgressKey] = set()
+        self._inflight_answers: list[Answer] = []
+
+        self._has_pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        self.updates_received = 0
+        self.rows_written = 0
+        self.flushes = 0
+
+    # ------------------------------------------------------------------ writes
+    def add_xp(self, user_id: int, amount: int, date_str: str) -> None:
+        """Queue an XP increment awarded to the user on ``date_str``."""
+        by_date = self._xp.setdefault(user_id, {})
+        by_date[date_str] = by_date.get(date_str, 0) + amount
+        self._record_update()
+
+    def update_progress(self, user_id: int, date_str: str, index: int, correct_count: int) -> None:
+        """Queue a quiz progress update, replacing any pending one."""
+        key = (user_id, date_str)
+        self._deleted.discard(key)
+        self._progress[key] = (index, correct_count)
+        self._record_update()
+
+    def clear_progress(self, user_id: int, date_str: str) -> None:
+        """Queue deletion of the user's quiz progress row."""
+        key = (user_id, date_str)
+        self._progress.pop(key, None)
+        self._deleted.add(key)
+        self._record_update()
+
+    def record_answer(
+        self,
+        user_id: int,
+        date_str: str,
+        word_id: int | None,
+        is_correct: bool,
+        finished: bool,
+        answered_at: float,
+    ) -> None:
+        """Queue one answered quiz question."""
+        self._answers.append((user_id, date_str, word_id, is_correct, finished, answered_at))
+        self._record_update()
+
+    def discard_progress(self, user_id: int, date_str: str) -> None:
+        """Drop pending progress for a row that is about to be written directly."""
+        key = (user_id, date_str)
+        self._progress.pop(key, None)
+        self._deleted.discard(key)
+
+    # ------------------------------------------------------------------- reads
+    def pending_xp(self, user_id: int) -> int:
+        """Return XP not yet visible in the database for the user."""
+        return sum(self._xp.get(user_id, {}).values()) + sum(self._inflight_xp.get(user_id, {}).values())
+
+    def pending_xp_totals(self) -> dict[int, int]:
+        """Return every user's XP not yet visible in the database."""
+        totals: dict[int, int] = {}
+        for pending in (self._inflight_xp, self._xp):
+            for user_id, by_date in pending.items():
+                totals[user_id] = totals.get(user_id, 0) + sum(by_date.values())
+        return totals
+
+    def overlay_progress(self, user_id: int, date_str: str, row: dict | None) -> dict | None:
+        """Apply pending progress changes on top of a row read from the database."""
+        key = (user_id, date_str)
+        for progress, deleted in (
+            (self._progress, self._deleted),
+            (self._inflight_progress, self._inflight_deleted),
+        ):
+            if key in deleted:
+                return None
+            if key in progress:
+                if row is None:
+                    return None
+                index, correct_count = progress[key]
+                return {**row, "current_question_index": index, "correct_count": correct_count}
+        return row
+
+    def stats(self) -> dict[str, float]:
+        """Return counters describing how well updates are being coalesced."""
+        ratio = self.updates_received / self.rows_written if self.rows_written else 0.0
+        return {
+            "updates_received": self.updates_received,
+            "rows_written": self.rows_written,
+            "flushes": self.flushes,
+            "pending_updates": self._pending_updates,
+            "coalescing_ratio": round(ratio, 2),
+        }
+
+    # --------------------------------------------------------------- lifecycle
+    def start(self) -> None:
+        """Start the background flush loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="write-behind-flush")
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write everything that is still pending."""
+        if self._task is not None:
+            # Not cancelled: the loop finishes the flush it may be in and exits.
+            self._stopping = True
+            self._has_pending.set()
+            self._full.set()
+            await self._task
+            self._task = None
+            self._stopping = False
+        await self.flush()
+        logger.info("Write-behind buffer stopped: %s", self.stats())
+
+    async def flush(self) -> None:
+        """Write all pending updates in a single transaction."""
+        async with self._flush_lock:
+            self._has_pending.clear()
+            self._full.clear()
+            if not (self._xp or self._progress or self._deleted or self._answers):
+                return
+
+            self._inflight_xp, self._xp = self._xp, {}
+            self._inflight_progress, self._progress = self._progress, {}
+            self._inflight_deleted, self._deleted = self._deleted, set()
+            self._inflight_answers, self._answers = self._answers, []
+            self._pending_updates = 0
+            written = (
+                len(self._inflight_xp)
+                + len(self._inflight_progress)
+                + len(self._inflight_deleted)
+                + len(self._inflight_answers)
+            )
+            # Shielded: cancelling the caller must not abandon a batch mid-write.
+            write = asyncio.ensure_future(
+                self._flush_func(
+                    self._inflight_xp, self._inflight_progress, self._inflight_deleted, self._inflight_answers
+                )
+            )
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                # The write carries on in the background; it lands or fails
+                # as a whole, so wait for it before deciding to requeue.
+                try:
+                    await asyncio.wait({write})
+                except asyncio.CancelledError:
+                    pass
+                if not write.done() or write.cancelled() or write.exception() is not None:
+                    self._requeue_inflight()
+                else:
+                    self.rows_written += written
+                    self.flushes += 1
+                raise
+            except Exception:
+                logger.exception("Write-behind flush failed; keeping updates for retry")
+                self._requeue_inflight()
+            else:
+                self.rows_written += written
+                self.flushes += 1
+            finally:
+                self._inflight_xp = {}
+                self._inflight_progress = {}
+                self._inflight_deleted = set()
+                self._inflight_answers = []
+
+    # ---------------------------------------------------------------- internal
+    def _record_update(self) -> None:
+        self.updates_received += 1
+        self._pending_updates += 1
+        self._has_pending.set()
+        if self._pending_updates >= self._max_pending:
+            self._full.set()
+
+    def _requeue_inflight(self) -> None:
+        """Merge a failed batch back under any updates queued since."""
+        for user_id, inflight in self._inflight_xp.items():
+            by_date = self._xp.setdefault(user_id, {})
+            for date_str, amount in inflight.items():
+                by_date[date_str] = by_date.get(date_str, 0) + amount
+        for key, value in self._inflight_progress.items():
+            if key not in self._progress and key not in self._deleted:
+                self._progress[key] = value
+        for key in self._inflight_deleted:
+            if key not in self._progress:
+                self._deleted.add(key)
+        self._answers[:0] = self._inflight_answers
+        self._pending_updates += 1
+        self._has_pending.set()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            await self._has_pending.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self._max_delay)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()